@@ -1,13 +1,44 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context, g
 from flask_cors import CORS
 import pandas as pd
+import numpy as np
 import os
 import io
+import sys
+import csv
 import json
 from datetime import datetime
 from werkzeug.utils import secure_filename
 import tempfile
 import logging
+import hashlib
+import copy
+import re
+import pickle
+import shutil
+import stat
+import threading
+import uuid
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from collections import OrderedDict
+from collections.abc import Sequence
+import time
+import codecs
+import gzip
+import zlib
+import cProfile
+import pstats
+from contextlib import contextmanager
+from itertools import islice
+from bisect import bisect_left
+from operator import itemgetter
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+from pandas.api.types import union_categoricals
+from openpyxl import Workbook, load_workbook
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,7 +50,8 @@ app = Flask(__name__)
 CORS(app, 
      origins=["*"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     allow_headers=["Content-Type", "Authorization"],
+     allow_headers=["Content-Type", "Authorization", "If-None-Match"],
+     expose_headers=["ETag"],
      supports_credentials=False
 )
 
@@ -27,11 +59,194 @@ CORS(app,
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
 ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv'}
 
+GEREKLI_SUTUNLAR = ['Depo Adı', 'Ürün Kodu', 'Ürün Adı', 'Satis', 'Envanter']
+OPSIYONEL_SUTUNLAR = ['Renk Açıklaması', 'Beden']
+DELTA_SUTUNLARI = ['Depo Adı', 'Ürün Adı', 'Satis', 'Envanter']
+METIN_SUTUNLARI = ['Depo Adı', 'Ürün Kodu', 'Ürün Adı', 'Renk Açıklaması', 'Beden']
+# pd.read_csv'nin bool olarak okuduğu metinler
+DOGRULUK_METINLERI = {'True': True, 'TRUE': True, 'true': True, 'False': False, 'FALSE': False, 'false': False}
+PARCA_SATIR = int(os.environ.get('RETAILFLOW_CHUNK_ROWS', 100000))
+KODLAMA_ORNEK_BAYT = 64 * 1024
+# Kompakt veri: yalnızca analiz sütunları, kategorik metin, küçük tam sayı, salt okunur diziler
+KOMPAKT_VERI = os.environ.get('RETAILFLOW_COMPACT_DATA', '1').lower() not in ('0', 'false', 'no')
+
+# İçerik adresli veri/analiz önbelleği; pickle ile geri okunduğu için klasör
+# kullanıcıya özel olmalı (varsayılan kullanıcı başına, 0700, sahibi denetlenir)
+ONBELLEK_KLASORU = os.environ.get('RETAILFLOW_CACHE_DIR', os.path.join(
+    tempfile.gettempdir(), f'retailflow_cache_{os.getuid()}' if hasattr(os, 'getuid') else 'retailflow_cache'))
+ONBELLEK_MAX_MB = int(os.environ.get('RETAILFLOW_CACHE_MAX_MB', 1024))  # 0 = kapalı
+# Analiz çıktısını etkileyen her değişiklikte artırılmalı
+ALGORITMA_SURUMU = 'global-str-3'
+COK_MAGAZALI_SURUMU = 'cok-magazali-5'
+ANALIZ_MOTORLARI = ('global', 'cok_magazali')
+ANALIZ_BLOK_ANAHTAR = 20000  # ilerleme/iptal denetimi arasındaki ürün anahtarı sayısı
+# Transfer kuralları; /scenarios bunları senaryo başına değiştirir
+VARSAYILAN_KURALLAR = {
+    'min_str_farki': 0.15,       # alan - gönderen STR farkı en az
+    'min_gonderen_envanter': 3,  # gönderen envanteri en az
+    'max_oran': 0.40,            # gönderen envanterinin en fazla bu oranı gönderilir
+    'min_kalan': 2,              # gönderende en az bu kadar kalır
+    'max_adet': 5                # tek transferde en fazla adet
+}
+
+# Paralel analiz: ürün anahtarı aralıkları süreç havuzunda işlenir (1 = seri)
+ANALIZ_SUREC_SAYISI = int(os.environ.get('RETAILFLOW_ANALYSIS_PROCESSES', 1))
+ANALIZ_PARCA_CARPANI = 4  # süreç başına parça sayısı; yavaş parçaları dengeler
+KOD_ALANLARI = ('urun_anahtar_kodlari', 'urun_anahtar_tablosu', 'magaza_kodlari', 'magaza_tablosu')
+
+# Veri seti kimliği: içeriğin SHA-256 özeti (önbellek klasör adı olarak da kullanılır)
+VERI_KIMLIGI_DESENI = re.compile(r'[0-9a-f]{64}')
+
+# Süreç içi veri seti kayıt defteri
+KAYIT_MAX_MB = int(os.environ.get('RETAILFLOW_REGISTRY_MAX_MB', 2048))
+KAYIT_TTL_SN = int(os.environ.get('RETAILFLOW_REGISTRY_TTL_SECONDS', 3600))
+ANALIZ_ORNEK_SATIR = 256  # analiz bellek tahmininde liste başına ölçülen satır
+
+# Arka plan analiz işleri
+ANALIZ_IS_SAYISI = int(os.environ.get('RETAILFLOW_ANALYSIS_WORKERS', 2))
+ANALIZ_KUYRUK_SINIRI = int(os.environ.get('RETAILFLOW_ANALYSIS_QUEUE', 16))
+IS_KIMLIGI_DESENI = re.compile(r'[0-9a-f]{32}')
+
+# /results sayfalama
+SONUC_SIRALAMALARI = ('str_farki', 'transfer_miktari', 'alan_stok_durumu')
+SONUC_MAX_LIMIT = 1000
+STOK_DURUMU_SIRASI = {'KRİTİK': 0, 'DÜŞÜK': 1, 'NORMAL': 2, 'YÜKSEK': 3}
+
+# Dışa aktarım: akış formatlarında bu kadar satır tek parçada gönderilir
+DISA_AKTARIM_PARCA = 1000
+
+# /scenarios: istek parametresi -> kural adı
+SENARYO_PARAMETRELERI = {
+    'min_str_diff': 'min_str_farki',
+    'min_sender_inventory': 'min_gonderen_envanter',
+    'max_share': 'max_oran',
+    'min_remaining': 'min_kalan',
+    'max_units': 'max_adet'
+}
+SENARYO_MAX = 1000
+SENARYO_SONUC_MAX = 10  # tam sonuç istenebilecek en fazla senaryo
+SENARYO_BLOK_ELEMAN = 2000000  # tek geçişte işlenen senaryo x ürün anahtarı hücresi
+
+# Yanıt biçimleri: rows = satır sözlükleri, columnar = sütun dizileri + sözlük kodlaması
+YANIT_BICIMLERI = ('rows', 'columnar')
+# Sütunlu biçimde koda çevrilen metin sütunları -> ortak sözlük adı
+SOZLUK_SUTUNLARI = {
+    'magaza': 'magaza',
+    'gonderen_magaza': 'magaza',
+    'alan_magaza': 'magaza',
+    'urun_anahtari': 'urun_anahtari',
+    'urun_kodu': 'urun_kodu',
+    'urun_adi': 'urun_adi',
+    'renk': 'renk',
+    'beden': 'beden',
+    'uygulanan_filtre': 'uygulanan_filtre',
+    'alan_stok_durumu': 'alan_stok_durumu'
+}
+SIKISTIRMA_MIN_BAYT = 1024  # daha küçük JSON gövdeleri sıkıştırılmaz
+SIKISTIRMA_SEVIYESI = 6
+
+# /metrics: süre histogramlarının üst sınırları (sn)
+GECIKME_KOVALARI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+OLCUM_ACIKLAMALARI = {
+    'retailflow_request_duration_seconds': 'HTTP istek süresi (yanıt gövdesi akışı hariç)',
+    'retailflow_stage_duration_seconds': 'Yükleme, analiz, serileştirme ve dışa aktarım aşamalarının süresi',
+    'retailflow_stage_rss_delta_bytes': 'Aşamanın son çalışmasında RSS değişimi',
+    'retailflow_datasets': 'Kayıt defterindeki veri seti sayısı',
+    'retailflow_dataset_rows': 'Veri setinin satır sayısı',
+    'retailflow_dataset_stores': 'Veri setinin mağaza sayısı',
+    'retailflow_dataset_memory_bytes': 'Veri setinin bellek kullanımı',
+    'retailflow_dataset_transfers': 'Veri setinin son analizindeki transfer sayısı',
+    'retailflow_registry_memory_budget_bytes': 'Kayıt defterinin bellek bütçesi',
+    'retailflow_analysis_jobs': 'Duruma göre arka plan analiz işi sayısı',
+    'retailflow_process_resident_memory_bytes': 'Sürecin şu anki RSS değeri'
+}
+
+# İstek başına cProfile (?profile=1); yalnızca açıkça etkinleştirilirse
+PROFIL_ACIK = os.environ.get('RETAILFLOW_PROFILING', '').lower() in ('1', 'true', 'yes')
+PROFIL_KLASORU = os.environ.get('RETAILFLOW_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'retailflow_profiles'))
+PROFIL_SATIR = 60  # metin raporundaki fonksiyon sayısı
+
+class AnalizIptalEdildi(Exception):
+    """İlerleme geri çağırması analizi durdurmak istediğinde fırlatılır"""
+
+
+def ozel_klasor_olustur(klasor):
+    """Klasörü yalnızca bu kullanıcıya açık (0700) oluştur ve güvenli olduğunu doğrula
+
+    Var olan klasör sembolik bağ olmamalı ve bu kullanıcıya ait olmalı; grup/diğer
+    izinleri varsa kapatılır. Güvenli değilse False döner.
+    """
+    os.makedirs(klasor, mode=0o700, exist_ok=True)
+    if not hasattr(os, 'getuid'):
+        return os.path.isdir(klasor)
+    bilgi = os.lstat(klasor)
+    if stat.S_ISLNK(bilgi.st_mode) or not stat.S_ISDIR(bilgi.st_mode):
+        logger.warning(f"{klasor} bir klasör değil (sembolik bağ olabilir)")
+        return False
+    if bilgi.st_uid != os.getuid():
+        logger.warning(f"{klasor} başka bir kullanıcıya ait (uid {bilgi.st_uid})")
+        return False
+    if stat.S_IMODE(bilgi.st_mode) & 0o077:
+        os.chmod(klasor, 0o700)
+    return True
+
+
+def sayi_metni(deger, ondalik=False):
+    """Miktarı mesaj için eski motordaki gibi yaz
+
+    Yüklenen sütun ondalık (float) ise str(float) ('2.0'), tam sayı ise tam sayı
+    değerler tip ne olursa olsun 2 olarak, diğerleri olduğu gibi.
+    """
+    if ondalik:
+        return str(float(deger))
+    try:
+        if float(deger).is_integer():
+            return str(int(deger))
+    except (TypeError, ValueError, OverflowError):
+        pass
+    return str(deger)
+
+
+def yuvarla_dizisi(degerler, basamak=1):
+    """[round(x, basamak) for x in degerler] ile birebir aynı değerler, float64 dizi olarak
+
+    np.round yarıma çok yakın değerlerde Python round'dan ayrılabilir; yalnızca
+    bu değerler round ile yeniden hesaplanır.
+    """
+    degerler = np.asarray(degerler, dtype=np.float64)
+    carpan = 10.0 ** basamak
+    olcekli = degerler * carpan
+    sonuc = np.rint(olcekli) / carpan
+    supheli = np.flatnonzero(~(np.abs(olcekli - np.floor(olcekli) - 0.5) > 1e-6))
+    if len(supheli):
+        sonuc[supheli] = [round(x, basamak) for x in degerler[supheli].tolist()]
+    return sonuc
+
+
 class MagazaTransferSistemi:
     def __init__(self):
         self.data = None
         self.magazalar = []
         self.mevcut_analiz = None
+        self.veri_kimligi = None
+        self.urun_anahtar_kodlari = None
+        self.urun_anahtar_tablosu = None
+        self.magaza_kodlari = None
+        self.magaza_tablosu = None
+        self.ondalik_sutunlar = ()
+        self._magaza_metrik_onbellegi = None
+        self._sonuc_indeksi_onbellegi = None
+        self._magaza_toplamlari = None
+        self._anahtar_no_onbellegi = None
+        self._anahtar_sirasi_onbellegi = None
+        self._taban_ozeti = None
+        self._delta_yamasi = None
+        self._analiz_yamasi = None
+        self._taban_anahtar_sayisi = None
+        self._yama_indeksi = None
+        self.delta_kimligi = None
+        self.taban_kimligi = None
+        self.analiz_kimligi = None
 
     def dosya_yukle_df(self, df):
         """DataFrame'i yükle ve işle - ORIJINAL KOD"""
@@ -41,55 +256,175 @@ class MagazaTransferSistemi:
             
             logger.info(f"Bulunan sütunlar: {list(df.columns)}")
             
-            gerekli_sutunlar = ['Depo Adı', 'Ürün Kodu', 'Ürün Adı', 'Satis', 'Envanter']
-            eksik_sutunlar = [s for s in gerekli_sutunlar if s not in df.columns]
+            eksik_sutunlar = [s for s in GEREKLI_SUTUNLAR if s not in df.columns]
             
             if eksik_sutunlar:
                 return False, f"Eksik sütunlar: {', '.join(eksik_sutunlar)}"
             
-            df = df.dropna(subset=['Depo Adı'])
-            df['Satis'] = pd.to_numeric(df['Satis'], errors='coerce').fillna(0)
-            df['Envanter'] = pd.to_numeric(df['Envanter'], errors='coerce').fillna(0)
-            
-            # Negatif değerleri sıfırla
-            df['Satis'] = df['Satis'].clip(lower=0)
-            df['Envanter'] = df['Envanter'].clip(lower=0)
-            
-            self.data = df
-            self.magazalar = df['Depo Adı'].unique().tolist()
-            
-            logger.info(f"Veri yüklendi: {len(df)} satır, {len(self.magazalar)} mağaza")
-            
-            return True, {
-                'message': f"Başarılı! {len(df):,} ürün, {len(self.magazalar)} mağaza yüklendi.",
-                'satir_sayisi': len(df),
-                'magaza_sayisi': len(self.magazalar),
-                'magazalar': self.magazalar,
-                'sutunlar': list(df.columns)
-            }
+            with olcumler.asama('upload_clean'):
+                df = self._veri_temizle(df)
+            return True, self._veri_ayarla(df)
             
         except Exception as e:
             logger.error(f"Dosya yükleme hatası: {str(e)}")
             return False, f"Hata: {str(e)}"
 
+    def parcalardan_yukle(self, parcalar):
+        """Sütun adları temizlenmiş ham parçaları tek tek temizleyip birleştirerek yükle
+
+        Metin sütunlarının tipi birleştirmeden sonra tüm sütun üzerinden çıkarılır
+        (_metin_tipi_cikar); boş hücre bilgisi, pandas okuyucularında olduğu gibi
+        depo adı olmayan satırlar atılmadan önce toplanır.
+        """
+        try:
+            # Okuma parça üretiminde, temizlik parça başına: süreler ayrı toplanır
+            temiz_parcalar = []
+            bos_var = {}
+            temizlik_sn = 0.0
+            for parca in olculen_akis(parcalar, 'upload_parse'):
+                baslangic = time.perf_counter()
+                for sutun in METIN_SUTUNLARI:
+                    if sutun in parca.columns:
+                        bos_var[sutun] = bos_var.get(sutun, False) or bool(parca[sutun].isna().any())
+                temiz_parcalar.append(self._veri_temizle(parca))
+                temizlik_sn += time.perf_counter() - baslangic
+            if not temiz_parcalar:
+                return False, "Dosyada veri bulunamadı"
+
+            baslangic = time.perf_counter()
+            df = _parcalari_birlestir(temiz_parcalar)
+            for sutun, bos in bos_var.items():
+                df[sutun] = _metin_tipi_cikar(df[sutun], bos)
+            olcumler.asama_kaydet('upload_clean', temizlik_sn + time.perf_counter() - baslangic)
+            return True, self._veri_ayarla(df)
+
+        except UnicodeDecodeError:
+            raise
+        except Exception as e:
+            logger.error(f"Dosya yükleme hatası: {str(e)}")
+            return False, f"Hata: {str(e)}"
+
+    def _veri_temizle(self, df):
+        """Depo adı olmayan satırları at, satış/envanteri sayıya çevir ve negatifleri sıfırla"""
+        df = df.dropna(subset=['Depo Adı'])
+        df['Satis'] = _sayiya_cevir(df['Satis']).fillna(0)
+        df['Envanter'] = _sayiya_cevir(df['Envanter']).fillna(0)
+        
+        # Negatif değerleri sıfırla
+        df['Satis'] = df['Satis'].clip(lower=0)
+        df['Envanter'] = df['Envanter'].clip(lower=0)
+        return df
+
+    def _veri_ayarla(self, df, kodlar=None):
+        """Temizlenmiş veriyi sisteme yerleştir, kodları üret (veya hazır kodları al) ve önbellekleri sıfırla
+
+        Kodlar hazır değilse (yeni ayrıştırılmış veri) ve KOMPAKT_VERI açıksa
+        veri önce kompakt biçime çevrilir.
+        """
+        if kodlar is None and KOMPAKT_VERI:
+            with olcumler.asama('upload_compact'):
+                df = veri_sikistir(df)
+        self.data = df
+        self.ondalik_sutunlar = ondalik_sutunlari(df)
+        self.magazalar = df['Depo Adı'].unique().tolist()
+        self.veri_kimligi = None
+        self.mevcut_analiz = None
+        self.analiz_kimligi = None
+        if kodlar is None:
+            with olcumler.asama('upload_keys'):
+                self._kodlari_olustur()
+        else:
+            for ad in KOD_ALANLARI:
+                setattr(self, ad, kodlar[ad])
+        self._magaza_metrik_onbellegi = None
+        self._sonuc_indeksi_onbellegi = None
+        self._magaza_toplamlari = None
+        self._anahtar_no_onbellegi = None
+        self._anahtar_sirasi_onbellegi = None
+        self._taban_ozeti = None
+        self._delta_yamasi = None
+        self._analiz_yamasi = None
+        self._taban_anahtar_sayisi = None
+        self._yama_indeksi = None
+        self.delta_kimligi = None
+        self.taban_kimligi = None
+        
+        logger.info(f"Veri yüklendi: {len(df)} satır, {len(self.magazalar)} mağaza")
+        
+        return self.yukleme_ozeti()
+
+    def yukleme_ozeti(self):
+        """Yüklenen verinin /upload yanıtındaki özeti"""
+        return {
+            'message': f"Başarılı! {len(self.data):,} ürün, {len(self.magazalar)} mağaza yüklendi.",
+            'satir_sayisi': len(self.data),
+            'magaza_sayisi': len(self.magazalar),
+            'magazalar': self.magazalar,
+            'sutunlar': list(self.data.columns),
+            'bellek': self.bellek_ozeti()
+        }
+
+    def bellek_raporu(self):
+        """Sütun ve kod dizisi başına bayt (kategoriklerde kodlar + kategori değerleri)"""
+        rapor = {ad: int(bayt) for ad, bayt in self.data.memory_usage(index=False, deep=True).items()}
+        for ad in KOD_ALANLARI:
+            dizi = getattr(self, ad)
+            if dizi is not None:
+                rapor[ad] = int(dizi.nbytes)
+        return rapor
+
+    def bellek_ozeti(self):
+        """/upload yanıtındaki bellek raporu: sütun başına bayt, tipler ve satır başına toplam"""
+        rapor = self.bellek_raporu()
+        toplam = sum(rapor.values())
+        return {
+            'kompakt': KOMPAKT_VERI,
+            'toplam_bayt': toplam,
+            'bayt_per_satir': round(toplam / len(self.data), 1) if len(self.data) else None,
+            'sutun_bayt': rapor,
+            'sutun_tipleri': {ad: str(tip) for ad, tip in self.data.dtypes.items()}
+        }
+
+    def sonuc_indeksi(self):
+        """Mevcut analizin sayfalama indeksi; analiz değişince yeniden kurulur"""
+        indeks = self._sonuc_indeksi_onbellegi
+        if indeks is None or indeks.analiz is not self.mevcut_analiz:
+            indeks = SonucIndeksi(self.mevcut_analiz)
+            self._sonuc_indeksi_onbellegi = indeks
+        return indeks
+
     def magaza_metrikleri_hesapla(self):
-        """Her mağaza için metrikleri hesapla - ORIJINAL KOD"""
+        """Her mağaza için metrikleri mağaza kodları üzerinden tek geçişte hesapla (veri başına önbellekli)"""
         if self.data is None:
             return {}
+        if self._magaza_metrik_onbellegi is not None:
+            return self._magaza_metrik_onbellegi
+
+        if self._magaza_toplamlari is None:
+            magaza_sayisi = len(self.magaza_tablosu)
+            self._magaza_toplamlari = (
+                np.bincount(self.magaza_kodlari, weights=self.data['Satis'].to_numpy(), minlength=magaza_sayisi),
+                np.bincount(self.magaza_kodlari, weights=self.data['Envanter'].to_numpy(), minlength=magaza_sayisi),
+                np.bincount(self.magaza_kodlari, minlength=magaza_sayisi)
+            )
+        satislar, envanterler, satir_sayilari = self._magaza_toplamlari
+        magaza_no = {magaza: no for no, magaza in enumerate(self.magaza_tablosu)}
 
         metrikler = {}
         for magaza in self.magazalar:
-            magaza_data = self.data[self.data['Depo Adı'] == magaza]
-            toplam_satis = magaza_data['Satis'].sum()
-            toplam_envanter = magaza_data['Envanter'].sum()
+            no = magaza_no[magaza]
+            toplam_satis = satislar[no]
+            toplam_envanter = envanterler[no]
 
             metrikler[magaza] = {
                 'toplam_satis': int(toplam_satis),
                 'toplam_envanter': int(toplam_envanter),
                 'satis_orani': float(toplam_satis / (toplam_satis + toplam_envanter)) if (toplam_satis + toplam_envanter) > 0 else 0,
                 'envanter_fazlasi': int(toplam_envanter - toplam_satis),
-                'urun_sayisi': len(magaza_data)
+                'urun_sayisi': int(satir_sayilari[no])
             }
+
+        self._magaza_metrik_onbellegi = metrikler
         return metrikler
 
     def urun_anahtari_olustur(self, urun_adi, renk, beden):
@@ -106,48 +441,53 @@ class MagazaTransferSistemi:
             return 0
         return satis / toplam
 
-    def str_bazli_transfer_hesapla(self, gonderen_satis, gonderen_envanter, alan_satis, alan_envanter):
-        """STR bazlı transfer miktarı hesapla - ORIJINAL KOD"""
+    def str_bazli_transfer_hesapla(self, gonderen_satis, gonderen_envanter, alan_satis, alan_envanter,
+                                   kurallar=None):
+        """STR bazlı transfer miktarı hesapla - ORIJINAL KOD (kurallar: VARSAYILAN_KURALLAR biçiminde)"""
+        kurallar = kurallar or VARSAYILAN_KURALLAR
         gonderen_str = self.str_hesapla(gonderen_satis, gonderen_envanter)
         alan_str = self.str_hesapla(alan_satis, alan_envanter)
         str_farki = alan_str - gonderen_str
         teorik_transfer = str_farki * gonderen_envanter
         
         # Koruma filtreleri
-        max_transfer_40 = gonderen_envanter * 0.40
-        min_kalan_2 = gonderen_envanter - 2
-        max_5_adet = 5
+        max_transfer_40 = gonderen_envanter * kurallar['max_oran']
+        min_kalan_2 = gonderen_envanter - kurallar['min_kalan']
+        max_5_adet = kurallar['max_adet']
         
         transfer_miktari = min(teorik_transfer, max_transfer_40, min_kalan_2, max_5_adet)
         transfer_miktari = max(1, min(transfer_miktari, gonderen_envanter))
         
+        oran_etiketi, kalan_etiketi, adet_etiketi = filtre_etiketleri(kurallar)
         return int(transfer_miktari), {
             'gonderen_str': round(gonderen_str * 100, 1),
             'alan_str': round(alan_str * 100, 1),
             'str_farki': round(str_farki * 100, 1),
             'teorik_transfer': round(teorik_transfer, 1),
-            'uygulanan_filtre': 'Max %40' if transfer_miktari == max_transfer_40 else 
-                               'Min 2 kalsın' if transfer_miktari == min_kalan_2 else
-                               'Max 5 adet' if transfer_miktari == max_5_adet else 'Teorik'
+            'uygulanan_filtre': oran_etiketi if transfer_miktari == max_transfer_40 else 
+                               kalan_etiketi if transfer_miktari == min_kalan_2 else
+                               adet_etiketi if transfer_miktari == max_5_adet else 'Teorik'
         }
 
-    def transfer_kosulları_kontrol(self, gonderen_satis, gonderen_envanter, alan_satis, alan_envanter):
-        """STR bazlı transfer koşulları kontrol - ORIJINAL KOD"""
+    def transfer_kosulları_kontrol(self, gonderen_satis, gonderen_envanter, alan_satis, alan_envanter,
+                                   kurallar=None):
+        """STR bazlı transfer koşulları kontrol - ORIJINAL KOD (kurallar: VARSAYILAN_KURALLAR biçiminde)"""
+        kurallar = kurallar or VARSAYILAN_KURALLAR
         if alan_satis <= gonderen_satis:
             return False, f"Alan satış ({alan_satis}) ≤ Gönderen satış ({gonderen_satis})"
         
-        if gonderen_envanter < 3:
-            return False, f"Gönderen envanter yetersiz ({gonderen_envanter} < 3)"
+        if gonderen_envanter < kurallar['min_gonderen_envanter']:
+            return False, f"Gönderen envanter yetersiz ({gonderen_envanter} < {kurallar['min_gonderen_envanter']})"
         
         gonderen_str = self.str_hesapla(gonderen_satis, gonderen_envanter)
         alan_str = self.str_hesapla(alan_satis, alan_envanter)
         str_farki = alan_str - gonderen_str
         
-        if str_farki < 0.15:
-            return False, f"STR farkı yetersiz ({str_farki*100:.1f}% < 15%)"
+        if str_farki < kurallar['min_str_farki']:
+            return False, f"STR farkı yetersiz ({str_farki*100:.1f}% < {kurallar['min_str_farki']*100:g}%)"
         
         transfer_miktari, detaylar = self.str_bazli_transfer_hesapla(
-            gonderen_satis, gonderen_envanter, alan_satis, alan_envanter
+            gonderen_satis, gonderen_envanter, alan_satis, alan_envanter, kurallar
         )
         
         if transfer_miktari <= 0:
@@ -155,291 +495,3076 @@ class MagazaTransferSistemi:
         
         return True, f"STR: A{detaylar['alan_str']}%>G{detaylar['gonderen_str']}%, T:{transfer_miktari}"
 
-    def global_transfer_analizi_yap(self):
-        """Global ürün bazlı transfer analizi - ORIJINAL KOD"""
-        if self.data is None:
-            return None
+    def urun_anahtarlari_olustur(self, df):
+        """urun_anahtari_olustur'un sütun bazlı karşılığı: (satır başına anahtar kodu, anahtar tablosu)
 
-        logger.info("Global ürün bazlı STR transfer analizi başlatılıyor...")
-        
-        metrikler = self.magaza_metrikleri_hesapla()
+        Normalizasyon satırlar yerine her sütunun benzersiz değerleri üzerinde yapılır;
+        kodlar anahtarların ilk görülme sırasına göre verilir.
+        """
+        parca_kodlari = []
+        parca_tablolari = []
+        for sutun in ('Ürün Adı', 'Renk Açıklaması', 'Beden'):
+            if sutun not in df.columns:
+                parca_kodlari.append(np.zeros(len(df), dtype=np.int64))
+                parca_tablolari.append(np.array([''], dtype=object))
+                continue
+
+            kodlar, degerler = pd.factorize(df[sutun], sort=False)
+            # NaN -> -1 -> "" (tablonun son elemanı)
+            normal = [str(deger).strip().upper() for deger in np.asarray(degerler, dtype=object)]
+            normal.append('')
+            kodlar = np.where(kodlar < 0, len(normal) - 1, kodlar)
+
+            # Farklı yazılıp aynı normalize edilen değerleri birleştir ("kırmızı " / "KIRMIZI")
+            tekil_kodlar, tablo = pd.factorize(np.array(normal, dtype=object), sort=False)
+            parca_kodlari.append(tekil_kodlar[kodlar])
+            parca_tablolari.append(np.asarray(tablo, dtype=object))
+
+        ad_kod, renk_kod, beden_kod = parca_kodlari
+        ad_tablo, renk_tablo, beden_tablo = parca_tablolari
+        uclu = (ad_kod.astype(np.int64) * len(renk_tablo) + renk_kod) * len(beden_tablo) + beden_kod
+        uclu_kodlari, uclu_degerleri = pd.factorize(uclu, sort=False)
+
+        ad_no, kalan = np.divmod(uclu_degerleri, len(renk_tablo) * len(beden_tablo))
+        renk_no, beden_no = np.divmod(kalan, len(beden_tablo))
+        metinler = np.array([
+            f"{ad} {renk} {beden}".strip()
+            for ad, renk, beden in zip(ad_tablo[ad_no], renk_tablo[renk_no], beden_tablo[beden_no])
+        ], dtype=object)
+
+        # Birleştirilmiş metni aynı olan farklı üçlüler tek anahtara düşer
+        metin_kodlari, anahtarlar = pd.factorize(metinler, sort=False)
+        return metin_kodlari[uclu_kodlari].astype(np.int32), np.asarray(anahtarlar, dtype=object)
+
+    def _kodlari_olustur(self):
+        """Ürün anahtarı ve mağaza sütunlarını tamsayı kod + arama tablosu olarak sakla"""
+        self.urun_anahtar_kodlari, self.urun_anahtar_tablosu = self.urun_anahtarlari_olustur(self.data)
+
+        kodlar, degerler = pd.factorize(self.data['Depo Adı'], sort=False)
+        degerler = np.asarray(degerler, dtype=object)
+        # Mağaza kodları alfabetik sırada: ürün içindeki mağaza sırası eski groupby ile aynı kalır
+        sira = np.argsort(degerler, kind='stable')
+        tip = np.int16 if len(sira) <= np.iinfo(np.int16).max else np.int32
+        yeni_kod = np.empty(len(sira), dtype=tip)
+        yeni_kod[sira] = np.arange(len(sira), dtype=tip)
+        self.magaza_kodlari = yeni_kod[kodlar]
+        self.magaza_tablosu = degerler[sira]
+
+    def kodlar(self):
+        """Önbelleğe yazılabilecek kod dizileri ve arama tabloları"""
+        return {ad: getattr(self, ad) for ad in KOD_ALANLARI}
+
+    def _anahtar_numaralari(self):
+        """Ürün anahtarı metni -> anahtar kodu sözlüğü (önbellekli)"""
+        if self._anahtar_no_onbellegi is None:
+            self._anahtar_no_onbellegi = {anahtar: no for no, anahtar in enumerate(self.urun_anahtar_tablosu)}
+        return self._anahtar_no_onbellegi
+
+    def _cift_ozeti(self, satirlar=None):
+        """(Ürün anahtarı, mağaza) çift kodu başına satış/envanter toplamı ve ilk değerler
+
+        İndeks çift kodudur (anahtar kodu * mağaza sayısı + mağaza kodu, artan).
+        satirlar verilirse yalnızca o satır konumları özetlenir (her çiftin
+        satırları artan konum sırasında olmalı; ilk değerler buna göre seçilir).
+        """
+        veri = self.data
+        anahtar_kodlari = self.urun_anahtar_kodlari
+        magaza_kodlari = self.magaza_kodlari
+        satis = veri['Satis'].to_numpy()
+        envanter = veri['Envanter'].to_numpy()
+        if satirlar is not None:
+            # Yalnızca okunan sütunlardan satır alınır, çerçeve kopyalanmaz
+            anahtar_kodlari = anahtar_kodlari[satirlar]
+            magaza_kodlari = magaza_kodlari[satirlar]
+            satis = satis[satirlar]
+            envanter = envanter[satirlar]
+
+        magaza_sayisi = len(self.magaza_tablosu)
+        cift_kodlari = anahtar_kodlari.astype(np.int64) * magaza_sayisi + magaza_kodlari
+
+        # Tamsayı çift kodu üzerinde gruplama: sıralama anahtar kodu (ilk görülme)
+        # sonra mağaza adı olur. Toplamlar oran/fark hesapları için float64'e çevrilir;
+        # mesajlar sayi_metni ile yüklenen sütunun tipine göre yazılır (ondalik_sutunlar)
+        ozet = pd.DataFrame({'Satis': satis, 'Envanter': envanter}, copy=False).groupby(
+            cift_kodlari, sort=True).sum().astype(np.float64, copy=False)
+        ciftler = ozet.index.to_numpy()
+        # Her çiftin ilk satırı bir kez bulunur; boş değeri olmayan sütunlar bunu paylaşır
+        ilk_satirlar = np.empty(len(ciftler), dtype=np.int64)
+        ilk = np.flatnonzero(~pd.Series(cift_kodlari).duplicated().to_numpy())
+        ilk_satirlar[np.searchsorted(ciftler, cift_kodlari[ilk])] = ilk
+        for sutun in ('Ürün Adı', 'Renk Açıklaması', 'Beden', 'Ürün Kodu'):
+            if sutun in veri.columns:
+                seri = veri[sutun] if satirlar is None else veri[sutun].take(satirlar)
+                ozet[sutun] = _ilk_degerler(seri, cift_kodlari, ciftler, ilk_satirlar)
+        return ozet
+
+    def _ozet_etiketle(self, cift_ozeti):
+        """Çift kodu indeksini (anahtar kodu, mağaza adı) düzeylerine aç; sütunlar kopyalanmaz"""
+        ozet = cift_ozeti.copy(deep=False)
+        anahtar_no, magaza_no = np.divmod(cift_ozeti.index.to_numpy(), len(self.magaza_tablosu))
+        ozet.index = pd.MultiIndex.from_arrays([anahtar_no, self.magaza_tablosu[magaza_no]])
+        return ozet
+
+    def _urun_magaza_ozeti(self, satirlar=None):
+        """(Ürün anahtarı, mağaza) çiftleri için tek geçişte gruplanmış satış/envanter özeti
+
+        Gün içi delta uygulanmışsa tüm veri için güncel (yamalanmış) özet kullanılır.
+        """
+        if satirlar is None and self._delta_yamasi is not None:
+            return self._ozet_etiketle(self._yamali_ozet())
+        return self._ozet_etiketle(self._cift_ozeti(satirlar))
+
+    def _taban_ozeti_al(self):
+        """Veri satırlarının çift özeti (delta yamaları bunun üzerine yazılır; bir kez çıkarılır)"""
+        if self._taban_ozeti is None:
+            self._taban_ozeti = self._cift_ozeti()
+        return self._taban_ozeti
+
+    def _yamali_ozet(self, anahtar_kodlari=None):
+        """Taban çift özetinin delta yamasıyla güncel hali; anahtar_kodlari verilirse yalnızca onların çiftleri
+
+        Taban özet değişmez; yama yalnızca deltaların değiştirdiği ya da eklediği
+        çiftleri tutar.
+        """
+        taban = self._taban_ozeti_al()
+        yama = self._delta_yamasi if self._delta_yamasi is not None else taban.iloc[:0]
+        if anahtar_kodlari is not None:
+            magaza_sayisi = len(self.magaza_tablosu)
+            taban = taban.iloc[_anahtar_ciftleri(taban.index.to_numpy(), anahtar_kodlari, magaza_sayisi)]
+            yama = yama.iloc[_anahtar_ciftleri(yama.index.to_numpy(), anahtar_kodlari, magaza_sayisi)]
+        if not len(yama):
+            return taban
+        return pd.concat([taban[~taban.index.isin(yama.index)], yama]).sort_index()
+
+    def _transfer_miktarlari_hesapla(self, gonderen_envanter, str_farki, kurallar=None, filtreli=True):
+        """str_bazli_transfer_hesapla kurallarının dizi karşılığı (filtreli=False iken filtre None)"""
+        kurallar = kurallar or VARSAYILAN_KURALLAR
+        teorik_transfer = str_farki * gonderen_envanter
+        max_transfer_40 = gonderen_envanter * kurallar['max_oran']
+        min_kalan_2 = gonderen_envanter - kurallar['min_kalan']
+        max_5_adet = kurallar['max_adet']
+
+        transfer_miktari = np.minimum(np.minimum(teorik_transfer, max_transfer_40),
+                                      np.minimum(min_kalan_2, max_5_adet))
+        transfer_miktari = np.maximum(1, np.minimum(transfer_miktari, gonderen_envanter))
+        if not filtreli:
+            return transfer_miktari.astype(np.int64), teorik_transfer, None
+
+        # Etiketler tek nesne dizisinden seçilir; kayıtlar aynı metinleri paylaşır
+        etiketler = np.array(list(filtre_etiketleri(kurallar)) + ['Teorik'], dtype=object)
+        uygulanan_filtre = etiketler[np.select(
+            [transfer_miktari == max_transfer_40,
+             transfer_miktari == min_kalan_2,
+             transfer_miktari == max_5_adet],
+            [0, 1, 2],
+            default=3
+        )]
+        return transfer_miktari.astype(np.int64), teorik_transfer, uygulanan_filtre
+
+    @staticmethod
+    def _kapasite_dizisi(kapasite, magazalar):
+        """Kapasite tanımını (None, tüm mağazalar için adet ya da mağaza -> adet) mağaza dizisine aç"""
+        if kapasite is None:
+            return np.full(len(magazalar), np.inf)
+        if isinstance(kapasite, dict):
+            return pd.Series(magazalar, dtype=object).map(kapasite).fillna(np.inf).to_numpy(dtype=np.float64)
+        return np.full(len(magazalar), float(kapasite))
+
+    def _kapasite_uygula(self, miktar, filtre, str_farki, gonderenler, alanlar,
+                         gonderme_kapasitesi, alma_kapasitesi):
+        """Eşleşme miktarlarını mağaza başına toplam gönderme/alma kapasitesine göre kırp
+
+        Büyük STR farkı önce karşılanır (açgözlü); her eşleşme gönderenin ve alanın
+        kalan kapasitesi kadar alır. (miktar, filtre, sıfırdan büyük kalan maskesi) döner.
+        """
+        oncelik = np.argsort(-str_farki, kind='stable')
+        gonderen_kod, gonderen_magazalar = pd.factorize(gonderenler[oncelik])
+        alan_kod, alan_magazalar = pd.factorize(alanlar[oncelik])
+        kalan_gonderme = self._kapasite_dizisi(gonderme_kapasitesi, np.asarray(gonderen_magazalar)).tolist()
+        kalan_alma = self._kapasite_dizisi(alma_kapasitesi, np.asarray(alan_magazalar)).tolist()
+
+        # Her kabul kendinden öncekilerin tükettiği kapasiteye bağlı: sıralı tek geçiş
+        kabul = []
+        for g, a, istenen in zip(gonderen_kod.tolist(), alan_kod.tolist(), miktar[oncelik].tolist()):
+            adet = min(istenen, kalan_gonderme[g], kalan_alma[a])
+            if adet > 0:
+                kalan_gonderme[g] -= adet
+                kalan_alma[a] -= adet
+                kabul.append(adet)
+            else:
+                kabul.append(0)
+
+        sonuc = np.empty(len(miktar), dtype=np.int64)
+        sonuc[oncelik] = kabul
+        filtre = np.where(sonuc < miktar, 'Kapasite', filtre).astype(object)
+        kalan = sonuc > 0
+        return sonuc[kalan], filtre[kalan], kalan
+
+    def _str_siralamasi(self, ozet):
+        """Özetin satış/envanter/STR dizileri, anahtar grupları içinde STR sırası ve
+        en az 2 mağazalı grupların (sıra içindeki) başlangıç ve mağaza sayıları
+        """
+        anahtar_no = ozet.index.get_level_values(0).to_numpy()
+        cift_sayisi = len(anahtar_no)
+        grup_baslangic = np.flatnonzero(np.r_[True, anahtar_no[1:] != anahtar_no[:-1]])
+        grup_adet = np.diff(np.r_[grup_baslangic, cift_sayisi])
+        grup_no = np.repeat(np.arange(len(grup_baslangic)), grup_adet)
+
+        satis = ozet['Satis'].to_numpy()
+        envanter = ozet['Envanter'].to_numpy()
+        toplam = satis + envanter
+        str_degerleri = np.divide(satis, toplam, out=np.zeros(cift_sayisi), where=toplam != 0)
+
+        # Her grup kendi içinde STR'a göre (kararlı) sıralanır; ilk eleman en
+        # düşük, son eleman en yüksek STR'lı mağazadır. lexsort yerine grup ve
+        # STR'ın tekil değerler içindeki sırası tek tamsayı anahtarda birleşir
+        kod, tekil = pd.factorize(str_degerleri)
+        str_sirasi = np.empty(len(tekil), dtype=np.int64)
+        str_sirasi[np.argsort(tekil, kind='stable')] = np.arange(len(tekil))
+        sira = np.argsort(grup_no.astype(np.int64) * len(tekil) + str_sirasi[kod], kind='stable')
+
+        # En az 2 mağazada olmalı transfer için
+        coklu = grup_adet >= 2
+        return satis, envanter, str_degerleri, sira, grup_baslangic[coklu], grup_adet[coklu]
+
+    def _cok_magazali_dagitimi(self, satis, envanter, str_degerleri, sira, grup_bas, grup_mag, kurallar):
+        """Her anahtarda tüm gönderen ve alan mağazalar arasında STR farkı öncelikli açgözlü dağıtım
+
+        Gönderenler anahtarın ortalama STR'ının altında kalan ve yeterli envanteri
+        olan mağazalardır; kalan stokları koruma kurallarının (max oran, en az kalan)
+        tüm eşleşmelerdeki toplamıdır. Alanlar ortalamanın üstündekilerdir; ihtiyaçları
+        STR'larını ortalamaya indirecek envanterdir. Uygun (gönderen, alan) çiftleri STR
+        farkı büyükten küçüğe öncelik kuyruğundan alınır; her eşleşme kural miktarını,
+        gönderenin kalan stoğunu ve alanın kalan ihtiyacını aşmaz, bir mağaza birden
+        çok eşleşmede yer alabilir. En büyük farklı çift ikili motorun çiftidir.
+
+        Fark alan STR'ı eksi gönderen STR'ı olduğundan her gönderen çiftlerini alanların
+        azalan, her alan gönderenlerin artan STR sırasında görür. Gönderenleri artan STR
+        ile, her birini alanlar üzerinde sırayla işlemek her mağazaya kuyruktakiyle aynı
+        sırayı verir ve aynı sonucu üretir. Adımlar tüm anahtarlarda aynı sıradaki
+        gönderenleri birlikte işler; gönderenin eşleşmeleri kalan stoğun birikimli
+        toplamla paylaştırılmasıdır.
+
+        (grup, gönderen satırı, alan satırı, miktar, teorik, filtre, eşleşme sırası)
+        dizileri döner; eşleşmeler grup ve grup içinde öncelik sırasındadır.
+        """
+        # Sıra uzayında (anahtar içinde artan STR) yalnızca en az 2 mağazalı anahtarlar
+        grup_sayisi = len(grup_bas)
+        grup = np.repeat(np.arange(grup_sayisi), grup_mag)
+        satir = sira[np.repeat(grup_bas - np.cumsum(grup_mag) + grup_mag, grup_mag) + np.arange(len(grup))]
+        s, e, st = satis[satir], envanter[satir], str_degerleri[satir]
+        toplam_satis = np.bincount(grup, weights=s, minlength=grup_sayisi)
+        toplam = toplam_satis + np.bincount(grup, weights=e, minlength=grup_sayisi)
+        hedef = np.divide(toplam_satis, toplam, out=np.zeros(grup_sayisi), where=toplam > 0)[grup]
+
+        gonderen = (st < hedef) & (e >= kurallar['min_gonderen_envanter'])
+        kalan_stok = np.maximum(1, np.floor(np.minimum(e * kurallar['max_oran'], e - kurallar['min_kalan'])))
+        kalan_stok = np.where(gonderen, np.minimum(kalan_stok, e), 0).astype(np.int64)
+        ihtiyac = np.ceil(np.divide(s * (1 - hedef), hedef, out=np.zeros(len(s)), where=hedef > 0) - e)
+        alan = (st > hedef) & (ihtiyac >= 1)
+        kalan_ihtiyac = np.where(alan, ihtiyac, 0).astype(np.int64)
+
+        # Gönderenler grup içindeki sıralarına (artan STR) göre adımlara ayrılır
+        gonderenler = np.flatnonzero(gonderen)
+        gonderen_sayisi = np.bincount(grup[gonderenler], minlength=grup_sayisi)
+        gonderen_bas = np.cumsum(gonderen_sayisi) - gonderen_sayisi
+        gonderen_no = np.arange(len(gonderenler)) - np.repeat(gonderen_bas, gonderen_sayisi)
+        adim_sirasi = np.argsort(gonderen_no, kind='stable')
+        adim_kum = np.r_[0, np.cumsum(np.bincount(gonderen_no, minlength=1))]
+
+        # Alanlar grup içinde azalan STR ile; süzme sırayı bozmaz
+        alanlar = np.flatnonzero(alan)[::-1]
+        alanlar = alanlar[np.argsort(grup[alanlar], kind='stable')]
+
+        parcalar = []
+        canli = 0
+        for adim in range(len(adim_kum) - 1):
+            # İhtiyacı kalmayan alanlar ve gönderenleri bitmiş grupların alanları, yarısı
+            # düştüğünde ayıklanır; aradaki adımlarda uygun maskesi onları zaten eler
+            if canli * 2 <= len(alanlar):
+                alan_grubu = grup[alanlar]
+                kalan = (kalan_ihtiyac[alanlar] > 0) & (gonderen_sayisi[alan_grubu] > adim)
+                alanlar = alanlar[kalan]
+                canli = len(alanlar)
+                alan_sayisi = np.bincount(alan_grubu[kalan], minlength=grup_sayisi)
+                alan_bas = np.cumsum(alan_sayisi) - alan_sayisi
+
+            gon = gonderenler[adim_sirasi[adim_kum[adim]:adim_kum[adim + 1]]]
+            gon = gon[alan_sayisi[grup[gon]] > 0]
+            g_stok = kalan_stok[gon]
+            g_alan_sayisi, g_alan_bas = alan_sayisi[grup[gon]], alan_bas[grup[gon]]
+            g_konum = np.zeros(len(gon), dtype=np.int64)
+
+            # Çoğu gönderenin stoğu ilk alanlarda biter: alanlar gönderen başına büyüyen
+            # pencerelerle açılır; stoğu biten ya da farkı eşiğin altına düşen gönderen durur
+            pencere = 4
+            while len(gon):
+                adet = np.minimum(g_alan_sayisi - g_konum, pencere)
+                no = np.repeat(np.arange(len(gon)), adet)
+                pencere_bas = np.cumsum(adet) - adet
+                rcv = alanlar[np.repeat(g_alan_bas + g_konum - pencere_bas, adet) + np.arange(len(no))]
+                snd = gon[no]
+                fark = st[rcv] - st[snd]
+                devam = fark[pencere_bas + adet - 1] >= kurallar['min_str_farki']
+                uygun = (fark >= kurallar['min_str_farki']) & (s[rcv] > s[snd]) & (kalan_ihtiyac[rcv] > 0)
+                no, snd, rcv, fark = no[uygun], snd[uygun], rcv[uygun], fark[uygun]
+
+                if len(no):
+                    # Gönderenin stoğu alanlara sırayla: her eşleşme öncekilerden kalanı alır
+                    kural = self._transfer_miktarlari_hesapla(e[snd], fark, kurallar, filtreli=False)[0]
+                    istenen = kalan_ihtiyac[rcv]
+                    talep = np.minimum(kural, istenen)
+                    birikimli = np.cumsum(talep) - talep
+                    bas = np.flatnonzero(np.r_[True, no[1:] != no[:-1]])
+                    stok = g_stok[no] - (birikimli - np.repeat(birikimli[bas], np.diff(np.r_[bas, len(no)])))
+                    miktar = np.maximum(0, np.minimum(talep, stok))
+                    g_stok -= np.bincount(no, weights=miktar, minlength=len(gon)).astype(np.int64)
+
+                    secili = miktar > 0
+                    snd, rcv, fark, miktar = snd[secili], rcv[secili], fark[secili], miktar[secili]
+                    kural, stok = kural[secili], stok[secili]
+                    kalan_ihtiyac[rcv] -= miktar
+                    canli -= np.count_nonzero(kalan_ihtiyac[rcv] == 0)
+                    sinir = np.where(miktar == kural, 0, np.where(miktar == stok, 1, 2))  # 0 kural, 1 kalan stok, 2 ihtiyaç
+                    parcalar.append((snd, rcv, fark, miktar, sinir))
+
+                g_konum += adet
+                devam &= (g_stok > 0) & (g_konum < g_alan_sayisi)
+                gon, g_stok, g_konum = gon[devam], g_stok[devam], g_konum[devam]
+                g_alan_sayisi, g_alan_bas = g_alan_sayisi[devam], g_alan_bas[devam]
+                pencere *= 2
+
+        if not parcalar:
+            bos = np.zeros(0, dtype=np.int64)
+            return bos, bos, bos, bos, np.zeros(0), np.zeros(0, dtype=object), bos
+        snd, rcv, fark, miktar, sinir = (np.concatenate(dizi) for dizi in zip(*parcalar))
+
+        # Grup içinde öncelik sırası: büyük fark, düşük STR'lı gönderen, yüksek STR'lı alan.
+        # Çok anahtarlı lexsort yerine iki kararlı tamsayı sıralaması: önce (gönderen,
+        # azalan alan), sonra grup ve farkın (az sayıda tekil değerin) azalan sırası
+        n = len(grup)
+        kod, tekil = pd.factorize(fark)
+        fark_sirasi = np.empty(len(tekil), dtype=np.int64)
+        fark_sirasi[np.argsort(-tekil, kind='stable')] = np.arange(len(tekil))
+        oncelik = np.argsort(snd.astype(np.int64) * n + (n - 1 - rcv), kind='stable')
+        grup_fark = grup[snd].astype(np.int64) * len(tekil) + fark_sirasi[kod]
+        oncelik = oncelik[np.argsort(grup_fark[oncelik], kind='stable')]
+        snd, rcv, fark, miktar, sinir = snd[oncelik], rcv[oncelik], fark[oncelik], miktar[oncelik], sinir[oncelik]
+        t_grup = grup[snd]
+        _, teorik, filtre = self._transfer_miktarlari_hesapla(e[snd], fark, kurallar)
+        filtre[sinir == 1] = 'Kalan stok'
+        filtre[sinir == 2] = 'İhtiyaç'
+        ilk = np.r_[True, t_grup[1:] != t_grup[:-1]]
+        eslesme = np.arange(len(t_grup)) - np.maximum.accumulate(np.where(ilk, np.arange(len(t_grup)), 0)) + 1
+        return t_grup, satir[snd], satir[rcv], miktar, teorik, filtre, eslesme
+
+    def _transfer_kararlari(self, ozet, anahtarlar, cok_magazali=False,
+                            gonderme_kapasitesi=None, alma_kapasitesi=None, kurallar=None,
+                            fark_sirali=False):
+        """Tüm ürün anahtarları için transfer ve red kararlarını dizi işlemleriyle ver
+
+        İkili motorda her anahtarda en düşük STR'lı mağaza en yüksek STR'lı mağazaya
+        gönderir. cok_magazali=True iken eşleşmeler _cok_magazali_dagitimi ile tüm
+        gönderen ve alan mağazalar arasında dağıtılır ve transferler SatirTablosu olarak
+        döner. Red listesi transferi kalmayan anahtarları en düşük/en yüksek çiftin red
+        nedeniyle verir; tüm eşleşmeleri kapasiteye takılan anahtarın nedeni kapasitedir.
+        Çok mağazalı kayıtlarda min_str/max_str anahtarın en düşük/en yüksek STR'ıdır.
+        kurallar verilmezse VARSAYILAN_KURALLAR uygulanır. fark_sirali=True
+        iken transferler (yuvarlanmış) STR farkına göre azalan, kararlı sırada döner.
+        """
+        kurallar = kurallar or VARSAYILAN_KURALLAR
         transferler = []
         transfer_gereksiz = []
 
-        # TÜM mağazaların ürünlerini grupla (ürün adı + renk + beden)
-        tum_data = self.data.copy()
-        tum_data['urun_anahtari'] = tum_data.apply(
-            lambda x: self.urun_anahtari_olustur(
-                x['Ürün Adı'], 
-                x.get('Renk Açıklaması', ''), 
-                x.get('Beden', '')
-            ), axis=1
-        )
-        
-        # Tüm benzersiz ürün anahtarlarını al
-        tum_urun_anahtarlari = tum_data['urun_anahtari'].unique()
-        
-        logger.info(f"Toplam {len(tum_urun_anahtarlari)} benzersiz ürün grubu analiz ediliyor...")
+        anahtar_no = ozet.index.get_level_values(0).to_numpy()
+        cift_sayisi = len(anahtar_no)
+        if cift_sayisi == 0:
+            return transferler, transfer_gereksiz
 
-        # Her ürün anahtarı için global optimizasyon
-        for index, urun_anahtari in enumerate(tum_urun_anahtarlari):
-            if (index + 1) % 100 == 0:
-                logger.info(f"İşlenen: {index + 1}/{len(tum_urun_anahtarlari)}")
+        satis, envanter, str_degerleri, sira, grup_bas, grup_mag = self._str_siralamasi(ozet)
 
-            # Bu ürünün tüm mağazalardaki durumunu analiz et
-            urun_data = tum_data[tum_data['urun_anahtari'] == urun_anahtari]
-            
-            # Mağaza bazında grupla
-            magaza_gruplari = urun_data.groupby('Depo Adı').agg({
-                'Satis': 'sum',
-                'Envanter': 'sum',
-                'Ürün Adı': 'first',
-                'Renk Açıklaması': 'first',
-                'Beden': 'first',
-                'Ürün Kodu': 'first'
-            }).reset_index()
-
-            # En az 2 mağazada olmalı transfer için
-            if len(magaza_gruplari) < 2:
-                continue
+        # Her anahtarın en düşük ve en yüksek STR'lı mağazası
+        dusuk = sira[grup_bas]
+        yuksek = sira[grup_bas + grup_mag - 1]
+        gonderen_satis, gonderen_envanter = satis[dusuk], envanter[dusuk]
+        alan_satis = satis[yuksek]
+        str_farki = str_degerleri[yuksek] - str_degerleri[dusuk]
 
-            # Her mağaza için STR hesapla
-            magaza_str_listesi = []
-            for _, magaza_grup in magaza_gruplari.iterrows():
-                magaza = magaza_grup['Depo Adı']
-                satis = magaza_grup['Satis']
-                envanter = magaza_grup['Envanter']
-                str_value = self.str_hesapla(satis, envanter)
-                
-                magaza_str_listesi.append({
-                    'magaza': magaza,
-                    'satis': satis,
-                    'envanter': envanter,
-                    'str': str_value,
-                    'urun_adi': magaza_grup['Ürün Adı'],
-                    'renk': magaza_grup.get('Renk Açıklaması', ''),
-                    'beden': magaza_grup.get('Beden', ''),
-                    'urun_kodu': magaza_grup['Ürün Kodu']
-                })
+        # transfer_kosulları_kontrol ile aynı sırada red nedenleri
+        satis_red = alan_satis <= gonderen_satis
+        envanter_red = ~satis_red & (gonderen_envanter < kurallar['min_gonderen_envanter'])
+        str_red = ~satis_red & ~envanter_red & (str_farki < kurallar['min_str_farki'])
+        uygun = ~(satis_red | envanter_red | str_red)
 
-            # STR'a göre sırala (düşükten yükseğe)
-            magaza_str_listesi.sort(key=lambda x: x['str'])
-            
-            # En düşük ve en yüksek STR'ı al
-            en_dusuk_str = magaza_str_listesi[0]
-            en_yuksek_str = magaza_str_listesi[-1]
-
-            # Transfer koşullarını kontrol et
-            kosul_sonuc, kosul_mesaj = self.transfer_kosulları_kontrol(
-                en_dusuk_str['satis'], en_dusuk_str['envanter'], 
-                en_yuksek_str['satis'], en_yuksek_str['envanter']
+        magazalar = ozet.index.get_level_values(1).to_numpy()
+        bos = np.full(cift_sayisi, '', dtype=object)
+        urun_adlari = ozet['Ürün Adı'].to_numpy()
+        renkler = ozet['Renk Açıklaması'].to_numpy() if 'Renk Açıklaması' in ozet else bos
+        bedenler = ozet['Beden'].to_numpy() if 'Beden' in ozet else bos
+        urun_kodlari = ozet['Ürün Kodu'].to_numpy()
+        grup_anahtarlari = anahtarlar[anahtar_no[grup_bas]]
+
+        # Transfer önerileri: grup, gönderen/alan satırı, miktar, teorik, filtre
+        if cok_magazali:
+            t_grup, d, y, transfer_miktari, teorik_transfer, uygulanan_filtre, eslesme = self._cok_magazali_dagitimi(
+                satis, envanter, str_degerleri, sira, grup_bas, grup_mag, kurallar
             )
-            
-            if kosul_sonuc:
-                # STR bazlı transfer miktarını hesapla
-                transfer_miktari, str_detaylar = self.str_bazli_transfer_hesapla(
-                    en_dusuk_str['satis'], en_dusuk_str['envanter'],
-                    en_yuksek_str['satis'], en_yuksek_str['envanter']
-                )
-                
-                if transfer_miktari > 0:
-                    # Stok durumu STR bazında
-                    alan_str_val = str_detaylar['alan_str']
-                    if alan_str_val >= 80:
-                        stok_durumu = 'YÜKSEK'
-                    elif alan_str_val >= 50:
-                        stok_durumu = 'NORMAL'
-                    elif alan_str_val >= 20:
-                        stok_durumu = 'DÜŞÜK'
-                    else:
-                        stok_durumu = 'KRİTİK'
-                    
-                    transferler.append({
-                        'urun_anahtari': urun_anahtari,
-                        'urun_kodu': en_dusuk_str['urun_kodu'],
-                        'urun_adi': en_dusuk_str['urun_adi'],
-                        'renk': en_dusuk_str['renk'],
-                        'beden': en_dusuk_str['beden'],
-                        'gonderen_magaza': en_dusuk_str['magaza'],
-                        'alan_magaza': en_yuksek_str['magaza'],
-                        'transfer_miktari': int(transfer_miktari),
-                        'gonderen_satis': int(en_dusuk_str['satis']),
-                        'gonderen_envanter': int(en_dusuk_str['envanter']),
-                        'alan_satis': int(en_yuksek_str['satis']),
-                        'alan_envanter': int(en_yuksek_str['envanter']),
-                        'gonderen_str': str_detaylar['gonderen_str'],
-                        'alan_str': str_detaylar['alan_str'],
-                        'str_farki': str_detaylar['str_farki'],
-                        'teorik_transfer': str_detaylar['teorik_transfer'],
-                        'uygulanan_filtre': str_detaylar['uygulanan_filtre'],
-                        'alan_stok_durumu': stok_durumu,
-                        'magaza_sayisi': len(magaza_str_listesi),
-                        'min_str': round(en_dusuk_str['str'] * 100, 1),
-                        'max_str': round(en_yuksek_str['str'] * 100, 1),
-                        'satis_farki': int(en_yuksek_str['satis'] - en_dusuk_str['satis']),
-                        'envanter_farki': int(en_dusuk_str['envanter'] - en_yuksek_str['envanter'])
-                    })
-            else:
-                # Transfer gerekmeyen ürünleri kaydet
-                str_ortalama = sum(m['str'] for m in magaza_str_listesi) / len(magaza_str_listesi)
-                str_fark = max(m['str'] for m in magaza_str_listesi) - min(m['str'] for m in magaza_str_listesi)
-                
+        else:
+            t_grup = np.flatnonzero(uygun)
+            d, y = dusuk[t_grup], yuksek[t_grup]
+            transfer_miktari, teorik_transfer, uygulanan_filtre = self._transfer_miktarlari_hesapla(
+                gonderen_envanter[t_grup], str_farki[t_grup], kurallar
+            )
+            eslesme = np.ones(len(t_grup), dtype=np.int64)
+        t_fark = str_degerleri[y] - str_degerleri[d]
+        kapasite_kesilen = np.zeros(0, dtype=np.int64)
+        if gonderme_kapasitesi is not None or alma_kapasitesi is not None:
+            onceki_grup = t_grup
+            transfer_miktari, uygulanan_filtre, kalan = self._kapasite_uygula(
+                transfer_miktari, uygulanan_filtre, t_fark, magazalar[d], magazalar[y],
+                gonderme_kapasitesi, alma_kapasitesi
+            )
+            t_grup, d, y, t_fark, teorik_transfer, eslesme = (
+                dizi[kalan] for dizi in (t_grup, d, y, t_fark, teorik_transfer, eslesme)
+            )
+            # Tüm eşleşmeleri kapasiteye takılan anahtarlar red listesine girer
+            kapasite_kesilen = np.setdiff1d(onceki_grup, t_grup)
+
+        # Yuvarlama, stok durumu ve tam sayılar dizi işlemleriyle; kayıtlar sütunlardan kurulur
+        fark_val = yuvarla_dizisi(t_fark * 100)
+        if fark_sirali:
+            fark_sirasi = np.argsort(-fark_val, kind='stable')
+            t_grup, d, y, fark_val, transfer_miktari, teorik_transfer, uygulanan_filtre, eslesme = (
+                dizi[fark_sirasi] for dizi in (t_grup, d, y, fark_val, transfer_miktari, teorik_transfer,
+                                               uygulanan_filtre, eslesme)
+            )
+        gonderen_str_val = yuvarla_dizisi(str_degerleri[d] * 100)
+        alan_str_val = yuvarla_dizisi(str_degerleri[y] * 100)
+        if cok_magazali:
+            # Anahtarın en düşük/en yüksek STR'ı; eşleşmenin gönderen/alan STR'ı ayrı alanlarda
+            min_str_val = yuvarla_dizisi(str_degerleri[dusuk[t_grup]] * 100)
+            max_str_val = yuvarla_dizisi(str_degerleri[yuksek[t_grup]] * 100)
+        else:
+            min_str_val, max_str_val = gonderen_str_val, alan_str_val
+        stok_durumu = np.array(['KRİTİK', 'DÜŞÜK', 'NORMAL', 'YÜKSEK'], dtype=object)[
+            np.searchsorted([20, 50, 80], alan_str_val, side='right')
+        ]
+        g_satis, g_envanter, a_satis, a_envanter = satis[d], envanter[d], satis[y], envanter[y]
+        sutunlar = {
+            'urun_anahtari': grup_anahtarlari[t_grup],
+            'urun_kodu': urun_kodlari[d],
+            'urun_adi': urun_adlari[d],
+            'renk': renkler[d],
+            'beden': bedenler[d],
+            'gonderen_magaza': magazalar[d],
+            'alan_magaza': magazalar[y],
+            'transfer_miktari': transfer_miktari,
+            'gonderen_satis': g_satis.astype(np.int64),
+            'gonderen_envanter': g_envanter.astype(np.int64),
+            'alan_satis': a_satis.astype(np.int64),
+            'alan_envanter': a_envanter.astype(np.int64),
+            'gonderen_str': gonderen_str_val,
+            'alan_str': alan_str_val,
+            'str_farki': fark_val,
+            'teorik_transfer': yuvarla_dizisi(teorik_transfer),
+            'uygulanan_filtre': uygulanan_filtre,
+            'alan_stok_durumu': stok_durumu,
+            'magaza_sayisi': grup_mag[t_grup],
+            'min_str': min_str_val,
+            'max_str': max_str_val,
+            'satis_farki': (a_satis - g_satis).astype(np.int64),
+            'envanter_farki': (g_envanter - a_envanter).astype(np.int64)
+        }
+        if cok_magazali:
+            # Milyonlarca eşleşme: kayıt sözlükleri yalnızca okunan satırlar için kurulur
+            sutunlar['eslesme_sirasi'] = eslesme
+            transferler = SatirTablosu(sutunlar)
+        else:
+            transferler = list(SatirTablosu(sutunlar))
+
+        # Transfer gerekmeyen ürünler: transferi kalmayan anahtarlar; neden en düşük/en
+        # yüksek çiftin red nedeni ya da tüm eşleşmelerin kapasiteye takılması
+        reddedilen = np.setdiff1d(np.arange(len(grup_bas)), t_grup)
+        if len(reddedilen):
+            r_baslangic, r_adet = grup_bas[reddedilen], grup_mag[reddedilen]
+
+            # Ortalama, eski koddaki gibi STR sırasıyla soldan sağa toplanır
+            str_toplam = np.zeros(len(reddedilen))
+            for konum in range(int(r_adet.max())):
+                devam = r_adet > konum
+                str_toplam[devam] += str_degerleri[sira[r_baslangic[devam] + konum]]
+            str_ortalama = str_toplam / r_adet
+            str_fark = str_farki[reddedilen]
+
+            d = dusuk[reddedilen]
+            kapasite_red = np.isin(reddedilen, kapasite_kesilen)
+            satis_ondalik = 'Satis' in self.ondalik_sutunlar
+            envanter_ondalik = 'Envanter' in self.ondalik_sutunlar
+            for (urun_anahtari, urun_adi, renk, beden, magaza_sayisi, ortalama, fark,
+                 k_red, s_red, e_red, g_satis, g_envanter, a_satis, tam_fark) in zip(
+                    grup_anahtarlari[reddedilen].tolist(), urun_adlari[d].tolist(),
+                    renkler[d].tolist(), bedenler[d].tolist(), r_adet.tolist(),
+                    str_ortalama.tolist(), str_fark.tolist(), kapasite_red.tolist(),
+                    satis_red[reddedilen].tolist(), envanter_red[reddedilen].tolist(),
+                    gonderen_satis[reddedilen].tolist(), gonderen_envanter[reddedilen].tolist(),
+                    alan_satis[reddedilen].tolist(), str_farki[reddedilen].tolist()):
+                if k_red:
+                    red_nedeni = "Kapasite yetersiz (tüm eşleşmeler mağaza kapasitesine takıldı)"
+                elif s_red:
+                    red_nedeni = (f"Alan satış ({sayi_metni(a_satis, satis_ondalik)}) ≤ "
+                                  f"Gönderen satış ({sayi_metni(g_satis, satis_ondalik)})")
+                elif e_red:
+                    red_nedeni = (f"Gönderen envanter yetersiz ({sayi_metni(g_envanter, envanter_ondalik)} < "
+                                  f"{kurallar['min_gonderen_envanter']})")
+                else:
+                    red_nedeni = f"STR farkı yetersiz ({tam_fark*100:.1f}% < {kurallar['min_str_farki']*100:g}%)"
+
                 transfer_gereksiz.append({
                     'urun_anahtari': urun_anahtari,
-                    'urun_adi': magaza_str_listesi[0]['urun_adi'],
-                    'renk': magaza_str_listesi[0]['renk'],
-                    'beden': magaza_str_listesi[0]['beden'],
-                    'magaza_sayisi': len(magaza_str_listesi),
-                    'ortalama_str': round(str_ortalama * 100, 1),
-                    'str_fark': round(str_fark * 100, 1),
-                    'red_nedeni': kosul_mesaj
+                    'urun_adi': urun_adi,
+                    'renk': renk,
+                    'beden': beden,
+                    'magaza_sayisi': magaza_sayisi,
+                    'ortalama_str': round(ortalama * 100, 1),
+                    'str_fark': round(fark * 100, 1),
+                    'red_nedeni': red_nedeni
                 })
 
-        # STR farkına göre sırala (yüksek fark = daha öncelikli)
-        transferler.sort(key=lambda x: x['str_farki'], reverse=True)
+        return transferler, transfer_gereksiz
 
-        logger.info(f"Global analiz tamamlandı: {len(transferler)} transfer, {len(transfer_gereksiz)} red")
+    def cok_magazali_transfer_analizi_yap(self, gonderme_kapasitesi=None, alma_kapasitesi=None, ilerleme=None):
+        """Çok mağazalı dağıtım: her ürün anahtarındaki tüm gönderen/alan mağazalar tek çalışmada
+
+        Bir mağaza anahtarda birden çok mağazaya gönderebilir ya da birden çok
+        mağazadan alabilir (_cok_magazali_dagitimi). Max %40 ve en az 2 kalsın
+        kuralları gönderenin anahtardaki tüm eşleşmelerinin toplamına, max 5 adet
+        her eşleşmeye uygulanır. Kapasiteler (tüm mağazalar için adet ya da mağaza ->
+        adet sözlüğü) bir mağazanın tüm ürünlerde göndereceği/alacağı toplam adedi
+        sınırlar; eşleşmeler STR farkı sırasıyla kapasiteye göre kırpılır.
+        """
+        if self.data is None:
+            return None
+
+        logger.info("Çok mağazalı STR transfer analizi başlatılıyor...")
+
+        metrikler = self.magaza_metrikleri_hesapla()
+
+        # Kapasiteler anahtarlar arasında paylaşıldığından tüm anahtarlar tek blokta
+        anahtarlar = self.urun_anahtar_tablosu
+        toplam = len(anahtarlar)
+        if ilerleme:
+            ilerleme(0, toplam)
+        with olcumler.asama('analysis_grouping'):
+            ozet = self._urun_magaza_ozeti()
+        with olcumler.asama('analysis_decisions'):
+            # Transferler STR farkına göre sıralı kurulur (yüksek fark = daha öncelikli)
+            transferler, transfer_gereksiz = self._transfer_kararlari(
+                ozet, anahtarlar, True, gonderme_kapasitesi, alma_kapasitesi, fark_sirali=True
+            )
+        if ilerleme:
+            ilerleme(toplam, toplam)
+
+        logger.info(f"Çok mağazalı analiz tamamlandı: {len(transferler)} transfer, {len(transfer_gereksiz)} red")
 
         return {
-            'analiz_tipi': 'global',
+            'analiz_tipi': 'cok_magazali',
             'magaza_metrikleri': metrikler,
             'transferler': transferler,
             'transfer_gereksiz': transfer_gereksiz
         }
 
-# Global sistem instance
-sistem = MagazaTransferSistemi()
+    def delta_kopyasi(self):
+        """Delta uygulanacak yeni sistem: veri, kod dizileri ve çift özetleri paylaşılır
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+        Taban özet ve yamalar yerinde değişmez (her delta yeni yama çerçevesi kurar);
+        yalnızca mağaza toplamları ve anahtar numaraları kopyalanır. Kaynak sistem ve
+        analizi değişmez; yamalanmış veri seti kendi kimliğiyle ayrı bir kayıt olur
+        (içerik adresli kayıt her zaman yüklenen dosyadır).
+        """
+        kopya = copy.copy(self)
+        kopya._magaza_metrik_onbellegi = None
+        kopya._sonuc_indeksi_onbellegi = None
+        kopya._anahtar_sirasi_onbellegi = None
+        if self._anahtar_no_onbellegi is not None:
+            kopya._anahtar_no_onbellegi = dict(self._anahtar_no_onbellegi)
+        if self._magaza_toplamlari is not None:
+            kopya._magaza_toplamlari = tuple(dizi.copy() for dizi in self._magaza_toplamlari)
+        return kopya
 
-@app.route('/', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    try:
-        return jsonify({
-            'status': 'healthy',
-            'service': 'RetailFlow Transfer API - MINIMAL CORS',
-            'version': '4.2.0',
-            'timestamp': datetime.now().isoformat()
-        })
-    except Exception as e:
-        logger.error(f"Health check error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    def delta_durumu(self):
+        """Delta uygulanmış veri setini taban veri üzerinde yeniden kurmak için gereken durum
 
-@app.route('/upload', methods=['POST'])
-def upload_file():
-    """Dosya yükleme endpoint'i"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'Dosya seçilmedi'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'Dosya seçilmedi'}), 400
-        
-        if not allowed_file(file.filename):
-            return jsonify({'error': 'Geçersiz dosya formatı! Excel (.xlsx, .xls) veya CSV dosyası yükleyin.'}), 400
-        
-        filename = secure_filename(file.filename)
-        
-        # Excel veya CSV oku
-        if filename.lower().endswith('.csv'):
-            try:
-                df = pd.read_csv(file, encoding='utf-8')
-            except UnicodeDecodeError:
-                df = pd.read_csv(file, encoding='cp1254')
-        else:
-            df = pd.read_excel(file, engine='openpyxl' if filename.endswith('.xlsx') else None)
-        
-        # Sisteme yükle
-        success, result = sistem.dosya_yukle_df(df)
-        
-        if success:
-            return jsonify({
-                'success': True,
-                'filename': filename,
-                'data': result
-            })
-        else:
-            return jsonify({'error': result}), 400
-            
-    except Exception as e:
-        logger.error(f"Upload error: {str(e)}")
-        return jsonify({'error': f'Dosya yükleme hatası: {str(e)}'}), 500
+        Yalnızca taban veriden farklar saklanır: yeni anahtarlar, değişen/yeni
+        çiftler, mağaza toplamları ve etkilenen anahtarların kararları.
+        """
+        return {
+            'delta_kimligi': self.delta_kimligi,
+            'taban_kimligi': self.taban_kimligi,
+            'yeni_anahtarlar': self.urun_anahtar_tablosu[self._taban_anahtar_sayisi:],
+            'delta_yamasi': self._delta_yamasi,
+            'magaza_toplamlari': self._magaza_toplamlari,
+            'analiz_yamasi': self._analiz_yamasi
+        }
 
-@app.route('/analyze', methods=['POST'])
-def analyze_data():
-    """Global STR transfer analizi"""
-    try:
-        if sistem.data is None:
-            return jsonify({'error': 'Önce bir dosya yükleyin'}), 400
-        
-        logger.info("Global STR transfer analizi başlatılıyor...")
-        
-        results = sistem.global_transfer_analizi_yap()
-        
-        if results:
-            sistem.mevcut_analiz = results
-            
-            # İlk 50 transfer önerisi
-            limited_results = {
-                'analiz_tipi': results['analiz_tipi'],
-                'magaza_metrikleri': results['magaza_metrikleri'],
-                'transferler': results['transferler'][:50],
-                'transfer_gereksiz': results['transfer_gereksiz'][:20],
-                'toplam_transfer_sayisi': len(results['transferler']),
-                'toplam_gereksiz_sayisi': len(results['transfer_gereksiz'])
-            }
-            
-            return jsonify({
-                'success': True,
-                'results': limited_results
-            })
-        else:
-            return jsonify({'error': 'Analiz başarısız'}), 500
-            
-    except Exception as e:
-        logger.error(f"Analysis error: {str(e)}")
-        return jsonify({'error': f'Analiz hatası: {str(e)}'}), 500
+    def delta_durumu_ayarla(self, durum):
+        """delta_durumu çıktısını taban veri setini yüklemiş sisteme uygula"""
+        self.veri_kimligi = self.delta_kimligi = durum['delta_kimligi']
+        self.taban_kimligi = durum['taban_kimligi']
+        self._taban_anahtar_sayisi = len(self.urun_anahtar_tablosu)
+        self.urun_anahtar_tablosu = np.concatenate([self.urun_anahtar_tablosu, durum['yeni_anahtarlar']])
+        self._delta_yamasi = durum['delta_yamasi']
+        self._magaza_toplamlari = durum['magaza_toplamlari']
+        self._analiz_yamasi = durum['analiz_yamasi']
+        self._anahtar_no_onbellegi = None
+        self._magaza_metrik_onbellegi = None
 
-@app.route('/export/excel', methods=['POST'])
-def export_excel():
-    """Excel export"""
-    try:
-        # Request body'den results al
+    def yamali_analiz(self, kaynak_analizi):
+        """Delta yamasının kaynağına ait analizden bu veri setinin analizi
+
+        kaynak_analizi analiz_yamasi['kaynak'] veri setinin global analizidir;
+        etkilenen anahtarların kararları yamadakilerle değiştirilir.
+        """
+        yama = self._analiz_yamasi
+        return self._analizi_yamala(kaynak_analizi, yama['etkilenen'], yama['transferler'],
+                                    yama['transfer_gereksiz'], self.magaza_metrikleri_hesapla())
+
+    def delta_uygula(self, df):
+        """Değişen (mağaza, ürün) satırlarını özete yaz ve yalnızca etkilenen anahtarların kararlarını yenile
+
+        Her satır o mağaza-ürün çiftinin yeni satış/envanter toplamıdır (aynı çift
+        birden çok satırda gelirse toplanır). Yeni ürünler anahtar tablosunun
+        sonuna eklenir; bilinmeyen mağaza kabul edilmez. Mevcut global analiz
+        yamalanır, diğer analizler yeniden çalıştırılmak üzere bırakılır.
+
+        Sistem yerinde değişir ve veri_kimligi delta kimliği olur; kayıttaki
+        veri seti için delta_kopyasi üzerinde çağrılmalıdır.
+        """
         try:
-            request_data = request.get_json()
-            if request_data and 'results' in request_data:
-                sistem.mevcut_analiz = request_data['results']
-        except:
-            pass
-        
-        if not sistem.mevcut_analiz:
-            return jsonify({'error': 'Analiz sonucu bulunamadı'}), 400
-        
-        transferler = sistem.mevcut_analiz['transferler']
-        
-        # Excel dosyası oluştur
-        output = io.BytesIO()
-        
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            if transferler:
-                df_transfer = pd.DataFrame(transferler)
-                df_transfer.to_excel(writer, index=False, sheet_name='Transfer Önerileri')
-        
-        output.seek(0)
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'transfer_analizi_{timestamp}.xlsx'
-        
-        return send_file(
-            output,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        
+            df.columns = df.columns.str.strip()
+            eksik_sutunlar = [s for s in DELTA_SUTUNLARI if s not in df.columns]
+            if eksik_sutunlar:
+                return False, f"Eksik sütunlar: {', '.join(eksik_sutunlar)}"
+            df = self._veri_temizle(df)
+            if df.empty:
+                return False, "Güncellenecek satır yok"
+
+            magaza_no = pd.Index(self.magaza_tablosu).get_indexer(df['Depo Adı'])
+            if (magaza_no < 0).any():
+                bilinmeyen = sorted(set(df['Depo Adı'][magaza_no < 0].astype(str)))
+                return False, f"Bilinmeyen mağazalar: {', '.join(bilinmeyen)}"
+
+            # İlk delta: taban özet bir kez çıkarılır; deltalar yalnızca yamayı yeniler
+            taban = self._taban_ozeti_al()
+            yama = self._delta_yamasi if self._delta_yamasi is not None else taban.iloc[:0]
+            magaza_sayisi = len(self.magaza_tablosu)
+            if self.taban_kimligi is None:
+                self.taban_kimligi = self.veri_kimligi
+                self._taban_anahtar_sayisi = len(self.urun_anahtar_tablosu)
+
+            yerel_kodlar, yerel_anahtarlar = self.urun_anahtarlari_olustur(df)
+            anahtar_no = self._anahtar_numaralari()
+            yeni_anahtarlar = [anahtar for anahtar in yerel_anahtarlar if anahtar not in anahtar_no]
+            if yeni_anahtarlar:
+                for anahtar in yeni_anahtarlar:
+                    anahtar_no[anahtar] = len(anahtar_no)
+                self.urun_anahtar_tablosu = np.concatenate(
+                    [self.urun_anahtar_tablosu, np.array(yeni_anahtarlar, dtype=object)]
+                )
+            anahtar_kodlari = np.array([anahtar_no[anahtar] for anahtar in yerel_anahtarlar], dtype=np.int64)
+            cift_kodlari = anahtar_kodlari[yerel_kodlar] * magaza_sayisi + magaza_no
+
+            delta = df.groupby(cift_kodlari, sort=True)[['Satis', 'Envanter']].sum()
+            ciftler = delta.index.to_numpy()
+            yama_konum = yama.index.get_indexer(ciftler)
+            taban_konum = taban.index.get_indexer(ciftler)
+            yamada = yama_konum >= 0
+            tabanda = ~yamada & (taban_konum >= 0)
+            mevcut = yamada | tabanda
+
+            # Değişen çiftlerin güncel satırları: ilk değerler eski satırdan, yeni çiftlerde deltadan
+            guncel = pd.concat([yama.iloc[yama_konum[yamada]], taban.iloc[taban_konum[tabanda]]])
+            if not mevcut.all():
+                yeni = delta[~mevcut].copy()
+                for sutun in taban.columns.drop(['Satis', 'Envanter']):
+                    yeni[sutun] = (_ilk_degerler(df[sutun], cift_kodlari, ciftler)[~mevcut]
+                                   if sutun in df.columns else None)
+                guncel = pd.concat([guncel, yeni[taban.columns]])
+            guncel = guncel.sort_index()
+
+            # Mağaza toplamları çift başına farkla güncellenir
+            self.magaza_metrikleri_hesapla()
+            satislar, envanterler, satir_sayilari = self._magaza_toplamlari
+            magazalar = ciftler % magaza_sayisi
+            for sutun, toplamlar in (('Satis', satislar), ('Envanter', envanterler)):
+                eski = np.where(mevcut, guncel[sutun].to_numpy(), 0.0)
+                np.add.at(toplamlar, magazalar, delta[sutun].to_numpy() - eski)
+                guncel[sutun] = delta[sutun].to_numpy(dtype=np.float64)
+            np.add.at(satir_sayilari, magazalar[~mevcut], 1)
+            self._magaza_metrik_onbellegi = None
+            metrikler = self.magaza_metrikleri_hesapla()
+
+            # Yeni yama çerçevesi: kaynak veri setinin yaması paylaşıldığı için değiştirilmez
+            self._delta_yamasi = pd.concat([yama[~yama.index.isin(ciftler)], guncel]).sort_index()
+
+            etkilenen = np.unique(ciftler // magaza_sayisi)
+            # Yamalanmış veri yeni bir veri setidir: kimliği kaynak kimlikten ve deltadan türer
+            kaynak_kimligi = self.veri_kimligi
+            self.delta_kimligi = hashlib.sha256(
+                f"{self.veri_kimligi}:{delta.to_json()}".encode('utf-8')
+            ).hexdigest()
+            self.veri_kimligi = self.delta_kimligi
+
+            analiz_yamalandi = False
+            if self.mevcut_analiz and self.mevcut_analiz.get('analiz_tipi') == 'global':
+                transferler, transfer_gereksiz = self._transfer_kararlari(
+                    self._ozet_etiketle(self._yamali_ozet(etkilenen)), self.urun_anahtar_tablosu
+                )
+                self.mevcut_analiz = self._analizi_yamala(
+                    self.mevcut_analiz, etkilenen, transferler, transfer_gereksiz, metrikler
+                )
+                # Yama, delta uygulanmış verinin baştan analiziyle aynı sonucu verir
+                self.analiz_kimligi = analiz_kimligi(self.veri_kimligi, ALGORITMA_SURUMU)
+                self._analiz_yamasi_biriktir(kaynak_kimligi, etkilenen, transferler, transfer_gereksiz)
+                analiz_yamalandi = True
+            else:
+                self.mevcut_analiz = None
+                self.analiz_kimligi = None
+                self._analiz_yamasi = None
+
+            logger.info(f"Delta uygulandı: {len(ciftler)} çift ({int((~mevcut).sum())} yeni), "
+                        f"{len(etkilenen)} ürün anahtarı")
+
+            return True, {
+                'guncellenen_cift': int(mevcut.sum()),
+                'yeni_cift': int((~mevcut).sum()),
+                'yeni_anahtar': len(yeni_anahtarlar),
+                'etkilenen_anahtar': len(etkilenen),
+                'analiz_yamalandi': analiz_yamalandi
+            }
+
+        except Exception as e:
+            logger.error(f"Delta hatası: {str(e)}")
+            return False, f"Hata: {str(e)}"
+
+    def _analiz_yamasi_biriktir(self, kaynak_kimligi, etkilenen, transferler, transfer_gereksiz):
+        """Bu deltanın kararlarını, saklanmış bir analize göre biriken anahtar yamasına ekle
+
+        Kaynak veri setinin analizi de yamalanmışsa yama onun kaynağına göre büyür;
+        değilse (analiz kaynak veri setinde baştan yapılmışsa) yeni yama başlar.
+        """
+        yama = self._analiz_yamasi
+        if yama is None or yama['hedef'] != kaynak_kimligi:
+            yama = {'kaynak': kaynak_kimligi, 'etkilenen': np.zeros(0, dtype=np.int64),
+                    'transferler': [], 'transfer_gereksiz': []}
+        anahtar_no = self._anahtar_numaralari()
+        yeni = set(etkilenen.tolist())
+        self._analiz_yamasi = {
+            'kaynak': yama['kaynak'],
+            'hedef': self.veri_kimligi,
+            'etkilenen': np.union1d(yama['etkilenen'], etkilenen),
+            'transferler': [t for t in yama['transferler']
+                            if anahtar_no[t['urun_anahtari']] not in yeni] + list(transferler),
+            'transfer_gereksiz': [g for g in yama['transfer_gereksiz']
+                                  if anahtar_no[g['urun_anahtari']] not in yeni] + list(transfer_gereksiz)
+        }
+
+    def _analizi_yamala(self, analiz, etkilenen, yeni_transferler, yeni_gereksiz, metrikler):
+        """Etkilenen anahtarların eski kararlarını çıkarıp yenilerini sıra bozulmadan yerleştir
+
+        transferler (-str_farki, anahtar kodu), transfer_gereksiz anahtar kodu
+        sırasındadır; konumlar ikili aramayla bulunur ve yeni listeler değişmeyen
+        dilimlerin tek geçişte birleştirilmesiyle kurulur. Eski analizin listeleri
+        kilit dışında okunuyor olabilir (sayfalama, export, iş sonuçları);
+        değiştirilmez, yeni sözlük döner. Anahtar başına fark dizisi etkilenen
+        anahtarın eski transferini sözlük kopyalamadan bulur.
+        """
+        anahtar_no = self._anahtar_numaralari()
+        indeks = self._yama_indeksi
+        if indeks is None or indeks['transferler'] is not analiz['transferler']:
+            transfer_siralari = [(-t['str_farki'], anahtar_no[t['urun_anahtari']]) for t in analiz['transferler']]
+            farklar = np.full(len(anahtar_no), np.nan)
+            if transfer_siralari:
+                sira_dizisi = np.array(transfer_siralari)
+                farklar[sira_dizisi[:, 1].astype(np.int64)] = sira_dizisi[:, 0]
+            indeks = {
+                'transferler': analiz['transferler'],
+                'transfer_siralari': transfer_siralari,
+                'transfer_farklari': farklar,
+                'gereksiz_siralari': [anahtar_no[g['urun_anahtari']] for g in analiz['transfer_gereksiz']]
+            }
+        transfer_siralari = indeks['transfer_siralari']
+        gereksiz_siralari = indeks['gereksiz_siralari']
+        # Yeni anahtarlar fark dizisinin sonuna eklenir; kaynak indeksin dizisi değişmez
+        farklar = np.full(len(anahtar_no), np.nan)
+        farklar[:len(indeks['transfer_farklari'])] = indeks['transfer_farklari']
+
+        silinen_transfer, silinen_gereksiz = [], []
+        for kod in etkilenen.tolist():
+            if not np.isnan(farklar[kod]):
+                silinen_transfer.append(bisect_left(transfer_siralari, (farklar[kod], kod)))
+                farklar[kod] = np.nan
+            i = bisect_left(gereksiz_siralari, kod)
+            if i < len(gereksiz_siralari) and gereksiz_siralari[i] == kod:
+                silinen_gereksiz.append(i)
+
+        eklenen_transfer = []
+        for transfer in yeni_transferler:
+            kod = anahtar_no[transfer['urun_anahtari']]
+            farklar[kod] = -transfer['str_farki']
+            eklenen_transfer.append(((-transfer['str_farki'], kod), transfer))
+        eklenen_gereksiz = [(anahtar_no[g['urun_anahtari']], g) for g in yeni_gereksiz]
+
+        transferler, transfer_siralari = _sirali_yama(
+            analiz['transferler'], transfer_siralari, silinen_transfer, eklenen_transfer)
+        transfer_gereksiz, gereksiz_siralari = _sirali_yama(
+            analiz['transfer_gereksiz'], gereksiz_siralari, silinen_gereksiz, eklenen_gereksiz)
+
+        self._yama_indeksi = {
+            'transferler': transferler,
+            'transfer_siralari': transfer_siralari,
+            'transfer_farklari': farklar,
+            'gereksiz_siralari': gereksiz_siralari
+        }
+        # Yeni sözlük: sonuç indeksleri analizin değiştiğini görür
+        return {**analiz, 'transferler': transferler, 'transfer_gereksiz': transfer_gereksiz,
+                'magaza_metrikleri': metrikler}
+
+    def _anahtar_satir_sirasi(self):
+        """Satırların ürün anahtarı koduna göre kararlı sırası ve anahtar başına kümülatif satır sayısı
+
+        Bir [bas, son) anahtar aralığının satırları sira[kumulatif[bas]:kumulatif[son]]
+        dilimidir; aynı anahtarın satırları artan konumda kalır. Veri seti başına
+        bir kez hesaplanır.
+        """
+        if self._anahtar_sirasi_onbellegi is None:
+            kodlar = self.urun_anahtar_kodlari
+            sayilar = np.bincount(kodlar, minlength=len(self.urun_anahtar_tablosu))
+            tip = np.int32 if len(kodlar) <= np.iinfo(np.int32).max else np.int64
+            sira = kararli_kod_sirasi(kodlar).astype(tip, copy=False)
+            self._anahtar_sirasi_onbellegi = (sira, np.r_[0, np.cumsum(sayilar)])
+        return self._anahtar_sirasi_onbellegi
+
+    def _anahtar_parcalari(self, parca_sayisi):
+        """Ürün anahtarlarını satır sayısı dengeli ardışık [bas, son) aralıklarına böl"""
+        toplam = len(self.urun_anahtar_tablosu)
+        kumulatif = self._anahtar_satir_sirasi()[1][1:]
+        hedefler = np.linspace(0, kumulatif[-1], parca_sayisi + 1)[1:-1]
+        sinirlar = np.unique(np.r_[0, np.searchsorted(kumulatif, hedefler, side='right'), toplam])
+        return list(zip(sinirlar[:-1].tolist(), sinirlar[1:].tolist()))
+
+    def _paralel_kararlar(self, surec_sayisi, ilerleme=None):
+        """Anahtar aralıklarını süreç havuzunda işle; sonuçları anahtar sırasıyla birleştir
+
+        Worker'lar veri setine disk önbelleğindeki ortak sütun dosyalarından
+        bağlanır; anahtar sırası burada bir kez çıkarılır ve her parçaya yalnızca
+        kendi satır konumları (sıranın ardışık dilimi) ile kararlar taşınır.
+        """
+        toplam = len(self.urun_anahtar_tablosu)
+        parcalar = self._anahtar_parcalari(surec_sayisi * ANALIZ_PARCA_CARPANI)
+        satir_sirasi, kumulatif = self._anahtar_satir_sirasi()
+        havuz = surec_havuzu(surec_sayisi)
+        gelecekler = {
+            havuz.submit(_parca_kararlari, onbellek.klasor, self.veri_kimligi,
+                         satir_sirasi[kumulatif[bas]:kumulatif[son]]): sira
+            for sira, (bas, son) in enumerate(parcalar)
+        }
+
+        sonuclar = [None] * len(parcalar)
+        islenen = 0
+        try:
+            for gelecek in as_completed(gelecekler):
+                sira = gelecekler[gelecek]
+                sonuclar[sira] = gelecek.result()
+                bas, son = parcalar[sira]
+                islenen += son - bas
+
+                logger.info(f"İşlenen: {islenen}/{toplam}")
+                if ilerleme:
+                    ilerleme(islenen, toplam)
+        except BaseException:
+            for gelecek in gelecekler:
+                gelecek.cancel()
+            raise
+
+        transferler = []
+        transfer_gereksiz = []
+        for parca_transfer, parca_gereksiz in sonuclar:
+            transferler.extend(parca_transfer)
+            transfer_gereksiz.extend(parca_gereksiz)
+        return transferler, transfer_gereksiz
+
+    def global_transfer_analizi_yap(self, ilerleme=None, surec_sayisi=None):
+        """Global ürün bazlı transfer analizi - tek gruplamalı vektörel motor
+
+        Kararlar ANALIZ_BLOK_ANAHTAR ürün anahtarlık bloklar halinde verilir; her
+        bloktan sonra ilerleme(islenen, toplam) çağrılır. Geri çağırma
+        AnalizIptalEdildi fırlatarak analizi durdurabilir.
+
+        surec_sayisi (varsayılan ANALIZ_SUREC_SAYISI) 1'den büyükse ve veri seti
+        disk önbelleğinden eşlenmişse anahtar aralıkları süreç havuzunda işlenir;
+        sonuç seri çalışmayla aynıdır.
+        """
+        if self.data is None:
+            return None
+
+        logger.info("Global ürün bazlı STR transfer analizi başlatılıyor...")
+        
+        metrikler = self.magaza_metrikleri_hesapla()
+
+        anahtarlar = self.urun_anahtar_tablosu
+        toplam = len(anahtarlar)
+        logger.info(f"Toplam {toplam} benzersiz ürün grubu analiz ediliyor...")
+        if ilerleme:
+            ilerleme(0, toplam)
+
+        if surec_sayisi is None:
+            surec_sayisi = ANALIZ_SUREC_SAYISI
+        # Delta uygulanmış özet yalnızca bu süreçte; worker'lar diskteki veriyi görür
+        paylasimli = (isinstance(self.urun_anahtar_kodlari, np.memmap) and self.veri_kimligi
+                      and self._delta_yamasi is None)
+        if surec_sayisi > 1 and toplam and paylasimli:
+            # Gruplama worker'larda parça başına yapılır; tamamı karar aşamasında ölçülür
+            with olcumler.asama('analysis_decisions'):
+                transferler, transfer_gereksiz = self._paralel_kararlar(surec_sayisi, ilerleme)
+        else:
+            if surec_sayisi > 1:
+                logger.info("Veri seti ortak önbellekte değil, analiz seri çalışıyor")
+            # Ürün x mağaza özetini kodlar üzerinden tek gruplamada çıkar,
+            # kararları tüm anahtarlar için birlikte ver
+            with olcumler.asama('analysis_grouping'):
+                ozet = self._urun_magaza_ozeti()
+            transferler = []
+            transfer_gereksiz = []
+            anahtar_no = ozet.index.get_level_values(0).to_numpy()
+            with olcumler.asama('analysis_decisions'):
+                for blok_baslangic in range(0, toplam, ANALIZ_BLOK_ANAHTAR):
+                    islenen = min(blok_baslangic + ANALIZ_BLOK_ANAHTAR, toplam)
+                    satir_bas, satir_son = np.searchsorted(anahtar_no, [blok_baslangic, islenen])
+                    blok_transfer, blok_gereksiz = self._transfer_kararlari(ozet.iloc[satir_bas:satir_son], anahtarlar)
+                    transferler.extend(blok_transfer)
+                    transfer_gereksiz.extend(blok_gereksiz)
+
+                    logger.info(f"İşlenen: {islenen}/{toplam}")
+                    if ilerleme:
+                        ilerleme(islenen, toplam)
+
+        # STR farkına göre sırala (yüksek fark = daha öncelikli)
+        with olcumler.asama('analysis_sort'):
+            transferler.sort(key=lambda x: x['str_farki'], reverse=True)
+
+        logger.info(f"Global analiz tamamlandı: {len(transferler)} transfer, {len(transfer_gereksiz)} red")
+
+        return {
+            'analiz_tipi': 'global',
+            'magaza_metrikleri': metrikler,
+            'transferler': transferler,
+            'transfer_gereksiz': transfer_gereksiz
+        }
+
+    def senaryo_analizi_yap(self, senaryolar, sonuclar=False):
+        """Kural senaryolarını (VARSAYILAN_KURALLAR biçiminde sözlükler) ikili motorla birlikte değerlendir
+
+        Ürün x mağaza özeti ve anahtar başına en düşük/en yüksek STR eşleşmesi bir
+        kez çıkarılır; kararlar senaryo x eşleşme matrisinde, SENARYO_BLOK_ELEMAN
+        hücrelik bloklar halinde verilir. Her senaryo için transfer/red sayısı,
+        toplam adet, ortalama STR farkı ve transferden sonra STR farkındaki
+        ortalama daralma (puan) döner. sonuclar=True iken her senaryoya
+        global_transfer_analizi_yap biçiminde transfer ve red listeleri eklenir.
+        """
+        if self.data is None:
+            return None
+
+        with olcumler.asama('scenario_grouping'):
+            ozet = self._urun_magaza_ozeti()
+            satis, envanter, str_degerleri, sira, grup_bas, grup_mag = self._str_siralamasi(ozet)
+            dusuk = sira[grup_bas]
+            yuksek = sira[grup_bas + grup_mag - 1]
+            # Satış kuralı senaryodan bağımsız; yalnızca onu geçen eşleşmeler değerlendirilir
+            aday = satis[yuksek] > satis[dusuk]
+            dusuk, yuksek = dusuk[aday], yuksek[aday]
+            gonderen_satis, gonderen_envanter = satis[dusuk], envanter[dusuk]
+            alan_satis, alan_envanter = satis[yuksek], envanter[yuksek]
+            str_farki = str_degerleri[yuksek] - str_degerleri[dusuk]
+
+        ozetler = []
+        kural_dizileri = {ad: np.array([k[ad] for k in senaryolar], dtype=np.float64)[:, None]
+                          for ad in VARSAYILAN_KURALLAR}
+        blok = max(1, SENARYO_BLOK_ELEMAN // max(len(str_farki), 1))
+        with olcumler.asama('scenario_decisions'):
+            for bas in range(0, len(senaryolar), blok):
+                k = {ad: dizi[bas:bas + blok] for ad, dizi in kural_dizileri.items()}
+                # transfer_kosulları_kontrol ve str_bazli_transfer_hesapla ile aynı kurallar
+                uygun = ((gonderen_envanter >= k['min_gonderen_envanter'])
+                         & (str_farki >= k['min_str_farki']))
+                miktar = np.minimum(np.minimum(str_farki * gonderen_envanter, gonderen_envanter * k['max_oran']),
+                                    np.minimum(gonderen_envanter - k['min_kalan'], k['max_adet']))
+                miktar = np.maximum(1, np.minimum(miktar, gonderen_envanter)).astype(np.int64)
+                miktar[~uygun] = 0
+
+                # Transfer sonrası STR'lar: gönderende envanter azalır, alanda artar
+                g_toplam = gonderen_satis + gonderen_envanter - miktar
+                a_toplam = alan_satis + alan_envanter + miktar
+                yeni_fark = (np.divide(alan_satis, a_toplam, out=np.zeros(miktar.shape), where=a_toplam != 0)
+                             - np.divide(gonderen_satis, g_toplam, out=np.zeros(miktar.shape), where=g_toplam != 0))
+
+                transfer_sayisi = uygun.sum(axis=1)
+                bolen = np.maximum(transfer_sayisi, 1)
+                ortalama_fark = np.where(uygun, str_farki, 0).sum(axis=1) / bolen
+                ortalama_degisim = np.where(uygun, str_farki - yeni_fark, 0).sum(axis=1) / bolen
+                for adet, toplam_adet, fark, degisim in zip(
+                        transfer_sayisi.tolist(), miktar.sum(axis=1).tolist(),
+                        ortalama_fark.tolist(), ortalama_degisim.tolist()):
+                    ozetler.append({
+                        'transfer_sayisi': adet,
+                        'toplam_adet': toplam_adet,
+                        'red_sayisi': len(grup_bas) - adet,
+                        'ortalama_str_farki': round(fark * 100, 1),
+                        'ortalama_str_degisimi': round(degisim * 100, 2)
+                    })
+
+        if sonuclar:
+            with olcumler.asama('scenario_results'):
+                for senaryo_ozeti, kurallar in zip(ozetler, senaryolar):
+                    transferler, transfer_gereksiz = self._transfer_kararlari(
+                        ozet, self.urun_anahtar_tablosu, kurallar=kurallar)
+                    transferler.sort(key=lambda x: x['str_farki'], reverse=True)
+                    senaryo_ozeti['transferler'] = transferler
+                    senaryo_ozeti['transfer_gereksiz'] = transfer_gereksiz
+
+        logger.info(f"Senaryo analizi tamamlandı: {len(senaryolar)} senaryo, {len(str_farki)} aday eşleşme")
+        return ozetler
+
+class SatirTablosu(Sequence):
+    """Sütun dizilerinde tutulan, sözlükleri okundukça kurulan kayıt listesi
+
+    Çok mağazalı motorun milyonlarca eşleşmesi için: dilim, indeks ve yineleme
+    liste gibi sözlük verir; sayfalama ve export yalnızca okuduğu satırların
+    sözlüklerini kurar. Pickle ve bellek tahmini sütunlar üzerindendir.
+    """
+
+    BLOK = 10000  # yinelemede bir kerede kurulan satır
+
+    def __init__(self, sutunlar):
+        self.sutunlar = sutunlar
+        self._adlar = tuple(sutunlar)
+        self._adet = len(next(iter(sutunlar.values()))) if sutunlar else 0
+
+    def __len__(self):
+        return self._adet
+
+    def _satirlar(self, secim):
+        degerler = [dizi[secim].tolist() for dizi in self.sutunlar.values()]
+        return [dict(zip(self._adlar, satir)) for satir in zip(*degerler)]
+
+    def __getitem__(self, konum):
+        if isinstance(konum, slice):
+            return self._satirlar(konum)
+        konum = int(konum)
+        if konum < 0:
+            konum += self._adet
+        if not 0 <= konum < self._adet:
+            raise IndexError('SatirTablosu indeksi aralık dışında')
+        return self._satirlar(slice(konum, konum + 1))[0]
+
+    def __iter__(self):
+        for baslangic in range(0, self._adet, self.BLOK):
+            yield from self._satirlar(slice(baslangic, baslangic + self.BLOK))
+
+    def __eq__(self, diger):
+        if not isinstance(diger, (list, SatirTablosu)):
+            return NotImplemented
+        return len(self) == len(diger) and all(a == b for a, b in zip(self, diger))
+
+    __hash__ = None
+
+    def sutun(self, ad):
+        """Alanın tüm satırlardaki değerleri (dizi)"""
+        return self.sutunlar[ad]
+
+    def bellek_bayt(self):
+        """Sütun dizileri ve nesne sütunlarındaki değerlerin tahmini boyutu
+
+        Nesne sütunlarında örnekte birden çok kez görülen değerler (mağaza/ürün
+        adları, filtre etiketleri) ortaktır ve bir kez sayılır.
+        """
+        toplam = sys.getsizeof(self) + sum(dizi.nbytes for dizi in self.sutunlar.values())
+        if not self._adet:
+            return toplam
+        ornek = np.linspace(0, self._adet - 1, min(self._adet, ANALIZ_ORNEK_SATIR)).astype(np.int64)
+        for dizi in self.sutunlar.values():
+            if dizi.dtype != object:
+                continue
+            gorulme = {}
+            for deger in dizi[ornek].tolist():
+                gorulme.setdefault(id(deger), [0, sys.getsizeof(deger)])[0] += 1
+            tekil = sum(bayt for adet, bayt in gorulme.values() if adet == 1)
+            toplam += int(tekil / len(ornek) * self._adet) + sum(
+                bayt for adet, bayt in gorulme.values() if adet > 1)
+        return toplam
+
+class SonucIndeksi:
+    """Bir analizin transfer listesi üzerinde sıralama dizileri ve mağaza/ürün indeksleri
+
+    Analiz başına bir kez kurulur; her sayfa yalnızca istenen satırları okur.
+    """
+
+    def __init__(self, analiz):
+        self.analiz = analiz
+        transferler = analiz['transferler']
+        adet = len(transferler)
+        if isinstance(transferler, SatirTablosu):
+            degerler = {
+                'str_farki': transferler.sutun('str_farki'),
+                'transfer_miktari': transferler.sutun('transfer_miktari'),
+                'alan_stok_durumu': pd.Series(transferler.sutun('alan_stok_durumu')).map(
+                    STOK_DURUMU_SIRASI).fillna(-1).to_numpy(dtype=np.int64)
+            }
+        else:
+            degerler = {
+                'str_farki': np.fromiter((t['str_farki'] for t in transferler), dtype=np.float64, count=adet),
+                'transfer_miktari': np.fromiter((t['transfer_miktari'] for t in transferler), dtype=np.int64,
+                                                count=adet),
+                'alan_stok_durumu': np.fromiter((STOK_DURUMU_SIRASI.get(t['alan_stok_durumu'], -1)
+                                                 for t in transferler), dtype=np.int64, count=adet)
+            }
+
+        # (alan, azalan) -> satır sırası ve her satırın o sıradaki konumu; eşit
+        # değerlerde analizdeki (str_farki) sıra korunur
+        self.siralar = {}
+        self.konumlar = {}
+        for alan, dizi in degerler.items():
+            for azalan in (True, False):
+                sira = np.argsort(-dizi if azalan else dizi, kind='stable')
+                konum = np.empty(adet, dtype=np.int64)
+                konum[sira] = np.arange(adet)
+                self.siralar[(alan, azalan)] = sira
+                self.konumlar[(alan, azalan)] = konum
+
+        self.gonderen = self._deger_indeksi(transferler, 'gonderen_magaza')
+        self.alan = self._deger_indeksi(transferler, 'alan_magaza')
+        self.urun = self._deger_indeksi(transferler, 'urun_kodu')
+
+    def bellek_bayt(self):
+        """Sıralama dizileri ve değer indekslerinin boyutu"""
+        toplam = sum(dizi.nbytes for dizi in self.siralar.values())
+        toplam += sum(dizi.nbytes for dizi in self.konumlar.values())
+        for indeks in (self.gonderen, self.alan, self.urun):
+            # Dilimler satır başına bir int64 tutan ortak sıra dizisinin görünümleri
+            toplam += 8 * len(self.analiz['transferler']) + sys.getsizeof(indeks)
+            toplam += sum(sys.getsizeof(deger) + sys.getsizeof(satirlar) for deger, satirlar in indeks.items())
+        return toplam
+
+    @staticmethod
+    def _deger_indeksi(transferler, alan):
+        """Alan değeri -> o değeri taşıyan satır numaraları (artan)"""
+        if isinstance(transferler, SatirTablosu):
+            seri = pd.Series(transferler.sutun(alan), dtype=object)
+        else:
+            seri = pd.Series([t[alan] for t in transferler], dtype=object)
+        kodlar, degerler = pd.factorize(seri)
+        sira = np.argsort(kodlar, kind='stable')
+        sinirlar = np.searchsorted(kodlar[sira], np.arange(len(degerler) + 1))
+        return {str(deger): sira[sinirlar[no]:sinirlar[no + 1]] for no, deger in enumerate(degerler)}
+
+    def sorgula(self, offset=0, limit=50, siralama='str_farki', azalan=True,
+                gonderen=None, alan=None, urun=None):
+        """Filtreye uyan satır sayısı ve istenen sayfadaki transferler"""
+        secim = None
+        for indeks, deger in ((self.gonderen, gonderen), (self.alan, alan), (self.urun, urun)):
+            if deger is None:
+                continue
+            satirlar = indeks.get(deger, np.empty(0, dtype=np.int64))
+            secim = satirlar if secim is None else np.intersect1d(secim, satirlar, assume_unique=True)
+
+        if secim is None:
+            sira = self.siralar[(siralama, azalan)]
+        else:
+            sira = secim[np.argsort(self.konumlar[(siralama, azalan)][secim], kind='stable')]
+
+        transferler = self.analiz['transferler']
+        return len(sira), [transferler[i] for i in sira[offset:offset + limit]]
+
+class VeriOnbellegi:
+    """Yüklenen dosyaların içerik özetine göre temizlenmiş veri ve analiz sonucu önbelleği
+
+    Veri setleri <klasor>/veri/<ozet>/ altında sütun başına .npy dosyası olarak,
+    analizler <klasor>/analiz/<ozet>-<surum>.pkl olarak, gün içi delta uygulanmış
+    veri setleri <klasor>/delta/<kimlik>.pkl olarak (taban veri setine göre) saklanır. Toplam boyut
+    max_bayt'ı aşınca en uzun süredir kullanılmayan kayıtlar silinir.
+
+    Sayısal sütunlar ve kod dizileri salt okunur bellek eşlemesiyle (mmap) açılır;
+    aynı makinedeki tüm worker'lar veri setine kopyasız, ortak sayfa önbelleği
+    üzerinden bağlanır.
+    """
+
+    def __init__(self, klasor, max_bayt):
+        self.klasor = klasor
+        self.max_bayt = max_bayt
+        self.etkin = max_bayt > 0
+        if self.etkin and not ozel_klasor_olustur(klasor):
+            # Başkasının yazabildiği klasördeki pickle dosyaları okunmaz
+            logger.warning(f"Önbellek klasörü güvenli değil, disk önbelleği kapatıldı: {klasor}")
+            self.etkin = False
+        if self.etkin:
+            for alt in ('veri', 'analiz', 'delta'):
+                os.makedirs(os.path.join(klasor, alt), mode=0o700, exist_ok=True)
+
+    @staticmethod
+    def icerik_ozeti(akis):
+        """Akışın SHA-256 özeti; akışı başa sarar"""
+        ozet = hashlib.sha256()
+        for blok in iter(lambda: akis.read(1024 * 1024), b''):
+            ozet.update(blok)
+        akis.seek(0)
+        return ozet.hexdigest()
+
+    def _veri_yolu(self, ozet):
+        return os.path.join(self.klasor, 'veri', ozet)
+
+    def _analiz_yolu(self, ozet, surum):
+        return os.path.join(self.klasor, 'analiz', f'{ozet}-{surum}.pkl')
+
+    def _delta_yolu(self, kimlik):
+        return os.path.join(self.klasor, 'delta', f'{kimlik}.pkl')
+
+    def veri_yukle(self, ozet):
+        """Önbellekteki temizlenmiş veriyi (DataFrame, kodlar) olarak döndür (yoksa (None, None))"""
+        yol = self._veri_yolu(ozet)
+        if not self.etkin or not os.path.isdir(yol):
+            return None, None
+        try:
+            with open(os.path.join(yol, 'sema.json'), encoding='utf-8') as f:
+                sema = json.load(f)
+            if 'ondalik_sutunlar' not in sema:
+                # Eski biçim: yüklenen miktar tipleri bilinmiyor, dosya yeniden ayrıştırılır
+                shutil.rmtree(yol, ignore_errors=True)
+                return None, None
+            sutunlar = {}
+            for no, sutun in enumerate(sema['sutunlar']):
+                degerler = np.load(os.path.join(yol, f'{no}.npy'), mmap_mode='r')
+                if sutun['tip'] == 'kategori':
+                    kategoriler = np.load(os.path.join(yol, f'{no}.kategori.npy'), allow_pickle=True)
+                    degerler = pd.Categorical.from_codes(degerler, categories=kategoriler)
+                sutunlar[sutun['ad']] = degerler
+            kodlar = {}
+            for ad in KOD_ALANLARI:
+                dosya = os.path.join(yol, f'kod.{ad}.npy')
+                # Arama tabloları Python nesnesi içerir, eşlenemez
+                kodlar[ad] = (np.load(dosya, allow_pickle=True) if ad.endswith('tablosu')
+                              else np.load(dosya, mmap_mode='r'))
+            self._kullanildi(yol)
+            # copy=False: sütunlar blok birleştirmesiyle kopyalanmaz, eşlemede kalır
+            df = pd.DataFrame(sutunlar, copy=False)
+            df.attrs['ondalik_sutunlar'] = tuple(sema['ondalik_sutunlar'])
+            return df, kodlar
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Önbellekteki veri okunamadı ({ozet}): {str(e)}")
+            return None, None
+
+    def veri_kaydet(self, ozet, df, kodlar):
+        """Temizlenmiş veriyi ve anahtar/mağaza kodlarını sütun sütun ikili formatta yaz
+
+        Metin sütunları kategori kodu + kategori tablosu olarak saklanır.
+        """
+        hedef = self._veri_yolu(ozet)
+        if not self.etkin or os.path.isdir(hedef):
+            return
+        gecici = tempfile.mkdtemp(prefix=f'.{ozet}-', dir=os.path.dirname(hedef))
+        try:
+            sema = {'sutunlar': [], 'satir_sayisi': len(df), 'ondalik_sutunlar': list(ondalik_sutunlari(df))}
+            for no, (ad, seri) in enumerate(df.items()):
+                if pd.api.types.is_numeric_dtype(seri.dtype):
+                    np.save(os.path.join(gecici, f'{no}.npy'), seri.to_numpy())
+                    sema['sutunlar'].append({'ad': ad, 'tip': 'sayi'})
+                    continue
+                kategorik = seri.values if isinstance(seri.dtype, pd.CategoricalDtype) else pd.Categorical(seri)
+                np.save(os.path.join(gecici, f'{no}.npy'), kategorik.codes)
+                np.save(os.path.join(gecici, f'{no}.kategori.npy'),
+                        np.asarray(kategorik.categories, dtype=object), allow_pickle=True)
+                sema['sutunlar'].append({'ad': ad, 'tip': 'kategori'})
+            for ad, dizi in kodlar.items():
+                np.save(os.path.join(gecici, f'kod.{ad}.npy'), dizi, allow_pickle=True)
+            with open(os.path.join(gecici, 'sema.json'), 'w', encoding='utf-8') as f:
+                json.dump(sema, f, ensure_ascii=False)
+            os.rename(gecici, hedef)
+        except OSError as e:
+            # Aynı dosyayı başka bir süreç önce yazmış olabilir
+            logger.warning(f"Veri önbelleğe yazılamadı ({ozet}): {str(e)}")
+            shutil.rmtree(gecici, ignore_errors=True)
+            return
+        self._sinirla()
+
+    def _nesne_yukle(self, yol, ad):
+        """Pickle dosyasındaki nesne (yoksa ya da okunamazsa None)"""
+        if not self.etkin or not os.path.exists(yol):
+            return None
+        try:
+            with open(yol, 'rb') as f:
+                nesne = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"Önbellekteki {ad} okunamadı ({os.path.basename(yol)}): {str(e)}")
+            return None
+        self._kullanildi(yol)
+        return nesne
+
+    def _nesne_kaydet(self, yol, nesne, ad):
+        """Nesneyi geçici dosyaya yazıp atomik olarak yerine taşı"""
+        if not self.etkin:
+            return
+        gecici = f'{yol}.{os.getpid()}.tmp'
+        try:
+            with open(gecici, 'wb') as f:
+                pickle.dump(nesne, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(gecici, yol)
+        except OSError as e:
+            logger.warning(f"{ad.capitalize()} önbelleğe yazılamadı ({os.path.basename(yol)}): {str(e)}")
+            if os.path.exists(gecici):
+                os.remove(gecici)
+            return
+        self._sinirla()
+
+    def analiz_yukle(self, ozet, surum=ALGORITMA_SURUMU):
+        """Aynı veri ve algoritma sürümü için saklanmış analiz sonucu (yoksa None)"""
+        return self._nesne_yukle(self._analiz_yolu(ozet, surum), 'analiz')
+
+    def analiz_kaydet(self, ozet, sonuc, surum=ALGORITMA_SURUMU):
+        self._nesne_kaydet(self._analiz_yolu(ozet, surum), sonuc, 'analiz')
+
+    def delta_yukle(self, kimlik):
+        """Delta uygulanmış veri setinin durumu (MagazaTransferSistemi.delta_durumu; yoksa None)
+
+        Taban veri seti son kullanılmış sayılır; delta kaydı ondan önce çıkarılmaz.
+        """
+        durum = self._nesne_yukle(self._delta_yolu(kimlik), 'delta')
+        if durum is not None and 'delta_yamasi' not in durum:
+            # Eski biçim (tam özet) okunmaz; delta kaynak veri setine yeniden uygulanmalı
+            return None
+        if durum is not None:
+            self._kullanildi(self._veri_yolu(durum['taban_kimligi']))
+        return durum
+
+    def delta_kaydet(self, kimlik, durum):
+        """Delta yamalarını (değişen çiftler, yeni anahtarlar, anahtar kararları) taban kimliğiyle yaz"""
+        self._kullanildi(self._veri_yolu(durum['taban_kimligi']))
+        self._nesne_kaydet(self._delta_yolu(kimlik), durum, 'delta')
+
+    def _kullanildi(self, yol):
+        """LRU sırası için son kullanım zamanını güncelle"""
+        try:
+            os.utime(yol)
+        except OSError:
+            pass
+
+    def _kayitlar(self):
+        """(son kullanım, boyut, yol) listesi"""
+        kayitlar = []
+        for alt in ('veri', 'analiz', 'delta'):
+            klasor = os.path.join(self.klasor, alt)
+            for ad in os.listdir(klasor):
+                if ad.startswith('.') or ad.endswith('.tmp'):
+                    continue
+                yol = os.path.join(klasor, ad)
+                try:
+                    if os.path.isdir(yol):
+                        boyut = sum(e.stat().st_size for e in os.scandir(yol))
+                    else:
+                        boyut = os.path.getsize(yol)
+                    kayitlar.append((os.path.getmtime(yol), boyut, yol))
+                except OSError:
+                    continue
+        return kayitlar
+
+    def _sinirla(self):
+        """Toplam boyut sınırı aşılırsa en eski kullanılan kayıtları sil"""
+        kayitlar = sorted(self._kayitlar())
+        toplam = sum(boyut for _, boyut, _ in kayitlar)
+        for _, boyut, yol in kayitlar:
+            if toplam <= self.max_bayt:
+                break
+            if os.path.isdir(yol):
+                shutil.rmtree(yol, ignore_errors=True)
+            else:
+                try:
+                    os.remove(yol)
+                except OSError:
+                    pass
+            toplam -= boyut
+            logger.info(f"Önbellekten çıkarıldı: {os.path.basename(yol)}")
+
+class VeriKaydi:
+    """Kayıt defterindeki tek veri seti: kendi sistemi ve eşzamanlı erişim kilidi"""
+
+    def __init__(self, kimlik, sistem):
+        self.kimlik = kimlik
+        self.sistem = sistem
+        # Aynı veri setinde analiz/export sırayla; farklı veri setleri paralel
+        self.kilit = threading.RLock()
+        self.olusturma = time.time()
+        self.son_erisim = self.olusturma
+        self.bellek = self.bellek_bayt()
+
+    def bellek_bayt(self):
+        """Veri seti ve ona bağlı sonuçların bellek kullanımı (bütçe için self.bellek'e yazılır)
+
+        Veri, kod dizileri ve çift özetleri ölçülür; mevcut analiz, sayfalama
+        indeksinin tuttuğu analiz ve bu veri setinin bitmiş işlerinin sonuçları
+        (aynı liste bir kez) örnek satırlardan tahmin edilir.
+        """
+        sistem = self.sistem
+        toplam = 0
+        if sistem.data is not None:
+            toplam += sum(sistem.bellek_raporu().values())
+        for ozet in (sistem._taban_ozeti, sistem._delta_yamasi):
+            if ozet is not None:
+                toplam += int(ozet.memory_usage().sum())
+
+        indeks = sistem._sonuc_indeksi_onbellegi
+        analizler = [sistem.mevcut_analiz] + analiz_isleri.kayit_sonuclari(self)
+        if indeks is not None:
+            toplam += indeks.bellek_bayt()
+            analizler.append(indeks.analiz)
+        gorulen = set()
+        for analiz in analizler:
+            if analiz and id(analiz['transferler']) not in gorulen:
+                gorulen.add(id(analiz['transferler']))
+                toplam += analiz_bellek_bayt(analiz)
+        self.bellek = toplam
+        return toplam
+
+    def paylasimli(self):
+        """Veri disk eşlemesinden mi (worker'lar arası ortak) okunuyor"""
+        return isinstance(self.sistem.urun_anahtar_kodlari, np.memmap)
+
+    def durum(self):
+        sistem = self.sistem
+        return {
+            'dataset_id': self.kimlik,
+            'satir_sayisi': 0 if sistem.data is None else len(sistem.data),
+            'magaza_sayisi': len(sistem.magazalar),
+            'analiz_var': sistem.mevcut_analiz is not None,
+            'paylasimli': self.paylasimli(),
+            'bellek_mb': round(self.bellek_bayt() / (1024 * 1024), 2),
+            'olusturma': datetime.fromtimestamp(self.olusturma).isoformat(),
+            'son_erisim': datetime.fromtimestamp(self.son_erisim).isoformat()
+        }
+
+
+class VeriKayitDefteri:
+    """dataset_id -> VeriKaydi; bellek bütçesi (LRU) ve TTL ile çıkarma"""
+
+    def __init__(self, max_bayt, ttl_sn):
+        self.max_bayt = max_bayt
+        self.ttl_sn = ttl_sn
+        self._kayitlar = OrderedDict()
+        self._kilit = threading.Lock()
+
+    def ekle(self, kimlik, sistem):
+        """Yeni veri setini kaydet; aynı kimlik zaten varsa mevcut kaydı döndür"""
+        with self._kilit:
+            kayit = self._kayitlar.get(kimlik)
+            if kayit is None:
+                kayit = VeriKaydi(kimlik, sistem)
+                self._kayitlar[kimlik] = kayit
+            kayit.son_erisim = time.time()
+            self._kayitlar.move_to_end(kimlik)
+            self._temizle(korunan=kimlik)
+            return kayit
+
+    def al(self, kimlik):
+        with self._kilit:
+            self._temizle()
+            kayit = self._kayitlar.get(kimlik)
+            if kayit is not None:
+                kayit.son_erisim = time.time()
+                self._kayitlar.move_to_end(kimlik)
+            return kayit
+
+    def kayitlar(self):
+        with self._kilit:
+            self._temizle()
+            return list(self._kayitlar.values())
+
+    def bellek_guncelle(self, kayit):
+        """Kaydın bellek kullanımını yeniden ölç (analiz/indeks sonrası); bütçe aşılırsa diğerlerini çıkar"""
+        with self._kilit:
+            kayit.bellek_bayt()
+            self._temizle(korunan=kayit.kimlik)
+
+    def _temizle(self, korunan=None):
+        """Süresi dolanları, sonra bütçe aşılıyorsa en eski erişilenleri çıkar"""
+        simdi = time.time()
+        for kimlik, kayit in list(self._kayitlar.items()):
+            if kimlik != korunan and simdi - kayit.son_erisim > self.ttl_sn:
+                del self._kayitlar[kimlik]
+                logger.info(f"Veri seti süresi doldu: {kimlik[:12]}")
+
+        toplam = sum(kayit.bellek for kayit in self._kayitlar.values())
+        for kimlik, kayit in list(self._kayitlar.items()):
+            if toplam <= self.max_bayt:
+                break
+            if kimlik == korunan:
+                continue
+            toplam -= kayit.bellek
+            del self._kayitlar[kimlik]
+            logger.info(f"Veri seti bellek bütçesi nedeniyle çıkarıldı: {kimlik[:12]}")
+
+class AnalizIsi:
+    """Arka planda çalışan tek bir analiz: durum, ilerleme ve iptal işareti"""
+
+    def __init__(self, kayit, secenekler=None):
+        self.kimlik = uuid.uuid4().hex
+        self.kayit = kayit
+        self.secenekler = secenekler or {}
+        self.durum = 'kuyrukta'
+        self.islenen = 0
+        self.toplam = 0
+        self.hata = None
+        self.sonuc = None
+        self.olusturma = time.time()
+        self.bitis = None
+        self.iptal_olayi = threading.Event()
+        self.gelecek = None
+
+    def ilerleme(self, islenen, toplam):
+        """global_transfer_analizi_yap geri çağırması; iptal istendiyse analizi durdurur"""
+        self.islenen = islenen
+        self.toplam = toplam
+        if self.iptal_olayi.is_set():
+            raise AnalizIptalEdildi()
+
+    def bitti(self):
+        return self.durum in ('tamamlandi', 'iptal', 'hata')
+
+    def durum_ozeti(self):
+        ozet = {
+            'job_id': self.kimlik,
+            'dataset_id': self.kayit.kimlik,
+            'durum': self.durum,
+            'islenen': self.islenen,
+            'toplam': self.toplam,
+            'yuzde': 100.0 if self.durum == 'tamamlandi' else
+                     round(100.0 * self.islenen / self.toplam, 1) if self.toplam else 0.0,
+            'olusturma': datetime.fromtimestamp(self.olusturma).isoformat(),
+            'sure_sn': round((self.bitis or time.time()) - self.olusturma, 3)
+        }
+        if self.hata:
+            ozet['hata'] = self.hata
+        if self.sonuc is not None:
+            ozet['results'] = sinirli_sonuc(self.sonuc)
+        return ozet
+
+
+class KayitliAnalizIsi:
+    """Başka bir worker'da çalışan işin ortak klasördeki son durumu (salt okunur görünüm)"""
+
+    def __init__(self, ozet):
+        self.ozet = ozet
+        self.kimlik = ozet['job_id']
+        self.durum = ozet['durum']
+
+    def bitti(self):
+        return self.durum in ('tamamlandi', 'iptal', 'hata')
+
+    def durum_ozeti(self):
+        return dict(self.ozet)
+
+
+class AnalizIsYoneticisi:
+    """Sınırlı iş parçacığı havuzunda analiz işleri; web worker'ları bloklanmaz
+
+    klasor verilirse her işin durumu <klasor>/<job_id>.json dosyasına yazılır;
+    aynı makinedeki diğer worker'lar işi oradan okur ve <job_id>.iptal dosyasıyla
+    iptal eder. İşi çalıştıran worker bu dosyayı her ilerleme adımında denetler.
+    """
+
+    def __init__(self, is_sayisi, kuyruk_siniri, sakla_sn, klasor=None):
+        self._havuz = ThreadPoolExecutor(max_workers=is_sayisi, thread_name_prefix='analiz')
+        self.kuyruk_siniri = kuyruk_siniri
+        self.sakla_sn = sakla_sn
+        self._isler = {}
+        self._kilit = threading.Lock()
+        self.klasor = klasor
+        if klasor:
+            os.makedirs(klasor, mode=0o700, exist_ok=True)
+
+    def _yol(self, kimlik, uzanti='json'):
+        return os.path.join(self.klasor, f'{kimlik}.{uzanti}')
+
+    def _durum_yaz(self, is_):
+        """İşin durum özetini ortak klasöre (atomik olarak) yaz"""
+        if not self.klasor:
+            return
+        yol = self._yol(is_.kimlik)
+        gecici = f'{yol}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(gecici, 'w', encoding='utf-8') as f:
+                json.dump(is_.durum_ozeti(), f, ensure_ascii=False)
+            os.replace(gecici, yol)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"İş durumu yazılamadı ({is_.kimlik}): {str(e)}")
+            if os.path.exists(gecici):
+                os.remove(gecici)
+
+    def _durum_oku(self, kimlik):
+        """Ortak klasördeki iş durumu (yoksa None)"""
+        if not self.klasor:
+            return None
+        try:
+            with open(self._yol(kimlik), encoding='utf-8') as f:
+                return KayitliAnalizIsi(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _iptal_istendi(self, is_):
+        """Bu worker'da ya da (iptal dosyasıyla) başka bir worker'da iptal istendi mi"""
+        if not is_.iptal_olayi.is_set() and self.klasor and os.path.exists(self._yol(is_.kimlik, 'iptal')):
+            is_.iptal_olayi.set()
+        return is_.iptal_olayi.is_set()
+
+    def _dosyalari_sil(self, kimlik):
+        for uzanti in ('json', 'iptal'):
+            try:
+                os.remove(self._yol(kimlik, uzanti))
+            except OSError:
+                pass
+
+    def baslat(self, kayit, secenekler=None):
+        """Yeni iş kuyruğa al (secenekler analiz_calistir'a geçer); bekleyen iş sayısı sınırdaysa None"""
+        with self._kilit:
+            self._temizle()
+            bekleyen = sum(1 for is_ in self._isler.values() if not is_.bitti())
+            if bekleyen >= self.kuyruk_siniri:
+                return None
+            is_ = AnalizIsi(kayit, secenekler)
+            self._isler[is_.kimlik] = is_
+            self._durum_yaz(is_)
+            is_.gelecek = self._havuz.submit(self._calistir, is_)
+            return is_
+
+    def al(self, kimlik):
+        """Bu worker'ın işi ya da başka bir worker'ınkinin kayıtlı durumu (yoksa None)"""
+        if not isinstance(kimlik, str) or IS_KIMLIGI_DESENI.fullmatch(kimlik) is None:
+            return None
+        with self._kilit:
+            is_ = self._isler.get(kimlik)
+        return is_ if is_ is not None else self._durum_oku(kimlik)
+
+    def iptal(self, kimlik):
+        """İşi iptal et; kuyruktaysa hiç başlamaz, çalışıyorsa sonraki blokta durur
+
+        İş başka bir worker'daysa iptal dosyası bırakılır; o worker sonraki
+        ilerleme adımında durur ve durumu 'iptal' olarak yazar.
+        """
+        is_ = self.al(kimlik)
+        if is_ is None or is_.bitti():
+            return is_
+        if isinstance(is_, KayitliAnalizIsi):
+            try:
+                open(self._yol(kimlik, 'iptal'), 'w').close()
+            except OSError as e:
+                logger.warning(f"İptal işareti yazılamadı ({kimlik}): {str(e)}")
+            return is_
+        is_.iptal_olayi.set()
+        if is_.gelecek.cancel():
+            is_.durum = 'iptal'
+            is_.bitis = time.time()
+            self._durum_yaz(is_)
+        return is_
+
+    def _calistir(self, is_):
+        if self._iptal_istendi(is_):
+            is_.durum = 'iptal'
+            is_.bitis = time.time()
+            self._durum_yaz(is_)
+            return
+        is_.durum = 'calisiyor'
+        self._durum_yaz(is_)
+
+        def ilerleme(islenen, toplam):
+            self._iptal_istendi(is_)
+            try:
+                is_.ilerleme(islenen, toplam)
+            finally:
+                self._durum_yaz(is_)
+
+        try:
+            is_.sonuc = analiz_calistir(is_.kayit, ilerleme, **is_.secenekler)
+            is_.durum = 'tamamlandi' if is_.sonuc else 'hata'
+            if not is_.sonuc:
+                is_.hata = 'Analiz başarısız'
+        except AnalizIptalEdildi:
+            is_.durum = 'iptal'
+            logger.info(f"Analiz işi iptal edildi: {is_.kimlik}")
+        except Exception as e:
+            is_.durum = 'hata'
+            is_.hata = str(e)
+            logger.error(f"Analysis job error: {str(e)}")
+        finally:
+            is_.bitis = time.time()
+            self._durum_yaz(is_)
+
+    def kayit_sonuclari(self, kayit):
+        """Veri setinin sonucu hâlâ tutulan işlerinin analizleri"""
+        with self._kilit:
+            return [is_.sonuc for is_ in self._isler.values() if is_.kayit is kayit and is_.sonuc is not None]
+
+    def durum_sayilari(self):
+        """Duruma göre iş sayıları (hiç işi olmayan durumlar 0)"""
+        with self._kilit:
+            sayilar = dict.fromkeys(('kuyrukta', 'calisiyor', 'tamamlandi', 'iptal', 'hata'), 0)
+            for is_ in self._isler.values():
+                sayilar[is_.durum] += 1
+            return sayilar
+
+    def _temizle(self):
+        """Bitmiş ve saklama süresi geçmiş işleri unut; ortak klasörde sahipsiz eski durumları sil"""
+        simdi = time.time()
+        for kimlik, is_ in list(self._isler.items()):
+            if is_.bitti() and simdi - is_.bitis > self.sakla_sn:
+                del self._isler[kimlik]
+                if self.klasor:
+                    self._dosyalari_sil(kimlik)
+        if not self.klasor:
+            return
+        # Diğer worker'ların (ya da kapanmış worker'ların) işleri son yazımdan saklama süresi sonra
+        for ad in os.listdir(self.klasor):
+            kimlik, _, uzanti = ad.partition('.')
+            if uzanti != 'json' or kimlik in self._isler:
+                continue
+            try:
+                if simdi - os.path.getmtime(os.path.join(self.klasor, ad)) > self.sakla_sn:
+                    self._dosyalari_sil(kimlik)
+            except OSError:
+                continue
+
+
+class OlcumKaydi:
+    """Süreç içi ölçümler: süre histogramları ve son değer göstergeleri (Prometheus metni)
+
+    Her worker kendi değerlerini tutar; /metrics yanıt veren worker'ınkini döndürür.
+    """
+
+    def __init__(self, kovalar):
+        self.kovalar = tuple(kovalar)
+        self._histogramlar = {}  # ad -> {etiketler: [kova sayıları (+Inf dahil), toplam, adet]}
+        self._gostergeler = {}   # ad -> {etiketler: değer}
+        self._kilit = threading.Lock()
+
+    def gozlemle(self, ad, deger, **etiketler):
+        """Histograma bir gözlem ekle"""
+        kova = bisect_left(self.kovalar, deger)
+        with self._kilit:
+            seriler = self._histogramlar.setdefault(ad, {})
+            seri = seriler.get(tuple(etiketler.items()))
+            if seri is None:
+                seri = seriler[tuple(etiketler.items())] = [[0] * (len(self.kovalar) + 1), 0.0, 0]
+            seri[0][kova] += 1
+            seri[1] += deger
+            seri[2] += 1
+
+    def ayarla(self, ad, deger, **etiketler):
+        """Göstergenin son değerini yaz"""
+        with self._kilit:
+            self._gostergeler.setdefault(ad, {})[tuple(etiketler.items())] = deger
+
+    def asama_kaydet(self, ad, sure, rss_farki=None):
+        self.gozlemle('retailflow_stage_duration_seconds', sure, stage=ad)
+        if rss_farki is not None:
+            self.ayarla('retailflow_stage_rss_delta_bytes', rss_farki, stage=ad)
+
+    @contextmanager
+    def asama(self, ad):
+        """Bloğun süresini ve RSS değişimini ad aşaması olarak kaydet"""
+        rss = _rss_bayt()
+        baslangic = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.asama_kaydet(ad, time.perf_counter() - baslangic, _rss_bayt() - rss)
+
+    def prometheus_metni(self, anlik_gostergeler=()):
+        """Prometheus metin biçimi (0.0.4); anlik_gostergeler: (ad, {etiketler: değer}) çiftleri"""
+        satirlar = []
+
+        def baslik(ad, tur):
+            satirlar.append(f"# HELP {ad} {OLCUM_ACIKLAMALARI.get(ad, ad)}")
+            satirlar.append(f"# TYPE {ad} {tur}")
+
+        with self._kilit:
+            for ad, seriler in self._histogramlar.items():
+                baslik(ad, 'histogram')
+                for etiketler, (kovalar, toplam, adet) in seriler.items():
+                    kumulatif = 0
+                    for sinir, sayi in zip(self.kovalar + ('+Inf',), kovalar):
+                        kumulatif += sayi
+                        le = sinir if isinstance(sinir, str) else f'{sinir:g}'
+                        satirlar.append(f"{ad}_bucket{_prometheus_etiketleri(etiketler + (('le', le),))} {kumulatif}")
+                    satirlar.append(f"{ad}_sum{_prometheus_etiketleri(etiketler)} {toplam!r}")
+                    satirlar.append(f"{ad}_count{_prometheus_etiketleri(etiketler)} {adet}")
+            gostergeler = [(ad, dict(seriler)) for ad, seriler in self._gostergeler.items()]
+
+        for ad, seriler in gostergeler + list(anlik_gostergeler):
+            baslik(ad, 'gauge')
+            for etiketler, deger in seriler.items():
+                satirlar.append(f"{ad}{_prometheus_etiketleri(etiketler)} {deger}")
+        return '\n'.join(satirlar) + '\n'
+
+# Global veri seti kayıt defteri ve disk önbelleği
+kayit_defteri = VeriKayitDefteri(KAYIT_MAX_MB * 1024 * 1024, KAYIT_TTL_SN)
+onbellek = VeriOnbellegi(ONBELLEK_KLASORU, ONBELLEK_MAX_MB * 1024 * 1024)
+analiz_isleri = AnalizIsYoneticisi(ANALIZ_IS_SAYISI, ANALIZ_KUYRUK_SINIRI, KAYIT_TTL_SN,
+                                   os.path.join(ONBELLEK_KLASORU, 'isler') if onbellek.etkin else None)
+olcumler = OlcumKaydi(GECIKME_KOVALARI)
+_profil_kilidi = threading.Lock()
+
+def veri_kimligi_gecerli(kimlik):
+    """64 karakterlik küçük harf onaltılık özet mi (önbellek yolunun dışına çıkamaz)"""
+    return isinstance(kimlik, str) and VERI_KIMLIGI_DESENI.fullmatch(kimlik) is not None
+
+def veri_kaydi_getir(kimlik):
+    """Kayıt defterinden, yoksa disk önbelleğinden veri setini getir (yoksa ya da kimlik geçersizse None)"""
+    if not veri_kimligi_gecerli(kimlik):
+        return None
+    kayit = kayit_defteri.al(kimlik)
+    if kayit is not None:
+        return kayit
+
+    # Başka bir worker'da yüklenmiş ya da bellekten çıkarılmış olabilir
+    df, kodlar = onbellek.veri_yukle(kimlik)
+    delta = None
+    if df is None:
+        # Delta uygulanmış veri seti: taban veri + yamalanmış çift özeti
+        delta = onbellek.delta_yukle(kimlik)
+        if delta is None:
+            return None
+        df, kodlar = onbellek.veri_yukle(delta['taban_kimligi'])
+        if df is None:
+            return None
+    sistem = MagazaTransferSistemi()
+    sistem._veri_ayarla(df, kodlar)
+    sistem.veri_kimligi = kimlik
+    if delta is not None:
+        sistem.delta_durumu_ayarla(delta)
+    logger.info(f"Veri seti önbellekten geri yüklendi: {kimlik[:12]}")
+    return kayit_defteri.ekle(kimlik, sistem)
+
+_surec_havuzlari = {}
+_surec_havuzu_kilidi = threading.Lock()
+_parca_sistemi = {}
+
+def surec_havuzu(surec_sayisi):
+    """Verilen boyuttaki paylaşılan süreç havuzu (ilk kullanımda açılır)"""
+    with _surec_havuzu_kilidi:
+        havuz = _surec_havuzlari.get(surec_sayisi)
+        if havuz is None:
+            # spawn: Flask iş parçacıkları ve kilitler çocuk süreçlere taşınmaz
+            havuz = ProcessPoolExecutor(max_workers=surec_sayisi,
+                                        mp_context=multiprocessing.get_context('spawn'))
+            _surec_havuzlari[surec_sayisi] = havuz
+        return havuz
+
+def _parca_kararlari(klasor, kimlik, satirlar):
+    """Süreç havuzu işi: satirlar konumlarındaki (bir anahtar aralığının tüm satırları) ürünlerin kararları"""
+    sistem = _parca_sistemi.get((klasor, kimlik))
+    if sistem is None:
+        df, kodlar = VeriOnbellegi(klasor, 1).veri_yukle(kimlik)
+        if df is None:
+            raise RuntimeError(f'Veri seti önbellekte bulunamadı: {kimlik[:12]}')
+        sistem = MagazaTransferSistemi()
+        sistem._veri_ayarla(df, kodlar)
+        # Süreç başına yalnızca son bağlanılan veri seti tutulur
+        _parca_sistemi.clear()
+        _parca_sistemi[(klasor, kimlik)] = sistem
+
+    ozet = sistem._urun_magaza_ozeti(satirlar)
+    return sistem._transfer_kararlari(ozet, sistem.urun_anahtar_tablosu)
+
+def kayitli_analiz(kayit):
+    """Veri setinin son analizi (bu worker'da yoksa disk önbelleğinden); yoksa None"""
+    sistem = kayit.sistem
+    with kayit.kilit:
+        if not sistem.mevcut_analiz:
+            # Analiz başka bir worker'da yapılmış ya da delta ile yamalanmış olabilir
+            sistem.mevcut_analiz = onbellek.analiz_yukle(sistem.veri_kimligi)
+            if sistem.mevcut_analiz is None:
+                sistem.mevcut_analiz = yamali_analiz_yukle(sistem)
+            if sistem.mevcut_analiz:
+                sistem.analiz_kimligi = analiz_kimligi(sistem.veri_kimligi, ALGORITMA_SURUMU)
+                kayit_defteri.bellek_guncelle(kayit)
+        return sistem.mevcut_analiz
+
+def yamali_analiz_yukle(sistem):
+    """Delta uygulanmış veri setinin global analizi: yamanın kaynağındaki saklanmış analiz
+    ve etkilenen anahtarların kararları (yama ya da kaynak analiz yoksa None)"""
+    yama = sistem._analiz_yamasi
+    if yama is None or yama['hedef'] != sistem.veri_kimligi:
+        return None
+    kaynak_analizi = onbellek.analiz_yukle(yama['kaynak'])
+    if kaynak_analizi is None:
+        return None
+    return sistem.yamali_analiz(kaynak_analizi)
+
+def analiz_surumu(motor='global', gonderme_kapasitesi=None, alma_kapasitesi=None):
+    """Önbellek anahtarındaki algoritma sürümü; çok mağazalı motorda kapasiteler de dahil"""
+    if motor == 'global':
+        return ALGORITMA_SURUMU
+    kapasiteler = json.dumps([gonderme_kapasitesi, alma_kapasitesi], sort_keys=True, ensure_ascii=False)
+    return f"{COK_MAGAZALI_SURUMU}-{hashlib.sha256(kapasiteler.encode('utf-8')).hexdigest()[:12]}"
+
+def analiz_kimligi(veri_kimligi, surum):
+    """Analiz sonucunun kimliği: aynı veri ve aynı sürüm aynı sonucu verir (ETag anahtarı)"""
+    return hashlib.sha256(f'{veri_kimligi}:{surum}'.encode('utf-8')).hexdigest()[:32]
+
+def analiz_calistir(kayit, ilerleme=None, motor='global', gonderme_kapasitesi=None, alma_kapasitesi=None):
+    """Veri setinin analizini önbellekten al ya da hesaplayıp sakla; sonucu döndür"""
+    sistem = kayit.sistem
+    with kayit.kilit:
+        surum = analiz_surumu(motor, gonderme_kapasitesi, alma_kapasitesi)
+        results = onbellek.analiz_yukle(sistem.veri_kimligi, surum)
+        if results is None and motor == 'global':
+            results = yamali_analiz_yukle(sistem)
+        if results is not None:
+            logger.info(f"Analiz önbellekten alındı: {sistem.veri_kimligi[:12]}")
+        elif motor == 'cok_magazali':
+            results = sistem.cok_magazali_transfer_analizi_yap(gonderme_kapasitesi, alma_kapasitesi, ilerleme)
+            if results:
+                with olcumler.asama('analysis_cache_write'):
+                    onbellek.analiz_kaydet(sistem.veri_kimligi, results, surum)
+        else:
+            logger.info("Global STR transfer analizi başlatılıyor...")
+            
+            results = sistem.global_transfer_analizi_yap(ilerleme)
+            if results:
+                with olcumler.asama('analysis_cache_write'):
+                    onbellek.analiz_kaydet(sistem.veri_kimligi, results, surum)
+        
+        if results:
+            sistem.mevcut_analiz = results
+            sistem.analiz_kimligi = analiz_kimligi(sistem.veri_kimligi, surum)
+            kayit_defteri.bellek_guncelle(kayit)
+    return results
+
+def filtre_etiketleri(kurallar):
+    """Koruma filtrelerinin (oran, kalan, adet) uygulanan_filtre etiketleri"""
+    return (f"Max %{kurallar['max_oran']*100:g}", f"Min {kurallar['min_kalan']} kalsın",
+            f"Max {kurallar['max_adet']} adet")
+
+def _senaryo_kurallari(senaryolar):
+    """/scenarios gövdesindeki senaryolardan (ad, kurallar) listesi: (liste, hata yanıtı)"""
+    if not isinstance(senaryolar, list) or not senaryolar:
+        return None, (jsonify({'error': 'scenarios (senaryo listesi) gerekli'}), 400)
+    if len(senaryolar) > SENARYO_MAX:
+        return None, (jsonify({'error': f'En fazla {SENARYO_MAX} senaryo gönderilebilir'}), 400)
+    liste = []
+    for no, senaryo in enumerate(senaryolar, 1):
+        if not isinstance(senaryo, dict):
+            return None, (jsonify({'error': f'{no}. senaryo parametre sözlüğü olmalı'}), 400)
+        bilinmeyen = set(senaryo) - set(SENARYO_PARAMETRELERI) - {'name'}
+        if bilinmeyen:
+            return None, (jsonify({'error': f'{no}. senaryoda bilinmeyen parametre: {", ".join(sorted(bilinmeyen))} '
+                                            f'(geçerli: {", ".join(SENARYO_PARAMETRELERI)})'}), 400)
+        kurallar = dict(VARSAYILAN_KURALLAR)
+        for parametre, kural in SENARYO_PARAMETRELERI.items():
+            if parametre not in senaryo:
+                continue
+            deger = senaryo[parametre]
+            if (isinstance(deger, bool) or not isinstance(deger, (int, float))
+                    or not np.isfinite(deger) or deger < 0):
+                return None, (jsonify({'error': f'{no}. senaryoda {parametre} negatif olmayan sayı olmalı'}), 400)
+            if kural in ('min_str_farki', 'max_oran') and deger > 1:
+                return None, (jsonify({'error': f'{no}. senaryoda {parametre} 0 ile 1 arasında olmalı'}), 400)
+            kurallar[kural] = deger
+        liste.append((str(senaryo.get('name') or f'senaryo-{no}'), kurallar))
+    return liste, None
+
+def _kapasite_gecerli(kapasite):
+    if kapasite is None:
+        return True
+    if isinstance(kapasite, dict):
+        return all(isinstance(adet, int) and not isinstance(adet, bool) and adet >= 0
+                   for adet in kapasite.values())
+    return isinstance(kapasite, int) and not isinstance(kapasite, bool) and kapasite >= 0
+
+def _analiz_secenekleri():
+    """JSON gövdesinden motor ve kapasite seçenekleri: (secenekler, hata yanıtı)"""
+    govde = request.get_json(silent=True) or {}
+    motor = govde.get('engine', 'global')
+    if motor not in ANALIZ_MOTORLARI:
+        return None, (jsonify({'error': f'engine şunlardan biri olmalı: {", ".join(ANALIZ_MOTORLARI)}'}), 400)
+    secenekler = {'motor': motor}
+    if motor == 'cok_magazali':
+        for alan, parametre in (('gonderme_kapasitesi', 'send_capacity'), ('alma_kapasitesi', 'receive_capacity')):
+            kapasite = govde.get(parametre)
+            if not _kapasite_gecerli(kapasite):
+                return None, (jsonify({'error': f'{parametre} negatif olmayan tamsayı ya da mağaza -> adet sözlüğü olmalı'}), 400)
+            secenekler[alan] = kapasite
+    return secenekler, None
+
+def _satir_listesi_bayt(satirlar):
+    """Sözlük listesinin tahmini boyutu, eşit aralıklı örnek satırlardan
+
+    Örnekte birden çok satırda görülen nesneler (mağaza/ürün adları, küçük
+    tam sayılar) satırlar arasında ortaktır ve bir kez sayılır; diğerleri
+    satır başına ortalamayla satır sayısına ölçeklenir.
+    """
+    if isinstance(satirlar, SatirTablosu):
+        return satirlar.bellek_bayt()
+    adet = len(satirlar)
+    toplam = sys.getsizeof(satirlar)
+    if not adet:
+        return toplam
+    ornek = [satirlar[i] for i in np.linspace(0, adet - 1, min(adet, ANALIZ_ORNEK_SATIR)).astype(np.int64)]
+    gorulme = {}
+    for satir in ornek:
+        for deger in satir.values():
+            gorulme[id(deger)] = gorulme.get(id(deger), 0) + 1
+    satir_bayt = 0
+    ortak = {}
+    for satir in ornek:
+        satir_bayt += sys.getsizeof(satir)
+        for deger in satir.values():
+            if gorulme[id(deger)] > 1:
+                ortak[id(deger)] = sys.getsizeof(deger)
+            else:
+                satir_bayt += sys.getsizeof(deger)
+    return toplam + int(satir_bayt / len(ornek) * adet) + sum(ortak.values())
+
+def analiz_bellek_bayt(analiz):
+    """Analiz sonucunun (transfer ve red listeleri, mağaza metrikleri) tahmini bellek kullanımı"""
+    return (_satir_listesi_bayt(analiz['transferler']) + _satir_listesi_bayt(analiz['transfer_gereksiz'])
+            + _satir_listesi_bayt(list(analiz['magaza_metrikleri'].values())))
+
+def sinirli_sonuc(results):
+    """Arayüze dönen kısaltılmış analiz: ilk 50 transfer, ilk 20 red ve toplamlar"""
+    return {
+        'analiz_tipi': results['analiz_tipi'],
+        'magaza_metrikleri': results['magaza_metrikleri'],
+        'transferler': results['transferler'][:50],
+        'transfer_gereksiz': results['transfer_gereksiz'][:20],
+        'toplam_transfer_sayisi': len(results['transferler']),
+        'toplam_gereksiz_sayisi': len(results['transfer_gereksiz'])
+    }
+
+def sutunlu_tablo(satirlar, sozlukler):
+    """Satır sözlüklerini sütun dizilerine çevir; SOZLUK_SUTUNLARI değerleri sözlük koduna yazılır
+
+    sozlukler (sözlük adı -> {değer: kod}) aynı yanıttaki tablolar arasında paylaşılır.
+    """
+    sutunlar = _tablo_sutunlari(satirlar)
+    veri = {}
+    for alan in sutunlar:
+        degerler = [satir.get(alan) for satir in satirlar]
+        sozluk_adi = SOZLUK_SUTUNLARI.get(alan)
+        if sozluk_adi:
+            sozluk = sozlukler.setdefault(sozluk_adi, {})
+            degerler = [sozluk.setdefault(deger, len(sozluk)) for deger in degerler]
+        veri[alan] = degerler
+    return {'sutunlar': sutunlar, 'satir_sayisi': len(satirlar), 'veri': veri}
+
+def sutunlu_bicim(veri, tablo_alanlari):
+    """Yanıttaki satır listelerini sütunlu tablolara çevir; sözlükler yanıtta bir kez yer alır"""
+    veri = dict(veri)
+    sozlukler = {}
+    for alan in tablo_alanlari:
+        veri[alan] = sutunlu_tablo(veri[alan], sozlukler)
+    veri['bicim'] = 'columnar'
+    veri['sozlukler'] = {ad: list(sozluk) for ad, sozluk in sozlukler.items()}
+    return veri
+
+def sutunlu_sonuc(results):
+    """sinirli_sonuc'un sütunlu karşılığı; mağaza metrikleri de mağaza sözlüklü tabloya döner"""
+    sonuc = sinirli_sonuc(results)
+    sonuc['magaza_metrikleri'] = [{'magaza': magaza, **metrik}
+                                  for magaza, metrik in sonuc['magaza_metrikleri'].items()]
+    return sutunlu_bicim(sonuc, ('magaza_metrikleri', 'transferler', 'transfer_gereksiz'))
+
+def yanit_etiketi(kimlik, *secenekler):
+    """Analiz kimliği ve yanıtı etkileyen seçeneklerden ETag değeri"""
+    return hashlib.sha256(json.dumps([kimlik, *secenekler], ensure_ascii=False).encode('utf-8')).hexdigest()[:32]
+
+def onbellek_basliklari(yanit, etag):
+    """Zayıf ETag (gövde sıkıştırılabilir) ve her kullanımda yeniden doğrulama"""
+    yanit.set_etag(etag, weak=True)
+    yanit.headers['Cache-Control'] = 'private, no-cache'
+    return yanit
+
+def _istek_veri_kaydi():
+    """İstekteki dataset_id (JSON gövdesi veya sorgu parametresi) için (kayit, hata yanıtı)"""
+    govde = request.get_json(silent=True)
+    if not isinstance(govde, dict):
+        govde = {}
+    kimlik = govde.get('dataset_id') or request.args.get('dataset_id')
+    if not kimlik:
+        return None, (jsonify({'error': 'dataset_id gerekli, önce bir dosya yükleyin'}), 400)
+    if not veri_kimligi_gecerli(kimlik):
+        return None, (jsonify({'error': 'dataset_id 64 karakterlik onaltılık veri seti kimliği olmalı'}), 400)
+    kayit = veri_kaydi_getir(kimlik)
+    if kayit is None:
+        return None, (jsonify({'error': 'Veri seti bulunamadı, dosyayı yeniden yükleyin'}), 404)
+    return kayit, None
+
+def _yanit_bicimi():
+    """JSON gövdesindeki ya da sorgu parametresindeki format seçeneği: (bicim, hata yanıtı)"""
+    govde = request.get_json(silent=True) or {}
+    bicim = govde.get('format') or request.args.get('format', 'rows')
+    if bicim not in YANIT_BICIMLERI:
+        return None, (jsonify({'error': f'format şunlardan biri olmalı: {", ".join(YANIT_BICIMLERI)}'}), 400)
+    return bicim, None
+
+def _istek_bayragi(ad):
+    """JSON gövdesindeki ya da sorgu parametresindeki evet/hayır seçeneği"""
+    govde = request.get_json(silent=True) or {}
+    deger = govde.get(ad, request.args.get(ad, False))
+    if isinstance(deger, str):
+        return deger.lower() in ('1', 'true', 'evet', 'yes')
+    return bool(deger)
+
+def _tablo_sutunlari(satirlar):
+    """Sözlük listesinin sütunları (pd.DataFrame(satirlar) ile aynı sıra)"""
+    if isinstance(satirlar, SatirTablosu):
+        return list(satirlar.sutunlar)
+    sutunlar = {}
+    for satir in satirlar:
+        for alan in satir:
+            sutunlar.setdefault(alan, None)
+    return list(sutunlar)
+
+def xlsx_disa_aktar(tablolar, yol):
+    """(sayfa adı, satırlar) çiftlerini sabit bellekle (write_only) xlsx dosyasına yaz"""
+    kitap = Workbook(write_only=True)
+    for sayfa_adi, satirlar in tablolar:
+        sayfa = kitap.create_sheet(sayfa_adi)
+        sutunlar = _tablo_sutunlari(satirlar)
+        sayfa.append(sutunlar)
+        for satir in satirlar:
+            sayfa.append([satir.get(alan) for alan in sutunlar])
+    kitap.save(yol)
+
+def gecici_dosya_parcalari(yol, blok=64 * 1024):
+    """Geçici dosyayı parça parça oku; akış bitince ya da kesilince dosyayı sil"""
+    try:
+        with open(yol, 'rb') as dosya:
+            for parca in iter(lambda: dosya.read(blok), b''):
+                yield parca
+    finally:
+        os.remove(yol)
+
+def csv_parcalari(satirlar):
+    """Satırları UTF-8 (BOM'lu, Excel uyumlu) CSV parçaları olarak üret"""
+    sutunlar = _tablo_sutunlari(satirlar)
+    tampon = io.StringIO()
+    yazici = csv.DictWriter(tampon, fieldnames=sutunlar)
+    tampon.write('\ufeff')
+    yazici.writeheader()
+    for baslangic in range(0, len(satirlar), DISA_AKTARIM_PARCA):
+        yazici.writerows(satirlar[baslangic:baslangic + DISA_AKTARIM_PARCA])
+        yield tampon.getvalue().encode('utf-8')
+        tampon.seek(0)
+        tampon.truncate()
+    if tampon.tell():
+        yield tampon.getvalue().encode('utf-8')
+
+def ndjson_parcalari(satirlar):
+    """Satır başına bir JSON nesnesi (NDJSON) parçaları üret"""
+    for baslangic in range(0, len(satirlar), DISA_AKTARIM_PARCA):
+        yield ''.join(json.dumps(satir, ensure_ascii=False) + '\n'
+                      for satir in satirlar[baslangic:baslangic + DISA_AKTARIM_PARCA]).encode('utf-8')
+
+def olculen_akis(parcalar, asama):
+    """Parçaları aynen aktar; üreticide geçen toplam süreyi akış bitince (ya da kesilince) kaydet"""
+    sure = 0.0
+    parcalar = iter(parcalar)
+    try:
+        while True:
+            baslangic = time.perf_counter()
+            try:
+                parca = next(parcalar)
+            except StopIteration:
+                break
+            finally:
+                sure += time.perf_counter() - baslangic
+            yield parca
+    finally:
+        olcumler.asama_kaydet(asama, sure)
+
+def kararli_kod_sirasi(kodlar):
+    """Negatif olmayan tam sayı kodların kararlı sıralama indeksi (argsort kind='stable' ile aynı)
+
+    numpy 16 bitlik tiplerde kararlı sıralamayı taban sıralamayla (O(n)) yapar;
+    kodlar alt ve üst 16 bit üzerinden iki geçişte sıralanır.
+    """
+    kodlar = np.asarray(kodlar).astype(np.uint32)
+    if len(kodlar) == 0:
+        return np.empty(0, dtype=np.int64)
+    sira = np.argsort((kodlar & 0xFFFF).astype(np.uint16), kind='stable')
+    if kodlar.max() <= 0xFFFF:
+        return sira
+    return sira[np.argsort((kodlar[sira] >> 16).astype(np.uint16), kind='stable')]
+
+def _anahtar_ciftleri(ciftler, anahtar_kodlari, magaza_sayisi):
+    """Sıralı çift kodlarında verilen (artan) anahtar kodlarına ait satır konumları"""
+    bas = np.searchsorted(ciftler, anahtar_kodlari * magaza_sayisi)
+    uzunluk = np.searchsorted(ciftler, (anahtar_kodlari + 1) * magaza_sayisi) - bas
+    return np.repeat(bas - np.cumsum(uzunluk) + uzunluk, uzunluk) + np.arange(uzunluk.sum())
+
+def _sirali_yama(ogeler, siralar, silinen, eklenen):
+    """Sıralı listeden silinen konumları çıkarıp (sıra, öğe) eklenenleri yerleştir: (öğeler, sıralar)
+
+    Eklenen konumlar eski sıralar üzerinde ikili aramayla bulunur; değişmeyen
+    dilimler tek geçişte kopyalanır, her ekleme için liste kaydırılmaz.
+    """
+    olaylar = [(konum, 1, siralar[konum], None) for konum in silinen]
+    olaylar += [(bisect_left(siralar, sira), 0, sira, oge) for sira, oge in eklenen]
+    olaylar.sort(key=lambda olay: olay[:3])
+    yeni_ogeler, yeni_siralar, onceki = [], [], 0
+    for konum, silme, sira, oge in olaylar:
+        yeni_ogeler.extend(ogeler[onceki:konum])
+        yeni_siralar.extend(siralar[onceki:konum])
+        if silme:
+            onceki = konum + 1
+        else:
+            onceki = konum
+            yeni_ogeler.append(oge)
+            yeni_siralar.append(sira)
+    yeni_ogeler.extend(ogeler[onceki:])
+    yeni_siralar.extend(siralar[onceki:])
+    return yeni_ogeler, yeni_siralar
+
+def _ilk_degerler(seri, cift_kodlari, ciftler, ilk_satirlar=None):
+    """groupby 'first' karşılığı: her çiftteki ilk boş olmayan değer (sıralı çift kodları hizasında)
+
+    Kategorik sütunlarda pandas 'first' grup başına Python'a düştüğü için
+    ilk görülme konumları hash ile bulunur. ilk_satirlar (her çiftin ilk satır
+    konumu) verilir ve o satırların hiçbiri boş değilse doğrudan kullanılır.
+    """
+    dolu = seri.notna().to_numpy()
+    if ilk_satirlar is not None and dolu[ilk_satirlar].all():
+        return seri.take(ilk_satirlar).to_numpy(dtype=object)
+    konum = np.flatnonzero(dolu)
+    konum = konum[~pd.Series(cift_kodlari[konum]).duplicated().to_numpy()]
+
+    # Tümü boş gruplar: metin sütunlarında None, sayısal sütunlarda NaN (pandas ile aynı)
+    bos = np.nan if pd.api.types.is_numeric_dtype(seri.dtype) else None
+    degerler = np.full(len(ciftler), bos, dtype=object)
+    degerler[np.searchsorted(ciftler, cift_kodlari[konum])] = seri.take(konum).to_numpy(dtype=object)
+    return degerler
+
+def _sayi_sikistir(degerler):
+    """Tam sayı değerli diziyi en küçük işaretli tam sayı tipine indir; değilse float64 kopyası
+
+    İşaretli tip seçilir: satırlardan alınan tekil değerlerin farkları eski int64
+    verideki gibi negatife düşebilir, işaretsiz tipte taşardı.
+    """
+    degerler = np.asarray(degerler, dtype=np.float64)
+    if len(degerler) == 0:
+        return degerler.astype(np.int8)
+    alt, ust = degerler.min(), degerler.max()
+    if np.isfinite(alt) and np.isfinite(ust) and np.array_equal(degerler, np.floor(degerler)):
+        for tip in (np.int8, np.int16, np.int32):
+            if np.iinfo(tip).min <= alt and ust <= np.iinfo(tip).max:
+                return degerler.astype(tip)
+    return degerler.copy()
+
+def veri_sikistir(df):
+    """Temizlenmiş veriyi analizin okuduğu sütunlarla kompakt ve salt okunur yeni bir DataFrame'e al
+
+    Kullanılmayan sütunlar atılır, metin sütunları kategorik olur, tam sayı değerli
+    Satis/Envanter en küçük işaretli tam sayı tipine iner (yüklenirken ondalık olanlar
+    attrs['ondalik_sutunlar']'da kalır). Sayısal diziler yazmaya kapalıdır;
+    analiz veriyi değiştiremez, her yerde aynı dizilerin görünümleri dolaşır.
+    """
+    sutunlar = {}
+    for ad in GEREKLI_SUTUNLAR + OPSIYONEL_SUTUNLAR:
+        if ad not in df.columns:
+            continue
+        seri = df[ad]
+        if ad in METIN_SUTUNLARI:
+            sutunlar[ad] = seri.values if isinstance(seri.dtype, pd.CategoricalDtype) else pd.Categorical(seri)
+        else:
+            degerler = _sayi_sikistir(seri.to_numpy())
+            degerler.flags.writeable = False
+            sutunlar[ad] = degerler
+    # copy=False: diziler tek bloğa birleştirilmez (eşlenmiş önbellek verisiyle aynı düzen)
+    sonuc = pd.DataFrame(sutunlar, copy=False)
+    sonuc.attrs['ondalik_sutunlar'] = ondalik_sutunlari(df)
+    return sonuc
+
+def ondalik_sutunlari(df):
+    """Yüklendiğinde ondalık (float) olan Satis/Envanter sütunları; kompakt veride attrs'tan"""
+    kayitli = df.attrs.get('ondalik_sutunlar', ())
+    return tuple(ad for ad in ('Satis', 'Envanter')
+                 if ad in df.columns and (ad in kayitli or df[ad].dtype.kind == 'f'))
+
+def _kategorileri_donustur(seri, donustur):
+    """Kategorik serinin her kategorisini donustur ile çevir; aynı değere düşenler birleşir"""
+    kategorik = seri.values if isinstance(seri, pd.Series) else seri
+    yeni = pd.Index(donustur(np.asarray(kategorik.categories, dtype=object)))
+    yeni_kodlar, tekil = pd.factorize(yeni, sort=False)
+    kodlar = np.asarray(kategorik.codes)
+    kodlar = np.where(kodlar < 0, -1, yeni_kodlar[kodlar])
+    sonuc = pd.Categorical.from_codes(kodlar, tekil)
+    return pd.Series(sonuc, index=seri.index, name=seri.name) if isinstance(seri, pd.Series) else sonuc
+
+def _metin_tipi_cikar(seri, bos_var):
+    """Kategorik metin sütununa pd.read_csv/pd.read_excel'in sütun tipi çıkarımını uygula
+
+    Tüm değerler doğruluk değeri ise bool, sayı (ya da sayı metni) ise sayı olur:
+    boş hücre varsa ya da tam sayı olmayan değer varsa float64, yoksa int64. Aksi
+    halde değerler olduğu gibi kalır. Ürün anahtarları ve sütun değerleri böylece
+    dosya_yukle_df'e pandas ile okunmuş çerçeve verilmiş gibi olur ('38' / 38.0).
+    """
+    if not isinstance(seri.dtype, pd.CategoricalDtype) or len(seri.cat.categories) == 0:
+        return seri
+    kategoriler = np.asarray(seri.cat.categories, dtype=object)
+    if all(isinstance(k, (bool, np.bool_)) for k in kategoriler):
+        return seri
+    if all(isinstance(k, str) and k in DOGRULUK_METINLERI for k in kategoriler):
+        return _kategorileri_donustur(seri, lambda k: [DOGRULUK_METINLERI[d] for d in k])
+    if any(isinstance(k, (bool, np.bool_)) for k in kategoriler):
+        return seri
+    sayilar = pd.to_numeric(kategoriler, errors='coerce')
+    if np.isnan(np.asarray(sayilar, dtype=np.float64)).any():
+        return seri
+    if bos_var or sayilar.dtype.kind not in 'iu':
+        sayilar = np.asarray(sayilar, dtype=np.float64)
+    return _kategorileri_donustur(seri, lambda k: sayilar)
+
+def _parcalari_birlestir(parcalar):
+    """Temizlenmiş parçaları birleştir; kategorik sütunların kategorilerini birleştirerek koru"""
+    if len(parcalar) == 1:
+        return parcalar[0].reset_index(drop=True)
+
+    sutunlar = {}
+    for sutun in parcalar[0].columns:
+        seriler = [parca[sutun] for parca in parcalar]
+        if all(isinstance(seri.dtype, pd.CategoricalDtype) for seri in seriler):
+            try:
+                sutunlar[sutun] = union_categoricals([seri.values for seri in seriler], ignore_order=True)
+                continue
+            except TypeError:
+                # Boş parçalarda kategori tipi farklı çıkabilir
+                seriler = [seri.astype(object) for seri in seriler]
+                sutunlar[sutun] = pd.Categorical(pd.concat(seriler, ignore_index=True))
+                continue
+        sutunlar[sutun] = pd.concat(seriler, ignore_index=True)
+    return pd.DataFrame(sutunlar)
+
+def _sayiya_cevir(seri):
+    """pd.to_numeric(errors='coerce') karşılığı; kategorik sütunda yalnızca kategoriler çevrilir
+
+    Boş hücre ya da sayı olmayan değer NaN olur (sütun float64); tümü tam sayı ise
+    int64 kalır, pd.read_csv tip çıkarımı + to_numeric ile aynı değerler.
+    """
+    if not isinstance(seri.dtype, pd.CategoricalDtype):
+        return pd.to_numeric(seri, errors='coerce')
+    degerler = pd.to_numeric(seri.cat.categories.astype(object), errors='coerce')
+    kodlar = seri.cat.codes.to_numpy()
+    degerler = np.asarray(degerler)
+    if (kodlar < 0).any():
+        degerler = np.append(degerler.astype(np.float64), np.nan)
+    return pd.Series(degerler[kodlar], index=seri.index, name=seri.name)
+
+def kodlama_tespit_et(akis):
+    """Dosyanın başındaki örnekten metin kodlamasını tahmin et; akışı başa sarar"""
+    ornek = akis.read(KODLAMA_ORNEK_BAYT)
+    akis.seek(0)
+
+    if ornek.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # Örnek çok baytlı bir karakterin ortasında bitebilir
+        codecs.getincrementaldecoder('utf-8')().decode(ornek, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1254'
+
+def csv_parcalari_oku(akis, kodlama, okunacak, temiz_adlar):
+    """CSV'yi yalnızca bilinen sütunlarla, kompakt tiplerle ve parça parça oku
+
+    Tüm sütunlar kategorik metin okunur; parçalar arasında tip değişmez ve bozuk
+    hücre ayrıştırmayı durdurmaz. Satis/Envanter temizlikte sayıya zorlanır.
+    """
+    tipler = {s: 'category' for s in okunacak}
+    with pd.read_csv(akis, encoding=kodlama, usecols=okunacak, dtype=tipler,
+                     chunksize=PARCA_SATIR) as okuyucu:
+        for parca in okuyucu:
+            yield parca.rename(columns=temiz_adlar)
+
+def csv_dosyasi_yukle(akis, sistem):
+    """CSV akışını kodlama tespiti + parçalı temizlikle sisteme yükle"""
+    kodlama = kodlama_tespit_et(akis)
+    baslik = pd.read_csv(akis, encoding=kodlama, nrows=0).columns
+    akis.seek(0)
+
+    istenen = set(GEREKLI_SUTUNLAR + OPSIYONEL_SUTUNLAR)
+    okunacak = [s for s in baslik if str(s).strip() in istenen]
+    temiz_adlar = {s: str(s).strip() for s in okunacak}
+    logger.info(f"Okunacak sütunlar ({kodlama}): {list(temiz_adlar.values())}")
+
+    eksik_sutunlar = [s for s in GEREKLI_SUTUNLAR if s not in temiz_adlar.values()]
+    if eksik_sutunlar:
+        return False, f"Eksik sütunlar: {', '.join(eksik_sutunlar)}"
+
+    try:
+        return sistem.parcalardan_yukle(csv_parcalari_oku(akis, kodlama, okunacak, temiz_adlar))
+    except UnicodeDecodeError:
+        if kodlama == 'cp1254':
+            raise
+        # Örneğin ötesinde UTF-8 dışı bayt: tek seferlik cp1254 denemesi
+        logger.warning(f"{kodlama} kodlaması örnekten sonra bozuldu, cp1254 ile yeniden okunuyor")
+        akis.seek(0)
+        return sistem.parcalardan_yukle(csv_parcalari_oku(akis, 'cp1254', okunacak, temiz_adlar))
+
+def xlsx_parcalari_oku(satirlar, sutun_sirasi, temiz_adlar):
+    """Salt okunur satır akışını parça parça tipli sütunlara çevir; kullanılmayan hücreleri atla"""
+    secici = itemgetter(*sutun_sirasi)
+    sutun_sayisi = max(sutun_sirasi) + 1
+
+    def parca_olustur(secili):
+        sutunlar = {}
+        degerler = list(zip(*secili)) or [()] * len(temiz_adlar)
+        for ad, liste in zip(temiz_adlar, degerler):
+            if ad in METIN_SUTUNLARI:
+                # pd.read_excel (openpyxl) gibi tam sayı değerli ondalıklar int olur
+                sutunlar[ad] = _kategorileri_donustur(pd.Categorical(liste), lambda k: [
+                    int(d) if isinstance(d, float) and d.is_integer() else d for d in k
+                ])
+            else:
+                # int/float/None listesi doğrudan int64/float64'e, bozuk hücreler object'e düşer
+                sutunlar[ad] = pd.Series(liste, dtype=None if liste else object)
+        return pd.DataFrame(sutunlar)
+
+    parca_sayisi = 0
+    for parca in iter(lambda: list(islice(satirlar, PARCA_SATIR)), []):
+        try:
+            secili = list(map(secici, parca))
+        except IndexError:
+            # Sonu boş hücrelerle biten kısa satırlar
+            secili = [secici(tuple(satir) + (None,) * (sutun_sayisi - len(satir))) for satir in parca]
+        yield parca_olustur(secili)
+        parca_sayisi += 1
+
+    # Yalnızca başlık içeren sayfa da boş bir parça olarak yüklenir
+    if parca_sayisi == 0:
+        yield parca_olustur([])
+
+def xlsx_dosyasi_yukle(akis, sistem):
+    """XLSX'i openpyxl salt okunur modunda satır satır akıtarak sisteme yükle"""
+    kitap = load_workbook(akis, read_only=True, data_only=True)
+    try:
+        # pd.read_excel gibi ilk sayfa
+        sayfa = kitap.worksheets[0]
+        baslik = [str(h).strip() if h is not None else ''
+                  for h in next(sayfa.iter_rows(max_row=1, values_only=True), ())]
+
+        istenen = GEREKLI_SUTUNLAR + OPSIYONEL_SUTUNLAR
+        sutun_sirasi = []
+        temiz_adlar = []
+        for sira, ad in enumerate(baslik):
+            if ad in istenen and ad not in temiz_adlar:
+                sutun_sirasi.append(sira)
+                temiz_adlar.append(ad)
+        logger.info(f"Okunacak sütunlar (xlsx): {temiz_adlar}")
+
+        eksik_sutunlar = [s for s in GEREKLI_SUTUNLAR if s not in temiz_adlar]
+        if eksik_sutunlar:
+            return False, f"Eksik sütunlar: {', '.join(eksik_sutunlar)}"
+
+        # Son kullanılan sütundan sonrası hücre nesnesine dönüştürülmez
+        satirlar = sayfa.iter_rows(min_row=2, max_col=max(sutun_sirasi) + 1, values_only=True)
+        return sistem.parcalardan_yukle(xlsx_parcalari_oku(satirlar, sutun_sirasi, temiz_adlar))
+    finally:
+        kitap.close()
+
+def _tepe_rss_sifirla():
+    """Linux'ta sürecin tepe RSS (VmHWM) sayacını sıfırla; desteklenmiyorsa geç"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def _proc_bellek_bayt(alan):
+    """/proc/self/status'taki bellek alanı (bayt); okunamazsa None"""
+    try:
+        with open('/proc/self/status') as f:
+            for satir in f:
+                if satir.startswith(alan):
+                    return int(satir.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def _tepe_rss_bayt():
+    """Son sıfırlamadan bu yana sürecin tepe RSS değeri (bayt)"""
+    tepe = _proc_bellek_bayt('VmHWM:')
+    if tepe is not None:
+        return tepe
+    if resource is None:
+        return 0
+    # /proc yoksa süreç ömrü boyunca tepe değer (Linux'ta KB, macOS'ta bayt)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def _rss_bayt():
+    """Sürecin şu anki RSS değeri (bayt); /proc yoksa 0"""
+    return _proc_bellek_bayt('VmRSS:') or 0
+
+def _prometheus_etiketleri(etiketler):
+    """((ad, değer), ...) -> {ad="değer",...}; değerlerde \\, " ve satır sonu kaçışlanır"""
+    if not etiketler:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(ad, str(deger).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for ad, deger in etiketler
+    ) + '}'
+
+def anlik_gostergeler():
+    """/metrics anındaki veri seti boyutları, kayıt defteri, iş kuyruğu ve süreç belleği"""
+    kayitlar = kayit_defteri.kayitlar()
+    satir, magaza, bellek, transfer = {}, {}, {}, {}
+    for kayit in kayitlar:
+        etiket = (('dataset', kayit.kimlik),)
+        sistem = kayit.sistem
+        satir[etiket] = 0 if sistem.data is None else len(sistem.data)
+        magaza[etiket] = len(sistem.magazalar)
+        # Son ölçülen değer; deep memory_usage her taramada çalıştırılmaz
+        bellek[etiket] = kayit.bellek
+        if sistem.mevcut_analiz:
+            transfer[etiket] = len(sistem.mevcut_analiz['transferler'])
+    return [
+        ('retailflow_datasets', {(): len(kayitlar)}),
+        ('retailflow_dataset_rows', satir),
+        ('retailflow_dataset_stores', magaza),
+        ('retailflow_dataset_memory_bytes', bellek),
+        ('retailflow_dataset_transfers', transfer),
+        ('retailflow_registry_memory_budget_bytes', {(): kayit_defteri.max_bayt}),
+        ('retailflow_analysis_jobs', {(('state', durum),): sayi
+                                      for durum, sayi in analiz_isleri.durum_sayilari().items()}),
+        ('retailflow_process_resident_memory_bytes', {(): _rss_bayt()})
+    ]
+
+def json_yaniti(veri):
+    """jsonify; serileştirme süresi json_serialize aşaması olarak ölçülür"""
+    with olcumler.asama('json_serialize'):
+        return jsonify(veri)
+
+def profilli_calistir(etiket, islev, *args, **kwargs):
+    """islev'i cProfile altında çalıştır; (sonuç, rapor bilgisi) döndür
+
+    PROFIL_KLASORU'na ham .prof (pstats/snakeviz ile açılır) ve kümülatif
+    süreye göre sıralı metin rapor yazılır. Aynı anda tek istek profillenir;
+    başka bir profil sürüyorsa islev profilsiz çalışır ve rapor None olur.
+    """
+    if not _profil_kilidi.acquire(blocking=False):
+        logger.warning("Başka bir istek profilleniyor, bu istek profilsiz çalışıyor")
+        return islev(*args, **kwargs), None
+    try:
+        profil = cProfile.Profile()
+        baslangic = time.perf_counter()
+        sonuc = profil.runcall(islev, *args, **kwargs)
+        sure = time.perf_counter() - baslangic
+
+        os.makedirs(PROFIL_KLASORU, exist_ok=True)
+        yol = os.path.join(PROFIL_KLASORU,
+                           f"{etiket}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}")
+        profil.dump_stats(yol + '.prof')
+        metin = io.StringIO()
+        pstats.Stats(profil, stream=metin).sort_stats('cumulative').print_stats(PROFIL_SATIR)
+        with open(yol + '.txt', 'w', encoding='utf-8') as f:
+            f.write(metin.getvalue())
+    finally:
+        _profil_kilidi.release()
+
+    logger.info(f"Profil raporu yazıldı: {yol}.txt ({sure:.2f} sn)")
+    return sonuc, {'profil_dosyasi': yol + '.prof', 'rapor_dosyasi': yol + '.txt', 'sure_sn': round(sure, 3)}
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+@app.before_request
+def _istek_suresini_baslat():
+    g.istek_baslangic = time.perf_counter()
+
+@app.after_request
+def _istek_suresini_kaydet(yanit):
+    """Gecikme histogramı: rota kalıbına göre (veri seti kimlikleri etiket olmaz)"""
+    baslangic = g.pop('istek_baslangic', None)
+    if baslangic is not None:
+        olcumler.gozlemle('retailflow_request_duration_seconds', time.perf_counter() - baslangic,
+                          route=request.url_rule.rule if request.url_rule else 'eslesmeyen',
+                          method=request.method, status=str(yanit.status_code))
+    return yanit
+
+@app.after_request
+def _yaniti_sikistir(yanit):
+    """JSON yanıtlarını istemcinin kabul ettiği gzip/deflate ile sıkıştır; akışlar ve küçük gövdeler olduğu gibi"""
+    if (yanit.status_code != 200 or yanit.mimetype != 'application/json'
+            or yanit.direct_passthrough or yanit.is_streamed or 'Content-Encoding' in yanit.headers):
+        return yanit
+    yanit.vary.add('Accept-Encoding')
+    kodlama = request.accept_encodings.best_match(('gzip', 'deflate'))
+    govde = yanit.get_data()
+    if kodlama is None or len(govde) < SIKISTIRMA_MIN_BAYT:
+        return yanit
+
+    with olcumler.asama('response_compress'):
+        if kodlama == 'gzip':
+            govde = gzip.compress(govde, SIKISTIRMA_SEVIYESI, mtime=0)
+        else:
+            # HTTP 'deflate' zlib sarmalı veridir
+            govde = zlib.compress(govde, SIKISTIRMA_SEVIYESI)
+    yanit.set_data(govde)
+    yanit.headers['Content-Encoding'] = kodlama
+    return yanit
+
+@app.route('/', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    try:
+        return jsonify({
+            'status': 'healthy',
+            'service': 'RetailFlow Transfer API - MINIMAL CORS',
+            'version': '4.2.0',
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Health check error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    """Dosya yükleme endpoint'i"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'Dosya seçilmedi'}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'Dosya seçilmedi'}), 400
+        
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'Geçersiz dosya formatı! Excel (.xlsx, .xls) veya CSV dosyası yükleyin.'}), 400
+        
+        filename = secure_filename(file.filename)
+        
+        _tepe_rss_sifirla()
+        baslangic = time.perf_counter()
+        veri_kimligi = onbellek.icerik_ozeti(file.stream)
+        kayit = veri_kaydi_getir(veri_kimligi)
+        onbellekten = kayit is not None
+        if kayit is not None:
+            logger.info(f"Aynı içerik zaten yüklü: {veri_kimligi[:12]}")
+            success, result = True, kayit.sistem.yukleme_ozeti()
+        else:
+            sistem = MagazaTransferSistemi()
+            # Excel veya CSV oku
+            if filename.lower().endswith('.csv'):
+                success, result = csv_dosyasi_yukle(file.stream, sistem)
+            elif filename.lower().endswith('.xlsx'):
+                success, result = xlsx_dosyasi_yukle(file.stream, sistem)
+            else:
+                with olcumler.asama('upload_parse'):
+                    df = pd.read_excel(file, engine='openpyxl' if filename.endswith('.xlsx') else None)
+                
+                # Sisteme yükle
+                success, result = sistem.dosya_yukle_df(df)
+            if success:
+                onbellek.veri_kaydet(veri_kimligi, sistem.data, sistem.kodlar())
+                # Ayrıştırılan kopya yerine diğer worker'larla paylaşılan eşlemeye bağlan
+                df, kodlar = onbellek.veri_yukle(veri_kimligi)
+                if df is not None:
+                    sistem._veri_ayarla(df, kodlar)
+                sistem.veri_kimligi = veri_kimligi
+                kayit = kayit_defteri.ekle(veri_kimligi, sistem)
+        sure = time.perf_counter() - baslangic
+        tepe_bellek = _tepe_rss_bayt()
+        
+        if success:
+            result['yukleme'] = {
+                'onbellekten': onbellekten,
+                'sure_sn': round(sure, 3),
+                'satir_per_saniye': int(result['satir_sayisi'] / sure) if sure > 0 else None,
+                'tepe_bellek_mb': round(tepe_bellek / (1024 * 1024), 1),
+                'veri_bellek_mb': round(kayit.bellek / (1024 * 1024), 2)
+            }
+            logger.info(f"Yükleme: {result['satir_sayisi']} satır, {sure:.2f} sn, tepe bellek {result['yukleme']['tepe_bellek_mb']} MB")
+            return json_yaniti({
+                'success': True,
+                'filename': filename,
+                'dataset_id': veri_kimligi,
+                'data': result
+            })
+        else:
+            return jsonify({'error': result}), 400
+            
+    except Exception as e:
+        logger.error(f"Upload error: {str(e)}")
+        return jsonify({'error': f'Dosya yükleme hatası: {str(e)}'}), 500
+
+@app.route('/analyze', methods=['POST'])
+def analyze_data():
+    """Global STR transfer analizi; engine=cok_magazali ile kapasiteli çok mağazalı dağıtım
+
+    format=columnar sütunlu yanıt döndürür; ETag analiz kimliğine bağlıdır ve
+    If-None-Match eşleşirse analiz çalışmadan 304 döner. profile=true
+    (RETAILFLOW_PROFILING açıkken) analizi cProfile altında çalıştırır.
+    """
+    try:
+        kayit, hata = _istek_veri_kaydi()
+        if hata:
+            return hata
+        secenekler, hata = _analiz_secenekleri()
+        if hata:
+            return hata
+        bicim, hata = _yanit_bicimi()
+        if hata:
+            return hata
+        profil_istendi = _istek_bayragi('profile')
+        if profil_istendi and not PROFIL_ACIK:
+            return jsonify({'error': 'Profil alma kapalı (RETAILFLOW_PROFILING=1 ile açılır)'}), 403
+        
+        with kayit.kilit:
+            # Aynı veri ve seçeneklerin sonucu istemcide varsa analiz çalıştırılmaz
+            kimlik = analiz_kimligi(kayit.sistem.veri_kimligi, analiz_surumu(**secenekler))
+            etag = yanit_etiketi(kimlik, bicim)
+            if not profil_istendi and request.if_none_match.contains_weak(etag):
+                return onbellek_basliklari(Response(status=304), etag)
+
+            profil = None
+            if profil_istendi:
+                # Önbellekten gelen sonuçta rapor yalnızca önbellek okumasını gösterir
+                results, profil = profilli_calistir('analiz', analiz_calistir, kayit, **secenekler)
+            else:
+                results = analiz_calistir(kayit, **secenekler)
+        
+        if results:
+            # İlk 50 transfer önerisi
+            yanit = {
+                'success': True,
+                'analysis_id': kimlik,
+                'results': sutunlu_sonuc(results) if bicim == 'columnar' else sinirli_sonuc(results)
+            }
+            if profil:
+                yanit['profil'] = profil
+            return onbellek_basliklari(json_yaniti(yanit), etag)
+        else:
+            return jsonify({'error': 'Analiz başarısız'}), 500
+            
+    except Exception as e:
+        logger.error(f"Analysis error: {str(e)}")
+        return jsonify({'error': f'Analiz hatası: {str(e)}'}), 500
+
+@app.route('/analyze/jobs', methods=['POST'])
+def create_analysis_job():
+    """Analizi arka planda başlat; durum /analyze/jobs/<job_id> ile izlenir"""
+    try:
+        kayit, hata = _istek_veri_kaydi()
+        if hata:
+            return hata
+
+        secenekler, hata = _analiz_secenekleri()
+        if hata:
+            return hata
+
+        is_ = analiz_isleri.baslat(kayit, secenekler)
+        if is_ is None:
+            return jsonify({'error': 'Analiz kuyruğu dolu, lütfen biraz sonra tekrar deneyin'}), 429
+
+        return jsonify({'success': True, **is_.durum_ozeti()}), 202
+
+    except Exception as e:
+        logger.error(f"Analysis job error: {str(e)}")
+        return jsonify({'error': f'Analiz işi hatası: {str(e)}'}), 500
+
+@app.route('/analyze/jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """Analiz işinin durumu ve yüzde ilerlemesi; tamamlandıysa kısaltılmış sonuç"""
+    is_ = analiz_isleri.al(job_id)
+    if is_ is None:
+        return jsonify({'error': 'Analiz işi bulunamadı'}), 404
+    return json_yaniti({'success': True, **is_.durum_ozeti()})
+
+@app.route('/analyze/jobs/<job_id>', methods=['DELETE'])
+def cancel_analysis_job(job_id):
+    """Analiz işini iptal et"""
+    is_ = analiz_isleri.iptal(job_id)
+    if is_ is None:
+        return jsonify({'error': 'Analiz işi bulunamadı'}), 404
+    if is_.durum in ('tamamlandi', 'hata'):
+        return jsonify({'error': 'Analiz işi zaten bitti', **is_.durum_ozeti()}), 409
+    return jsonify({'success': True, **is_.durum_ozeti()})
+
+@app.route('/results', methods=['GET'])
+def get_results():
+    """Kayıtlı tam analizde sayfalama, sıralama ve gönderen/alan mağaza ya da ürün koduna göre filtre
+
+    format=columnar sütunlu yanıt döndürür; analiz değişmediyse If-None-Match ile 304.
+    """
+    try:
+        kayit, hata = _istek_veri_kaydi()
+        if hata:
+            return hata
+
+        try:
+            offset = max(0, int(request.args.get('offset', 0)))
+            limit = min(SONUC_MAX_LIMIT, max(1, int(request.args.get('limit', 50))))
+        except ValueError:
+            return jsonify({'error': 'offset ve limit tamsayı olmalı'}), 400
+        siralama = request.args.get('sort', 'str_farki')
+        if siralama not in SONUC_SIRALAMALARI:
+            return jsonify({'error': f'sort şunlardan biri olmalı: {", ".join(SONUC_SIRALAMALARI)}'}), 400
+        yon = request.args.get('order', 'desc')
+        if yon not in ('asc', 'desc'):
+            return jsonify({'error': 'order asc veya desc olmalı'}), 400
+        bicim, hata = _yanit_bicimi()
+        if hata:
+            return hata
+        filtreler = {'gonderen': request.args.get('sender'),
+                     'alan': request.args.get('receiver'),
+                     'urun': request.args.get('product')}
+
+        with kayit.kilit:
+            if not kayitli_analiz(kayit):
+                return jsonify({'error': 'Analiz sonucu bulunamadı'}), 400
+            etag = yanit_etiketi(kayit.sistem.analiz_kimligi, bicim, offset, limit, siralama, yon, filtreler)
+            if request.if_none_match.contains_weak(etag):
+                return onbellek_basliklari(Response(status=304), etag)
+            onceki_indeks = kayit.sistem._sonuc_indeksi_onbellegi
+            indeks = kayit.sistem.sonuc_indeksi()
+            if indeks is not onceki_indeks:
+                # Yeni kurulan indeks bütçeye yansır
+                kayit_defteri.bellek_guncelle(kayit)
+
+        toplam, transferler = indeks.sorgula(offset, limit, siralama, yon == 'desc', **filtreler)
+        yanit = {
+            'success': True,
+            'dataset_id': kayit.kimlik,
+            'toplam': toplam,
+            'offset': offset,
+            'limit': limit,
+            'sort': siralama,
+            'order': yon,
+            'transferler': transferler
+        }
+        if bicim == 'columnar':
+            yanit = sutunlu_bicim(yanit, ('transferler',))
+        return onbellek_basliklari(json_yaniti(yanit), etag)
+
+    except Exception as e:
+        logger.error(f"Results error: {str(e)}")
+        return jsonify({'error': f'Sonuç hatası: {str(e)}'}), 500
+
+@app.route('/delta', methods=['POST'])
+def apply_delta():
+    """Gün içi değişen (mağaza, ürün, satış, envanter) satırlarını veri setine uygula
+
+    Kaynak veri seti değişmez: yamalanmış veri kendi dataset_id'siyle kaydedilir
+    ve disk önbelleğine yazılır; sonraki istekler bu kimliği kullanmalıdır.
+    """
+    try:
+        kayit, hata = _istek_veri_kaydi()
+        if hata:
+            return hata
+
+        satirlar = (request.get_json(silent=True) or {}).get('rows')
+        if not isinstance(satirlar, list) or not satirlar:
+            return jsonify({'error': 'rows (satır listesi) gerekli'}), 400
+
+        baslangic = time.perf_counter()
+        with kayit.kilit:
+            # Analiz başka bir worker'da yapılmışsa o da yamalanır
+            kayitli_analiz(kayit)
+            sistem = kayit.sistem.delta_kopyasi()
+        success, result = sistem.delta_uygula(pd.DataFrame(satirlar))
+        if not success:
+            return jsonify({'error': result}), 400
+
+        # Yalnızca farklar yazılır; yamalanmış analiz kaynağın analizinden yeniden kurulur
+        onbellek.delta_kaydet(sistem.veri_kimligi, sistem.delta_durumu())
+        yeni_kayit = kayit_defteri.ekle(sistem.veri_kimligi, sistem)
+        analiz = yeni_kayit.sistem.mevcut_analiz
+
+        result['sure_sn'] = round(time.perf_counter() - baslangic, 4)
+        return json_yaniti({
+            'success': True,
+            'dataset_id': yeni_kayit.kimlik,
+            'kaynak_dataset_id': kayit.kimlik,
+            'delta': result,
+            'results': sinirli_sonuc(analiz) if analiz else None
+        })
+
+    except Exception as e:
+        logger.error(f"Delta error: {str(e)}")
+        return jsonify({'error': f'Delta hatası: {str(e)}'}), 500
+
+@app.route('/scenarios', methods=['POST'])
+def run_scenarios():
+    """Transfer kuralı senaryolarını tek geçişte değerlendir
+
+    Gövde: {dataset_id, scenarios: [{name, min_str_diff, min_sender_inventory,
+    max_share, min_remaining, max_units}, ...], include_results}. Verilmeyen
+    parametreler varsayılan kurallardan alınır. Her senaryo için özet toplamlar
+    döner; include_results en fazla SENARYO_SONUC_MAX senaryoda tam transfer ve
+    red listelerini de ekler.
+    """
+    try:
+        kayit, hata = _istek_veri_kaydi()
+        if hata:
+            return hata
+
+        liste, hata = _senaryo_kurallari((request.get_json(silent=True) or {}).get('scenarios'))
+        if hata:
+            return hata
+        tam_sonuc = _istek_bayragi('include_results')
+        if tam_sonuc and len(liste) > SENARYO_SONUC_MAX:
+            return jsonify({'error': f'include_results en fazla {SENARYO_SONUC_MAX} senaryo için kullanılabilir'}), 400
+
+        baslangic = time.perf_counter()
+        with kayit.kilit:
+            ozetler = kayit.sistem.senaryo_analizi_yap([kurallar for _, kurallar in liste], tam_sonuc)
+        if ozetler is None:
+            return jsonify({'error': 'Senaryo analizi başarısız'}), 500
+
+        senaryolar = []
+        for (ad, kurallar), ozet in zip(liste, ozetler):
+            senaryolar.append({
+                'name': ad,
+                'parameters': {parametre: kurallar[kural] for parametre, kural in SENARYO_PARAMETRELERI.items()},
+                **ozet
+            })
+        return json_yaniti({
+            'success': True,
+            'dataset_id': kayit.kimlik,
+            'sure_sn': round(time.perf_counter() - baslangic, 4),
+            'scenarios': senaryolar
+        })
+
+    except Exception as e:
+        logger.error(f"Scenario error: {str(e)}")
+        return jsonify({'error': f'Senaryo hatası: {str(e)}'}), 500
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Bu worker'ın istek/aşama süre histogramları ve veri seti göstergeleri (Prometheus metni)"""
+    try:
+        return Response(olcumler.prometheus_metni(anlik_gostergeler()),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    except Exception as e:
+        logger.error(f"Metrics error: {str(e)}")
+        return jsonify({'error': f'Metrik hatası: {str(e)}'}), 500
+
+@app.route('/metrics/stores', methods=['GET'])
+def store_metrics():
+    """Tam analiz çalıştırmadan mağaza KPI'ları"""
+    try:
+        kayit, hata = _istek_veri_kaydi()
+        if hata:
+            return hata
+
+        with kayit.kilit:
+            metrikler = kayit.sistem.magaza_metrikleri_hesapla()
+        return json_yaniti({
+            'success': True,
+            'dataset_id': kayit.kimlik,
+            'magaza_sayisi': len(metrikler),
+            'magaza_metrikleri': metrikler
+        })
+
+    except Exception as e:
+        logger.error(f"Store metrics error: {str(e)}")
+        return jsonify({'error': f'Metrik hatası: {str(e)}'}), 500
+
+@app.route('/datasets', methods=['GET'])
+def list_datasets():
+    """Bu worker'daki yüklü veri setleri ve bellek kullanımları"""
+    try:
+        kayitlar = [kayit.durum() for kayit in kayit_defteri.kayitlar()]
+        return jsonify({
+            'success': True,
+            'veri_setleri': kayitlar,
+            'toplam_bellek_mb': round(sum(k['bellek_mb'] for k in kayitlar), 2),
+            'bellek_butcesi_mb': KAYIT_MAX_MB,
+            'ttl_sn': KAYIT_TTL_SN
+        })
+
+    except Exception as e:
+        logger.error(f"Dataset list error: {str(e)}")
+        return jsonify({'error': f'Veri seti listesi hatası: {str(e)}'}), 500
+
+@app.route('/export/excel', methods=['GET', 'POST'])
+def export_excel():
+    """Kayıtlı tam analizin Excel export'u; isteğe bağlı 'Transfer Gereksiz' sayfası (gereksiz=true)"""
+    try:
+        kayit, hata = _istek_veri_kaydi()
+        if hata:
+            return hata
+        
+        # İstemcinin gönderdiği (kısaltılmış) sonuçlara değil, sunucudaki analize güvenilir
+        analiz = kayitli_analiz(kayit)
+        if not analiz:
+            return jsonify({'error': 'Analiz sonucu bulunamadı'}), 400
+        
+        tablolar = [('Transfer Önerileri', analiz['transferler'])]
+        if _istek_bayragi('gereksiz'):
+            tablolar.append(('Transfer Gereksiz', analiz['transfer_gereksiz']))
+        
+        # Kitap bellekte değil geçici dosyada kurulur; gönderildikten sonra silinir
+        tanimlayici, yol = tempfile.mkstemp(suffix='.xlsx')
+        os.close(tanimlayici)
+        try:
+            with olcumler.asama('export_write_xlsx'):
+                xlsx_disa_aktar(tablolar, yol)
+        except Exception:
+            os.remove(yol)
+            raise
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f'transfer_analizi_{timestamp}.xlsx'
+        
+        return Response(
+            gecici_dosya_parcalari(yol),
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            headers={'Content-Disposition': f'attachment; filename={filename}',
+                     'Content-Length': str(os.path.getsize(yol))}
+        )
+        
+    except Exception as e:
+        logger.error(f"Export error: {str(e)}")
+        return jsonify({'error': f'Export hatası: {str(e)}'}), 500
+
+@app.route('/export/<bicim>', methods=['GET', 'POST'])
+def export_stream(bicim):
+    """Kayıtlı tam analizin CSV ya da NDJSON akışı; table=transfer_gereksiz ile red listesi"""
+    try:
+        if bicim not in ('csv', 'ndjson'):
+            return jsonify({'error': 'Desteklenmeyen format, excel, csv veya ndjson kullanın'}), 404
+
+        kayit, hata = _istek_veri_kaydi()
+        if hata:
+            return hata
+
+        analiz = kayitli_analiz(kayit)
+        if not analiz:
+            return jsonify({'error': 'Analiz sonucu bulunamadı'}), 400
+
+        govde = request.get_json(silent=True) or {}
+        tablo = govde.get('table') or request.args.get('table', 'transferler')
+        if tablo not in ('transferler', 'transfer_gereksiz'):
+            return jsonify({'error': 'table transferler veya transfer_gereksiz olmalı'}), 400
+        satirlar = analiz[tablo]
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if bicim == 'csv':
+            parcalar, mimetype = csv_parcalari(satirlar), 'text/csv; charset=utf-8'
+        else:
+            parcalar, mimetype = ndjson_parcalari(satirlar), 'application/x-ndjson'
+        return Response(
+            stream_with_context(olculen_akis(parcalar, f'export_write_{bicim}')),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={tablo}_{timestamp}.{bicim}'}
+        )
+
     except Exception as e:
         logger.error(f"Export error: {str(e)}")
         return jsonify({'error': f'Export hatası: {str(e)}'}), 500
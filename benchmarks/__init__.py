@@ -0,0 +1 @@
+"""RetailFlow performans ölçüm betikleri"""
@@ -0,0 +1,203 @@
+"""Çok mağazalı dağıtım motorunun ikili (en düşük -> en yüksek STR) motorla karşılaştırması
+
+Her (ürün anahtarı, mağaza) çifti için tek satırlık envanter üretilir; ikili
+motorun, kapasitesiz ve kapasiteli çok mağazalı motorun süresi ve önerdiği
+toplam adet raporlanır. Kapasitesiz dağıtım ilk anahtarlarda öncelik kuyruklu
+(heapq) sıralı referansla, kapasiteli sonuç sıralı açgözlü referansla doğrulanır;
+kapasiteye takılan anahtarların red listesine girdiği de denetlenir.
+Kullanım: python -m benchmarks.cok_magazali_karsilastirma [anahtar_sayisi] [magaza_sayisi] [kapasite]
+"""
+import sys
+import json
+import math
+import time
+import heapq
+import logging
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+
+def anahtar_magaza_envanteri(anahtar_sayisi=100000, magaza_sayisi=50, doluluk=0.8, tohum=42):
+    """anahtar_sayisi x magaza_sayisi ızgarasından doluluk oranında satır içeren envanter"""
+    rng = np.random.default_rng(tohum)
+    anahtar = np.repeat(np.arange(anahtar_sayisi), magaza_sayisi)
+    magaza = np.tile(np.arange(magaza_sayisi), anahtar_sayisi)
+    secili = rng.random(len(anahtar)) < doluluk
+    anahtar, magaza = anahtar[secili], magaza[secili]
+    satir_sayisi = len(anahtar)
+
+    magaza_adlari = np.array([f'Mağaza {i:03d}' for i in range(magaza_sayisi)], dtype=object)
+    urun_adlari = np.array([f'Ürün {i:06d}' for i in range(anahtar_sayisi)], dtype=object)
+    return pd.DataFrame({
+        'Depo Adı': magaza_adlari[magaza],
+        'Ürün Kodu': urun_adlari[anahtar],
+        'Ürün Adı': urun_adlari[anahtar],
+        'Satis': rng.poisson(rng.gamma(1.5, 3.0, satir_sayisi)).astype(float),
+        'Envanter': rng.poisson(rng.gamma(2.0, 4.0, satir_sayisi)).astype(float),
+        'Renk Açıklaması': 'Siyah',
+        'Beden': 'M'
+    })
+
+
+def sirali_dagitim_referansi(sistem, anahtar_sayisi):
+    """İlk anahtar_sayisi ürün anahtarında tüm uygun (gönderen, alan) çiftlerini öncelik
+    kuyruğundan tek tek alan açgözlü dağıtım: (anahtar, gönderen, alan, adet, eşleşme sırası)
+    """
+    from app import VARSAYILAN_KURALLAR as kurallar
+
+    beklenen = []
+    ozet = sistem._urun_magaza_ozeti()
+    for anahtar_kodu, grup in islice(ozet.groupby(level=0, sort=True), anahtar_sayisi):
+        magazalar = grup.index.get_level_values(1).tolist()
+        satis, envanter = grup['Satis'].tolist(), grup['Envanter'].tolist()
+        if len(magazalar) < 2:
+            continue
+        str_ = [sistem.str_hesapla(s, e) for s, e in zip(satis, envanter)]
+        # Anahtar içinde artan STR sırası (eşitlikte özet sırası); eşit farkları ayırır
+        sirali = sorted(range(len(str_)), key=str_.__getitem__)
+        sira = {i: no for no, i in enumerate(sirali)}
+        toplam_satis = sum(satis[i] for i in sirali)
+        toplam = toplam_satis + sum(envanter[i] for i in sirali)
+        hedef = toplam_satis / toplam if toplam else 0
+
+        stok, ihtiyac = {}, {}
+        for i, (s, e, oran) in enumerate(zip(satis, envanter, str_)):
+            if oran < hedef and e >= kurallar['min_gonderen_envanter']:
+                stok[i] = min(e, max(1, math.floor(min(e * kurallar['max_oran'], e - kurallar['min_kalan']))))
+            elif oran > hedef and math.ceil(s * (1 - hedef) / hedef - e) >= 1:
+                ihtiyac[i] = math.ceil(s * (1 - hedef) / hedef - e)
+
+        kuyruk = []
+        for g in stok:
+            for a in ihtiyac:
+                fark = str_[a] - str_[g]
+                if fark >= kurallar['min_str_farki'] and satis[a] > satis[g]:
+                    kuyruk.append((-fark, sira[g], -sira[a], g, a))
+        heapq.heapify(kuyruk)
+        eslesme = 0
+        while kuyruk:
+            _, _, _, g, a = heapq.heappop(kuyruk)
+            kural, _ = sistem.str_bazli_transfer_hesapla(satis[g], envanter[g], satis[a], envanter[a])
+            adet = min(kural, stok[g], ihtiyac[a])
+            if adet > 0:
+                stok[g] -= adet
+                ihtiyac[a] -= adet
+                eslesme += 1
+                beklenen.append((sistem.urun_anahtar_tablosu[anahtar_kodu], magazalar[g], magazalar[a], adet, eslesme))
+    return sorted(beklenen)
+
+
+def sirali_kapasite_referansi(sistem, sonuc, kapasite):
+    """Kapasitesiz sonuçtan sıralı açgözlü yöntemle beklenen kapasiteli eşleşmeler"""
+    gonderilen, alinan = {}, {}
+    beklenen = []
+    # Motorla aynı öncelik: ham STR farkı, eşitlikte anahtar kodu ve eşleşme sırası
+    anahtar_no = {anahtar: no for no, anahtar in enumerate(sistem.urun_anahtar_tablosu)}
+    adaylar = sorted(
+        sonuc['transferler'],
+        key=lambda t: (-(sistem.str_hesapla(t['alan_satis'], t['alan_envanter'])
+                         - sistem.str_hesapla(t['gonderen_satis'], t['gonderen_envanter'])),
+                       anahtar_no[t['urun_anahtari']], t['eslesme_sirasi'])
+    )
+    for t in adaylar:
+        g = gonderilen.get(t['gonderen_magaza'], 0)
+        a = alinan.get(t['alan_magaza'], 0)
+        miktar = max(0, min(t['transfer_miktari'], kapasite - g, kapasite - a))
+        if miktar:
+            gonderilen[t['gonderen_magaza']] = g + miktar
+            alinan[t['alan_magaza']] = a + miktar
+            beklenen.append((t['urun_anahtari'], t['gonderen_magaza'], t['alan_magaza'], miktar))
+    return sorted(beklenen)
+
+
+def karsilastir(anahtar_sayisi=100000, magaza_sayisi=50, kapasite=500, tohum=42):
+    from app import MagazaTransferSistemi
+
+    sistem = MagazaTransferSistemi()
+    basarili, sonuc = sistem.dosya_yukle_df(anahtar_magaza_envanteri(anahtar_sayisi, magaza_sayisi, tohum=tohum))
+    assert basarili, sonuc
+    sistem.magaza_metrikleri_hesapla()
+
+    olcumler = {}
+    baslangic = time.perf_counter()
+    ikili = sistem.global_transfer_analizi_yap(surec_sayisi=1)
+    olcumler['ikili_sn'] = round(time.perf_counter() - baslangic, 3)
+
+    baslangic = time.perf_counter()
+    cok = sistem.cok_magazali_transfer_analizi_yap()
+    olcumler['cok_magazali_sn'] = round(time.perf_counter() - baslangic, 3)
+
+    baslangic = time.perf_counter()
+    kapasiteli = sistem.cok_magazali_transfer_analizi_yap(kapasite, kapasite)
+    olcumler['kapasiteli_sn'] = round(time.perf_counter() - baslangic, 3)
+
+    # İlk eşleşme ikili motorun çifti; adedi alanın ihtiyacıyla sınırlanabilir
+    ilk = {t['urun_anahtari']: t for t in cok['transferler'] if t['eslesme_sirasi'] == 1}
+    for t in ikili['transferler']:
+        c = ilk[t['urun_anahtari']]
+        assert (c['gonderen_magaza'], c['alan_magaza']) == (t['gonderen_magaza'], t['alan_magaza']), \
+            "ilk eşleşme ikili motordan farklı"
+        assert c['transfer_miktari'] <= t['transfer_miktari'], "ilk eşleşme ikili motordan fazla"
+    transferli = {t['urun_anahtari'] for t in cok['transferler']}
+    assert cok['transfer_gereksiz'] == [g for g in ikili['transfer_gereksiz'] if g['urun_anahtari'] not in transferli], \
+        "red listesi farklı"
+
+    # min_str/max_str anahtarın en düşük/en yüksek STR'ı: ikili motorun çiftiyle aynı
+    ikili_str = {t['urun_anahtari']: (t['min_str'], t['max_str']) for t in ikili['transferler']}
+    for t in cok['transferler']:
+        if t['urun_anahtari'] in ikili_str:
+            assert (t['min_str'], t['max_str']) == ikili_str[t['urun_anahtari']], "min/max STR anahtarınki değil"
+        assert t['min_str'] <= t['gonderen_str'] <= t['alan_str'] <= t['max_str'], "min/max STR aralık dışı"
+
+    # Tüm eşleşmeleri kapasiteye takılan anahtar kaybolmaz, kapasite nedeniyle reddedilir
+    kapasiteli_transferli = {t['urun_anahtari'] for t in kapasiteli['transferler']}
+    kapasite_red = {g['urun_anahtari'] for g in kapasiteli['transfer_gereksiz']
+                    if g['red_nedeni'].startswith('Kapasite yetersiz')}
+    assert kapasite_red == transferli - kapasiteli_transferli, "kapasiteye takılan anahtarlar red listesinde değil"
+    assert [g for g in kapasiteli['transfer_gereksiz'] if g['urun_anahtari'] not in kapasite_red] == \
+        cok['transfer_gereksiz'], "kapasiteli red listesi farklı"
+
+    # Öncelik kuyruğuyla sıralı dağıtım (ilk anahtarlar; kapasitesiz anahtarlar bağımsızdır)
+    referans_anahtar = min(anahtar_sayisi, 2000)
+    referans = set(sistem.urun_anahtar_tablosu[:referans_anahtar])
+    gercek = sorted((t['urun_anahtari'], t['gonderen_magaza'], t['alan_magaza'], t['transfer_miktari'],
+                     t['eslesme_sirasi']) for t in cok['transferler'] if t['urun_anahtari'] in referans)
+    assert gercek == sirali_dagitim_referansi(sistem, referans_anahtar), "dağıtım sıralı referanstan farklı"
+
+    # Anahtar başına birden çok eşleşmede yer alan mağazalar
+    eslesme_sayisi = {}
+    for t in cok['transferler']:
+        for magaza in (t['gonderen_magaza'], t['alan_magaza']):
+            eslesme_sayisi[t['urun_anahtari'], magaza] = eslesme_sayisi.get((t['urun_anahtari'], magaza), 0) + 1
+
+    gercek = sorted((t['urun_anahtari'], t['gonderen_magaza'], t['alan_magaza'], t['transfer_miktari'])
+                    for t in kapasiteli['transferler'])
+    assert gercek == sirali_kapasite_referansi(sistem, cok, kapasite), "kapasiteli sonuç açgözlü referanstan farklı"
+
+    def adet(s):
+        return sum(t['transfer_miktari'] for t in s['transferler'])
+
+    return {
+        'anahtar_sayisi': anahtar_sayisi,
+        'magaza_sayisi': magaza_sayisi,
+        'satir_sayisi': len(sistem.data),
+        'kapasite': kapasite,
+        **olcumler,
+        'ikili_transfer': len(ikili['transferler']),
+        'ikili_adet': adet(ikili),
+        'cok_magazali_transfer': len(cok['transferler']),
+        'cok_magazali_adet': adet(cok),
+        'coklu_eslesen_magaza': sum(sayi > 1 for sayi in eslesme_sayisi.values()),
+        'kapasiteli_transfer': len(kapasiteli['transferler']),
+        'kapasiteli_adet': adet(kapasiteli),
+        'kapasite_red': len(kapasite_red)
+    }
+
+
+if __name__ == '__main__':
+    from app import logger
+    logger.setLevel(logging.WARNING)
+    arguman = [int(a) for a in sys.argv[1:]]
+    print(json.dumps(karsilastir(*arguman), ensure_ascii=False))
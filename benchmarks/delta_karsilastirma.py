@@ -0,0 +1,101 @@
+"""Gün içi delta (/delta) yamasının tam yeniden analizle eşdeğerliği ve süresi
+
+Analizi yapılmış sentetik veri setine art arda deltalar uygulanır; satırlar
+sabit bir havuzdan seçildiği için aynı çiftler zincirde tekrar değişir ve her
+turda yeni bir ürün de gelir. Her deltadan sonra yamalanmış analiz, delta
+uygulanmış verinin baştan global analiziyle aynı olmalıdır. Sonra boş kayıt
+defteriyle (başka bir worker) her veri seti disk önbelleğinden yeniden kurulur
+ve sonuçları aynı olmalıdır; farklıysa AssertionError.
+Kullanım: python -m benchmarks.delta_karsilastirma [satir_sayisi] [magaza_sayisi] [delta_sayisi]
+"""
+import io
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+
+import numpy as np
+
+from benchmarks.veri_uretici import sentetik_envanter
+
+METIN_SUTUNLARI = ('Depo Adı', 'Ürün Adı', 'Renk Açıklaması', 'Beden', 'Ürün Kodu')
+
+
+def _basarili(yanit):
+    assert yanit.status_code == 200, f"{yanit.status_code}: {yanit.get_data(as_text=True)[:200]}"
+    return yanit.get_json()
+
+
+def _esdeger(analiz, tam):
+    for alan in ('transferler', 'transfer_gereksiz', 'magaza_metrikleri'):
+        assert analiz[alan] == tam[alan], f"yamalanmış {alan} tam analizden farklı"
+
+
+def karsilastir(app, satir_sayisi=200000, magaza_sayisi=30, delta_sayisi=8, tohum=42):
+    istemci = app.app.test_client()
+    df = sentetik_envanter(satir_sayisi, magaza_sayisi, tohum=tohum)
+    icerik = io.BytesIO(df.to_csv(index=False).encode('utf-8'))
+    yukleme = _basarili(istemci.post('/upload', data={'file': (icerik, 'envanter.csv')},
+                                     content_type='multipart/form-data'))
+    kimlik = yukleme['dataset_id']
+    _basarili(istemci.post('/analyze', json={'dataset_id': kimlik}))
+
+    rng = np.random.default_rng(tohum)
+    havuz = rng.choice(len(df), 300, replace=False)
+    kayitlar = df[list(METIN_SUTUNLARI)].astype(object).where(df[list(METIN_SUTUNLARI)].notna(), None)
+
+    def delta_satirlari(tur, adet=60):
+        satirlar = [{**kayitlar.iloc[i].to_dict(), 'Satis': int(rng.integers(0, 30)),
+                     'Envanter': int(rng.integers(0, 30))} for i in rng.choice(havuz, adet, replace=False)]
+        satirlar.append({'Depo Adı': df['Depo Adı'].iloc[0], 'Ürün Adı': f'Yeni Ürün {tur % 3}',
+                         'Renk Açıklaması': 'Mavi', 'Beden': 'M', 'Ürün Kodu': f'YN{tur % 3}',
+                         'Satis': int(rng.integers(0, 30)), 'Envanter': int(rng.integers(0, 30))})
+        return satirlar
+
+    zincir = [kimlik]
+    sureler = []
+    for tur in range(delta_sayisi):
+        baslangic = time.perf_counter()
+        yanit = _basarili(istemci.post('/delta', json={'dataset_id': kimlik, 'rows': delta_satirlari(tur)}))
+        sureler.append(time.perf_counter() - baslangic)
+        kimlik = yanit['dataset_id']
+        zincir.append(kimlik)
+
+        sistem = app.kayit_defteri.al(kimlik).sistem
+        yamali = sistem.mevcut_analiz
+        _esdeger(yamali, sistem.global_transfer_analizi_yap())
+        sistem.mevcut_analiz = yamali
+
+    # Başka bir worker: veri setleri taban veri ve delta yamalarından kurulur
+    beklenen = {k: istemci.get(f'/results?dataset_id={k}&limit=100000').get_json() for k in zincir}
+    app.kayit_defteri = app.VeriKayitDefteri(app.KAYIT_MAX_MB * 1024 * 1024, app.KAYIT_TTL_SN)
+    for k in reversed(zincir):
+        sonuc = istemci.get(f'/results?dataset_id={k}&limit=100000').get_json()
+        assert (sonuc['toplam'], sonuc['transferler']) == (beklenen[k]['toplam'], beklenen[k]['transferler']), \
+            "yeniden kurulan veri seti sonuçları farklı"
+    sistem = app.veri_kaydi_getir(kimlik).sistem
+    _esdeger(sistem.mevcut_analiz, sistem.global_transfer_analizi_yap())
+
+    delta_klasoru = os.path.join(app.onbellek.klasor, 'delta')
+    kayit_boyutlari = [os.path.getsize(os.path.join(delta_klasoru, ad)) for ad in os.listdir(delta_klasoru)]
+    return {
+        'satir_sayisi': satir_sayisi,
+        'magaza_sayisi': magaza_sayisi,
+        'delta_sayisi': delta_sayisi,
+        'ilk_delta_sn': round(sureler[0], 3),
+        'delta_sn_medyan': round(float(np.median(sureler[1:])), 3) if len(sureler) > 1 else None,
+        'delta_kaydi_max_kb': round(max(kayit_boyutlari) / 1024, 1),
+        'transfer_sayisi': beklenen[kimlik]['toplam']
+    }
+
+
+if __name__ == '__main__':
+    arguman = [int(a) for a in sys.argv[1:]]
+    with tempfile.TemporaryDirectory() as klasor:
+        # app içe aktarılmadan önce: çalıştırma boş bir önbellekle başlar
+        os.environ['RETAILFLOW_CACHE_DIR'] = klasor
+        import app
+        app.logger.setLevel(logging.WARNING)
+        print(json.dumps(karsilastir(app, *arguman), ensure_ascii=False))
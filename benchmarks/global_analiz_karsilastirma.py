@@ -0,0 +1,241 @@
+"""Vektörel global analiz motorunun eski ürün bazlı döngüyle eşdeğerlik ve hız karşılaştırması
+
+Eski döngü, eski yükleyicinin (pd.read_csv + dosya_yukle_df temizliği, kompakt
+olmayan) çerçevesi üzerinde; yeni motor uygulamanın CSV yükleme yolu üzerinde çalışır.
+Kullanım: python -m benchmarks.global_analiz_karsilastirma [satir_sayisi] [magaza_sayisi]
+"""
+import io
+import sys
+import time
+import logging
+
+import pandas as pd
+
+from app import MagazaTransferSistemi, csv_dosyasi_yukle, logger
+from benchmarks.veri_uretici import sentetik_envanter
+
+
+def eski_yukleyici(akis):
+    """Eski /upload: pd.read_csv ve dosya_yukle_df temizliği, tipler olduğu gibi"""
+    df = pd.read_csv(akis, encoding='utf-8')
+    df.columns = df.columns.str.strip()
+    df = df.dropna(subset=['Depo Adı'])
+    df['Satis'] = pd.to_numeric(df['Satis'], errors='coerce').fillna(0)
+    df['Envanter'] = pd.to_numeric(df['Envanter'], errors='coerce').fillna(0)
+    df['Satis'] = df['Satis'].clip(lower=0)
+    df['Envanter'] = df['Envanter'].clip(lower=0)
+    return df
+
+
+def klasik_global_transfer_analizi(sistem, veri):
+    """Referans: ürün anahtarı başına maske + groupby + iterrows yapan eski uygulama
+
+    veri eski yükleyicinin çerçevesidir; sistem yalnızca kural yöntemleri için kullanılır.
+    """
+    if veri is None:
+        return None
+
+    logger.info("Global ürün bazlı STR transfer analizi başlatılıyor...")
+    
+    metrikler = sistem.magaza_metrikleri_hesapla()
+    transferler = []
+    transfer_gereksiz = []
+
+    # TÜM mağazaların ürünlerini grupla (ürün adı + renk + beden)
+    tum_data = veri.copy()
+    tum_data['urun_anahtari'] = tum_data.apply(
+        lambda x: sistem.urun_anahtari_olustur(
+            x['Ürün Adı'], 
+            x.get('Renk Açıklaması', ''), 
+            x.get('Beden', '')
+        ), axis=1
+    )
+    
+    # Tüm benzersiz ürün anahtarlarını al
+    tum_urun_anahtarlari = tum_data['urun_anahtari'].unique()
+    
+    logger.info(f"Toplam {len(tum_urun_anahtarlari)} benzersiz ürün grubu analiz ediliyor...")
+
+    # Her ürün anahtarı için global optimizasyon
+    for index, urun_anahtari in enumerate(tum_urun_anahtarlari):
+        if (index + 1) % 100 == 0:
+            logger.info(f"İşlenen: {index + 1}/{len(tum_urun_anahtarlari)}")
+
+        # Bu ürünün tüm mağazalardaki durumunu analiz et
+        urun_data = tum_data[tum_data['urun_anahtari'] == urun_anahtari]
+        
+        # Mağaza bazında grupla
+        magaza_gruplari = urun_data.groupby('Depo Adı').agg({
+            'Satis': 'sum',
+            'Envanter': 'sum',
+            'Ürün Adı': 'first',
+            'Renk Açıklaması': 'first',
+            'Beden': 'first',
+            'Ürün Kodu': 'first'
+        }).reset_index()
+
+        # En az 2 mağazada olmalı transfer için
+        if len(magaza_gruplari) < 2:
+            continue
+
+        # Her mağaza için STR hesapla
+        magaza_str_listesi = []
+        for _, magaza_grup in magaza_gruplari.iterrows():
+            magaza = magaza_grup['Depo Adı']
+            satis = magaza_grup['Satis']
+            envanter = magaza_grup['Envanter']
+            str_value = sistem.str_hesapla(satis, envanter)
+            
+            magaza_str_listesi.append({
+                'magaza': magaza,
+                'satis': satis,
+                'envanter': envanter,
+                'str': str_value,
+                'urun_adi': magaza_grup['Ürün Adı'],
+                'renk': magaza_grup.get('Renk Açıklaması', ''),
+                'beden': magaza_grup.get('Beden', ''),
+                'urun_kodu': magaza_grup['Ürün Kodu']
+            })
+
+        # STR'a göre sırala (düşükten yükseğe)
+        magaza_str_listesi.sort(key=lambda x: x['str'])
+        
+        # En düşük ve en yüksek STR'ı al
+        en_dusuk_str = magaza_str_listesi[0]
+        en_yuksek_str = magaza_str_listesi[-1]
+
+        # Transfer koşullarını kontrol et
+        kosul_sonuc, kosul_mesaj = sistem.transfer_kosulları_kontrol(
+            en_dusuk_str['satis'], en_dusuk_str['envanter'], 
+            en_yuksek_str['satis'], en_yuksek_str['envanter']
+        )
+        
+        if kosul_sonuc:
+            # STR bazlı transfer miktarını hesapla
+            transfer_miktari, str_detaylar = sistem.str_bazli_transfer_hesapla(
+                en_dusuk_str['satis'], en_dusuk_str['envanter'],
+                en_yuksek_str['satis'], en_yuksek_str['envanter']
+            )
+            
+            if transfer_miktari > 0:
+                # Stok durumu STR bazında
+                alan_str_val = str_detaylar['alan_str']
+                if alan_str_val >= 80:
+                    stok_durumu = 'YÜKSEK'
+                elif alan_str_val >= 50:
+                    stok_durumu = 'NORMAL'
+                elif alan_str_val >= 20:
+                    stok_durumu = 'DÜŞÜK'
+                else:
+                    stok_durumu = 'KRİTİK'
+                
+                transferler.append({
+                    'urun_anahtari': urun_anahtari,
+                    'urun_kodu': en_dusuk_str['urun_kodu'],
+                    'urun_adi': en_dusuk_str['urun_adi'],
+                    'renk': en_dusuk_str['renk'],
+                    'beden': en_dusuk_str['beden'],
+                    'gonderen_magaza': en_dusuk_str['magaza'],
+                    'alan_magaza': en_yuksek_str['magaza'],
+                    'transfer_miktari': int(transfer_miktari),
+                    'gonderen_satis': int(en_dusuk_str['satis']),
+                    'gonderen_envanter': int(en_dusuk_str['envanter']),
+                    'alan_satis': int(en_yuksek_str['satis']),
+                    'alan_envanter': int(en_yuksek_str['envanter']),
+                    'gonderen_str': str_detaylar['gonderen_str'],
+                    'alan_str': str_detaylar['alan_str'],
+                    'str_farki': str_detaylar['str_farki'],
+                    'teorik_transfer': str_detaylar['teorik_transfer'],
+                    'uygulanan_filtre': str_detaylar['uygulanan_filtre'],
+                    'alan_stok_durumu': stok_durumu,
+                    'magaza_sayisi': len(magaza_str_listesi),
+                    'min_str': round(en_dusuk_str['str'] * 100, 1),
+                    'max_str': round(en_yuksek_str['str'] * 100, 1),
+                    'satis_farki': int(en_yuksek_str['satis'] - en_dusuk_str['satis']),
+                    'envanter_farki': int(en_dusuk_str['envanter'] - en_yuksek_str['envanter'])
+                })
+        else:
+            # Transfer gerekmeyen ürünleri kaydet
+            str_ortalama = sum(m['str'] for m in magaza_str_listesi) / len(magaza_str_listesi)
+            str_fark = max(m['str'] for m in magaza_str_listesi) - min(m['str'] for m in magaza_str_listesi)
+            
+            transfer_gereksiz.append({
+                'urun_anahtari': urun_anahtari,
+                'urun_adi': magaza_str_listesi[0]['urun_adi'],
+                'renk': magaza_str_listesi[0]['renk'],
+                'beden': magaza_str_listesi[0]['beden'],
+                'magaza_sayisi': len(magaza_str_listesi),
+                'ortalama_str': round(str_ortalama * 100, 1),
+                'str_fark': round(str_fark * 100, 1),
+                'red_nedeni': kosul_mesaj
+            })
+
+    # STR farkına göre sırala (yüksek fark = daha öncelikli)
+    transferler.sort(key=lambda x: x['str_farki'], reverse=True)
+
+    logger.info(f"Global analiz tamamlandı: {len(transferler)} transfer, {len(transfer_gereksiz)} red")
+
+    return {
+        'analiz_tipi': 'global',
+        'magaza_metrikleri': metrikler,
+        'transferler': transferler,
+        'transfer_gereksiz': transfer_gereksiz
+    }
+
+
+def karsilastir(satir_sayisi=20000, magaza_sayisi=20, tohum=42, tam_sayi=False):
+    """İki motoru aynı CSV üzerinde çalıştır; çıktılar farklıysa AssertionError
+
+    Sentetik satış/envanterde boş hücre olduğundan sütunlar ondalık okunur
+    ('2.0' mesajları); tam_sayi=True boşları 0 yapar, sütunlar tam sayı okunur.
+    """
+    veri = sentetik_envanter(satir_sayisi, magaza_sayisi, tohum=tohum)
+    if tam_sayi:
+        veri[['Satis', 'Envanter']] = veri[['Satis', 'Envanter']].fillna(0).astype(int)
+    icerik = veri.to_csv(index=False).encode('utf-8')
+
+    sistem = MagazaTransferSistemi()
+    basarili, sonuc = csv_dosyasi_yukle(io.BytesIO(icerik), sistem)
+    assert basarili, sonuc
+    eski_veri = eski_yukleyici(io.BytesIO(icerik))
+
+    baslangic = time.perf_counter()
+    yeni = sistem.global_transfer_analizi_yap()
+    yeni_sure = time.perf_counter() - baslangic
+
+    baslangic = time.perf_counter()
+    eski = klasik_global_transfer_analizi(sistem, eski_veri)
+    eski_sure = time.perf_counter() - baslangic
+
+    # Sütun bazlı anahtar üretici satır bazlı urun_anahtari_olustur ile aynı metni vermeli
+    satir_bazli = eski_veri.apply(
+        lambda x: sistem.urun_anahtari_olustur(
+            x['Ürün Adı'], x.get('Renk Açıklaması', ''), x.get('Beden', '')
+        ), axis=1
+    )
+    sutun_bazli = sistem.urun_anahtar_tablosu[sistem.urun_anahtar_kodlari]
+    assert (satir_bazli.to_numpy() == sutun_bazli).all(), "urun_anahtari farklı"
+
+    for alan in ('transferler', 'transfer_gereksiz'):
+        assert len(yeni[alan]) == len(eski[alan]), f"{alan}: {len(yeni[alan])} != {len(eski[alan])}"
+        for sira, (y, e) in enumerate(zip(yeni[alan], eski[alan])):
+            assert y == e, f"{alan}[{sira}] farklı:\n  yeni={y}\n  eski={e}"
+
+    return {
+        'satir_sayisi': satir_sayisi,
+        'magaza_sayisi': magaza_sayisi,
+        'tam_sayi': tam_sayi,
+        'transfer_sayisi': len(yeni['transferler']),
+        'gereksiz_sayisi': len(yeni['transfer_gereksiz']),
+        'vektorel_sn': round(yeni_sure, 3),
+        'klasik_sn': round(eski_sure, 3),
+        'hizlanma': round(eski_sure / yeni_sure, 1) if yeni_sure else None
+    }
+
+
+if __name__ == '__main__':
+    logger.setLevel(logging.WARNING)
+    satir = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    magaza = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    for tam_sayi in (False, True):
+        print(karsilastir(satir, magaza, tam_sayi=tam_sayi))
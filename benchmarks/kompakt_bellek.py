@@ -0,0 +1,94 @@
+"""Kompakt veri gösteriminin bellek karşılaştırması (eski object/float64 yerleşimine göre)
+
+Her mod ayrı bir süreçte çalışır: dışa aktarımlardaki gibi fazladan sütunlar
+içeren sentetik envanter dosya_yukle_df ile yüklenir, ham çerçeve bırakılır ve
+veri setinin bellek raporu (sütun başına bayt), içe aktarım sonrasına göre
+kalıcı RSS artışı ve analiz süresi ölçülür. İki modun analiz çıktısı aynı olmalıdır.
+Kullanım: python -m benchmarks.kompakt_bellek [satir_sayisi] [magaza_sayisi]
+"""
+import gc
+import sys
+import json
+import time
+import ctypes
+import hashlib
+import logging
+import multiprocessing
+
+
+def _bellegi_geri_ver():
+    """Serbest bırakılan yığın belleğini işletim sistemine iade et (glibc); RSS ölçümü için"""
+    gc.collect()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def mod_olc(kompakt, satir_sayisi, magaza_sayisi, tohum):
+    """Tek mod için bellek raporu, RSS artışı ve analiz süresi (ayrı süreçte çağrılır)"""
+    import app
+    from benchmarks.veri_uretici import sentetik_envanter
+    app.logger.setLevel(logging.WARNING)
+    app.KOMPAKT_VERI = kompakt
+    # Eski yerleşimde metin nesneleri ham çerçeveyle paylaşılır; taban çerçeveden önce alınır
+    _bellegi_geri_ver()
+    rss_oncesi = app._rss_bayt()
+
+    df = sentetik_envanter(satir_sayisi, magaza_sayisi, tohum=tohum)
+    # Analizin okumadığı, gerçek dışa aktarımlarda bulunan sütunlar
+    df['Kategori'] = df['Ürün Adı'].str.split(' ').str[0]
+    df['Sezon'] = 'SS24'
+    df['Fiyat'] = 199.9
+
+    sistem = app.MagazaTransferSistemi()
+    baslangic = time.perf_counter()
+    basarili, sonuc = sistem.dosya_yukle_df(df)
+    yukleme_sure = time.perf_counter() - baslangic
+    assert basarili, sonuc
+    del df, sonuc
+    _bellegi_geri_ver()
+    rss_farki = app._rss_bayt() - rss_oncesi
+
+    baslangic = time.perf_counter()
+    analiz = sistem.global_transfer_analizi_yap()
+    analiz_sure = time.perf_counter() - baslangic
+
+    ozet = sistem.bellek_ozeti()
+    return {
+        'kompakt': kompakt,
+        'veri_bayt': ozet['toplam_bayt'],
+        'bayt_per_satir': ozet['bayt_per_satir'],
+        'rss_artisi_bayt': rss_farki,
+        'yukleme_sn': round(yukleme_sure, 3),
+        'analiz_sn': round(analiz_sure, 3),
+        'sutun_bayt': ozet['sutun_bayt'],
+        'analiz_ozeti': hashlib.sha256(json.dumps(
+            [analiz['transferler'], analiz['transfer_gereksiz']], ensure_ascii=False, default=str
+        ).encode('utf-8')).hexdigest()
+    }
+
+
+def karsilastir(satir_sayisi=2000000, magaza_sayisi=40, tohum=42):
+    """Eski ve kompakt modu ayrı süreçlerde ölç; analiz çıktıları farklıysa AssertionError"""
+    baglam = multiprocessing.get_context('spawn')
+    olcumler = []
+    for kompakt in (False, True):
+        with baglam.Pool(1) as havuz:
+            olcumler.append(havuz.apply(mod_olc, (kompakt, satir_sayisi, magaza_sayisi, tohum)))
+    eski, kompakt = olcumler
+    assert eski['analiz_ozeti'] == kompakt['analiz_ozeti'], "kompakt veride analiz çıktısı farklı"
+
+    return {
+        'satir_sayisi': satir_sayisi,
+        'magaza_sayisi': magaza_sayisi,
+        'eski': {k: v for k, v in eski.items() if k != 'analiz_ozeti'},
+        'kompakt': {k: v for k, v in kompakt.items() if k != 'analiz_ozeti'},
+        'veri_kuculme': round(eski['veri_bayt'] / kompakt['veri_bayt'], 1),
+        'rss_kuculme': round(eski['rss_artisi_bayt'] / max(kompakt['rss_artisi_bayt'], 1), 1)
+    }
+
+
+if __name__ == '__main__':
+    arguman = [int(a) for a in sys.argv[1:]]
+    print(json.dumps(karsilastir(*arguman), ensure_ascii=False, indent=2))
@@ -0,0 +1,71 @@
+"""Paralel (süreç havuzlu) global analizin süreç sayısına göre ölçeklenmesi
+
+Veri seti geçici bir önbellek klasörüne yazılır ve eşlenir; her süreç sayısı
+için önce ısınma turu (havuz açılışı ve worker'ların veri setine bağlanması),
+sonra ölçüm turu çalışır. Her sonuç seri çalışmayla birebir karşılaştırılır.
+Kullanım: python -m benchmarks.paralel_olcekleme [satir_sayisi] [surec_sayisi ...]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+
+
+def olcekleme(satir_sayisi=2000000, surec_sayilari=(1, 2, 4, 8), magaza_sayisi=40, tohum=42):
+    """Her süreç sayısı için süre ve seriye göre hızlanma; çıktılar farklıysa AssertionError"""
+    import app
+    from benchmarks.veri_uretici import sentetik_envanter
+
+    sistem = app.MagazaTransferSistemi()
+    basarili, sonuc = sistem.dosya_yukle_df(sentetik_envanter(satir_sayisi, magaza_sayisi, tohum=tohum))
+    assert basarili, sonuc
+
+    # Worker'lar veri setine ortak sütun dosyalarından bağlanır
+    kimlik = f'paralel-olcekleme-{satir_sayisi}-{magaza_sayisi}-{tohum}'
+    app.onbellek.veri_kaydet(kimlik, sistem.data, sistem.kodlar())
+    df, kodlar = app.onbellek.veri_yukle(kimlik)
+    sistem._veri_ayarla(df, kodlar)
+    sistem.veri_kimligi = kimlik
+
+    baslangic = time.perf_counter()
+    seri = sistem.global_transfer_analizi_yap(surec_sayisi=1)
+    seri_sure = time.perf_counter() - baslangic
+
+    olcumler = []
+    for surec_sayisi in surec_sayilari:
+        if surec_sayisi > 1:
+            sistem.global_transfer_analizi_yap(surec_sayisi=surec_sayisi)
+        baslangic = time.perf_counter()
+        paralel = sistem.global_transfer_analizi_yap(surec_sayisi=surec_sayisi)
+        sure = time.perf_counter() - baslangic
+
+        for alan in ('transferler', 'transfer_gereksiz'):
+            assert paralel[alan] == seri[alan], f"{alan} seri çalışmadan farklı ({surec_sayisi} süreç)"
+        olcumler.append({
+            'surec_sayisi': surec_sayisi,
+            'sure_sn': round(sure, 3),
+            'hizlanma': round(seri_sure / sure, 2)
+        })
+
+    return {
+        'satir_sayisi': satir_sayisi,
+        'magaza_sayisi': magaza_sayisi,
+        'cekirdek_sayisi': os.cpu_count(),
+        'transfer_sayisi': len(seri['transferler']),
+        'seri_sn': round(seri_sure, 3),
+        'olcumler': olcumler
+    }
+
+
+if __name__ == '__main__':
+    arguman = [int(a) for a in sys.argv[1:]]
+    satir_sayisi = arguman[0] if arguman else 2000000
+    surec_sayilari = arguman[1:] or [1, 2, 4, 8]
+    with tempfile.TemporaryDirectory() as klasor:
+        # app içe aktarılmadan önce: önbellek geçici klasörde açılır
+        os.environ['RETAILFLOW_CACHE_DIR'] = klasor
+        import app
+        app.logger.setLevel(logging.WARNING)
+        print(json.dumps(olcekleme(satir_sayisi, surec_sayilari), ensure_ascii=False))
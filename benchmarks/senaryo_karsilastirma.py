@@ -0,0 +1,74 @@
+"""Toplu senaryo değerlendirmesinin senaryo başına tam analizle karşılaştırması
+
+Kural ızgarasındaki (varsayılan 100) her senaryo için senaryo_analizi_yap'ın tek
+geçişte verdiği özet, aynı kurallarla tam karar listesini üreten çalışmanın
+toplamlarıyla karşılaştırılır; toplamlar farklıysa AssertionError. Varsayılan
+kurallı senaryonun tam sonucu global_transfer_analizi_yap ile aynı olmalıdır.
+Kullanım: python -m benchmarks.senaryo_karsilastirma [satir_sayisi] [magaza_sayisi]
+"""
+import sys
+import json
+import time
+import logging
+import itertools
+
+
+def kural_izgarasi(varsayilan):
+    """5 STR farkı x 4 envanter eşiği x 5 adet sınırı = 100 senaryo"""
+    return [
+        {**varsayilan, 'min_str_farki': fark, 'min_gonderen_envanter': envanter, 'max_adet': adet}
+        for fark, envanter, adet in itertools.product(
+            (0.05, 0.10, 0.15, 0.20, 0.30), (1, 2, 3, 5), (1, 3, 5, 8, 12))
+    ]
+
+
+def karsilastir(satir_sayisi=200000, magaza_sayisi=40, tohum=42):
+    import app
+    from benchmarks.veri_uretici import sentetik_envanter
+
+    sistem = app.MagazaTransferSistemi()
+    basarili, sonuc = sistem.dosya_yukle_df(sentetik_envanter(satir_sayisi, magaza_sayisi, tohum=tohum))
+    assert basarili, sonuc
+    senaryolar = kural_izgarasi(app.VARSAYILAN_KURALLAR)
+
+    baslangic = time.perf_counter()
+    ozetler = sistem.senaryo_analizi_yap(senaryolar)
+    toplu_sure = time.perf_counter() - baslangic
+
+    # Her senaryo için ayrı tam çalışma: özet bir kez, kararlar senaryo başına
+    baslangic = time.perf_counter()
+    tam = []
+    for kurallar in senaryolar:
+        ozet = sistem._urun_magaza_ozeti()
+        transferler, transfer_gereksiz = sistem._transfer_kararlari(ozet, sistem.urun_anahtar_tablosu,
+                                                                    kurallar=kurallar)
+        tam.append((transferler, transfer_gereksiz))
+    tam_sure = time.perf_counter() - baslangic
+
+    for no, (senaryo_ozeti, (transferler, transfer_gereksiz)) in enumerate(zip(ozetler, tam)):
+        beklenen = (len(transferler), sum(t['transfer_miktari'] for t in transferler), len(transfer_gereksiz))
+        gercek = (senaryo_ozeti['transfer_sayisi'], senaryo_ozeti['toplam_adet'], senaryo_ozeti['red_sayisi'])
+        assert gercek == beklenen, f"{no}. senaryo toplamları farklı: {gercek} != {beklenen}"
+
+    varsayilan = senaryolar.index(app.VARSAYILAN_KURALLAR)
+    global_sonuc = sistem.global_transfer_analizi_yap()
+    transferler = sorted(tam[varsayilan][0], key=lambda x: x['str_farki'], reverse=True)
+    assert transferler == global_sonuc['transferler'], "varsayılan kurallar global analizden farklı"
+
+    return {
+        'satir_sayisi': satir_sayisi,
+        'magaza_sayisi': magaza_sayisi,
+        'senaryo_sayisi': len(senaryolar),
+        'toplu_sn': round(toplu_sure, 3),
+        'tam_sn': round(tam_sure, 3),
+        'hizlanma': round(tam_sure / toplu_sure, 1),
+        'transfer_araligi': [min(o['transfer_sayisi'] for o in ozetler), max(o['transfer_sayisi'] for o in ozetler)],
+        'adet_araligi': [min(o['toplam_adet'] for o in ozetler), max(o['toplam_adet'] for o in ozetler)]
+    }
+
+
+if __name__ == '__main__':
+    from app import logger
+    logger.setLevel(logging.WARNING)
+    arguman = [int(a) for a in sys.argv[1:]]
+    print(json.dumps(karsilastir(*arguman), ensure_ascii=False))
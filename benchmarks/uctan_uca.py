@@ -0,0 +1,180 @@
+"""Uçtan uca performans ölçümü: Flask test istemcisiyle yükleme, analiz, sayfalama ve dışa aktarım
+
+Her ölçek için tohumlu sentetik envanter (şablon sütun düzeninde) CSV ve XLSX
+olarak üretilir ve uygulamanın kendi uç noktalarından geçirilir. Her aşama için
+süre, tepe RSS ve saniyedeki satır sayısı JSON rapora yazılır; taban rapor
+verilirse süre ya da tepe bellek eşiği aşan aşamalar gerileme sayılır ve
+çıkış kodu 1 olur.
+
+Kullanım:
+  python -m benchmarks.uctan_uca --olcek 20000 200000 --rapor rapor.json
+  python -m benchmarks.uctan_uca --taban benchmarks/taban.json --esik 0.3
+  python -m benchmarks.uctan_uca --taban-yaz benchmarks/taban.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+
+from benchmarks.veri_uretici import sentetik_envanter
+
+# Bu kadarlık mutlak farklar ölçüm gürültüsü sayılır, oran eşiğine bakılmaz
+MUTLAK_TOLERANS = {'sure_sn': 0.05, 'tepe_bellek_mb': 10.0}
+
+
+def _olc(app, asama, satir_sayisi, islem):
+    """islem()'i çalıştır; (aşama ölçümü, islem sonucu)"""
+    app._tepe_rss_sifirla()
+    baslangic = time.perf_counter()
+    sonuc = islem()
+    sure = time.perf_counter() - baslangic
+    return {
+        'asama': asama,
+        'satir_sayisi': satir_sayisi,
+        'sure_sn': round(sure, 4),
+        'tepe_bellek_mb': round(app._tepe_rss_bayt() / (1024 * 1024), 1),
+        'satir_per_saniye': int(satir_sayisi / sure) if sure > 0 else None
+    }, sonuc
+
+
+def _basarili(yanit):
+    assert yanit.status_code == 200, f"{yanit.status_code}: {yanit.get_data(as_text=True)[:200]}"
+    return yanit
+
+
+def olcek_calistir(app, satir_sayisi, magaza_sayisi=40, tohum=42):
+    """Tek ölçek için tüm aşamaların ölçümleri"""
+    istemci = app.app.test_client()
+    df = sentetik_envanter(satir_sayisi, magaza_sayisi, tohum=tohum)
+    csv_bayt = df.to_csv(index=False).encode('utf-8')
+    xlsx = io.BytesIO()
+    df.to_excel(xlsx, index=False, sheet_name='Veri')
+    xlsx_bayt = xlsx.getvalue()
+    del df, xlsx
+
+    def yukle(icerik, dosya_adi):
+        return lambda: _basarili(istemci.post(
+            '/upload', data={'file': (io.BytesIO(icerik), dosya_adi)}, content_type='multipart/form-data'
+        )).get_json()
+
+    asamalar = []
+    olcum, yanit = _olc(app, 'upload_csv', satir_sayisi, yukle(csv_bayt, 'envanter.csv'))
+    asamalar.append(olcum)
+    kimlik = yanit['dataset_id']
+
+    # Aynı içerik önbellekten gelmesin: XLSX farklı bayt dizisidir, ayrı veri seti olur
+    olcum, _ = _olc(app, 'upload_xlsx', satir_sayisi, yukle(xlsx_bayt, 'envanter.xlsx'))
+    asamalar.append(olcum)
+
+    olcum, yanit = _olc(app, 'analyze', satir_sayisi, lambda: _basarili(
+        istemci.post('/analyze', json={'dataset_id': kimlik})).get_json())
+    asamalar.append(olcum)
+    transfer_sayisi = yanit['results']['toplam_transfer_sayisi']
+
+    # İlk sayfa analiz başına bir kez kurulan sıralama indekslerini de içerir
+    for asama, offset in (('results_first_page', 1000), ('results_page', 2000)):
+        olcum, _ = _olc(app, asama, 100, lambda: _basarili(istemci.get(
+            f'/results?dataset_id={kimlik}&sort=transfer_miktari&offset={offset}&limit=100')).get_json())
+        asamalar.append(olcum)
+
+    olcum, _ = _olc(app, 'export_excel', transfer_sayisi, lambda: _basarili(
+        istemci.post('/export/excel', json={'dataset_id': kimlik, 'gereksiz': True})).get_data())
+    asamalar.append(olcum)
+
+    olcum, _ = _olc(app, 'export_csv', transfer_sayisi, lambda: _basarili(
+        istemci.get(f'/export/csv?dataset_id={kimlik}')).get_data())
+    asamalar.append(olcum)
+
+    return {
+        'satir_sayisi': satir_sayisi,
+        'magaza_sayisi': magaza_sayisi,
+        'tohum': tohum,
+        'transfer_sayisi': transfer_sayisi,
+        'asamalar': asamalar
+    }
+
+
+def karsilastir(rapor, taban, esik):
+    """Taban rapora göre süre/tepe bellek artışı esik oranını aşan aşamaların listesi"""
+    taban_olcumleri = {
+        (olcek['satir_sayisi'], asama['asama']): asama
+        for olcek in taban['olcekler'] for asama in olcek['asamalar']
+    }
+    gerilemeler = []
+    for olcek in rapor['olcekler']:
+        for asama in olcek['asamalar']:
+            onceki = taban_olcumleri.get((olcek['satir_sayisi'], asama['asama']))
+            if onceki is None:
+                continue
+            for alan in ('sure_sn', 'tepe_bellek_mb'):
+                fark = asama[alan] - onceki[alan]
+                if onceki[alan] and asama[alan] > onceki[alan] * (1 + esik) and fark > MUTLAK_TOLERANS[alan]:
+                    gerilemeler.append({
+                        'satir_sayisi': olcek['satir_sayisi'],
+                        'asama': asama['asama'],
+                        'olcu': alan,
+                        'taban': onceki[alan],
+                        'simdi': asama[alan],
+                        'oran': round(asama[alan] / onceki[alan], 2)
+                    })
+    return gerilemeler
+
+
+def main(argumanlar=None):
+    ayristirici = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ayristirici.add_argument('--olcek', type=int, nargs='+', default=[20000, 200000],
+                             help='satır sayıları')
+    ayristirici.add_argument('--magaza', type=int, default=40)
+    ayristirici.add_argument('--tohum', type=int, default=42)
+    ayristirici.add_argument('--rapor', help='JSON raporun yazılacağı dosya (yoksa stdout)')
+    ayristirici.add_argument('--taban', help='karşılaştırılacak taban rapor')
+    ayristirici.add_argument('--esik', type=float, default=0.25,
+                             help='izin verilen göreli artış (0.25 = %%25)')
+    ayristirici.add_argument('--taban-yaz', dest='taban_yaz', help='raporu yeni taban olarak yaz')
+    secenekler = ayristirici.parse_args(argumanlar)
+
+    with tempfile.TemporaryDirectory() as klasor:
+        # app içe aktarılmadan önce: her çalıştırma boş bir önbellekle başlar
+        os.environ['RETAILFLOW_CACHE_DIR'] = klasor
+        import app
+        app.logger.setLevel(logging.WARNING)
+
+        rapor = {
+            'olusturma': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cekirdek_sayisi': os.cpu_count(),
+            'olcekler': [olcek_calistir(app, satir_sayisi, secenekler.magaza, secenekler.tohum)
+                         for satir_sayisi in secenekler.olcek]
+        }
+
+    metin = json.dumps(rapor, ensure_ascii=False, indent=2)
+    if secenekler.rapor:
+        with open(secenekler.rapor, 'w', encoding='utf-8') as f:
+            f.write(metin)
+    else:
+        print(metin)
+    if secenekler.taban_yaz:
+        with open(secenekler.taban_yaz, 'w', encoding='utf-8') as f:
+            f.write(metin)
+
+    if secenekler.taban:
+        with open(secenekler.taban, encoding='utf-8') as f:
+            taban = json.load(f)
+        gerilemeler = karsilastir(rapor, taban, secenekler.esik)
+        for gerileme in gerilemeler:
+            print(f"GERİLEME {gerileme['satir_sayisi']} satır {gerileme['asama']} {gerileme['olcu']}: "
+                  f"{gerileme['taban']} -> {gerileme['simdi']} (x{gerileme['oran']})", file=sys.stderr)
+        if gerilemeler:
+            return 1
+        print(f"Taban ile karşılaştırma: gerileme yok (eşik %{secenekler.esik * 100:.0f})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
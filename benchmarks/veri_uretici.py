@@ -0,0 +1,47 @@
+"""Şablon sütun düzeninde sentetik mağaza envanteri üretici"""
+import numpy as np
+import pandas as pd
+
+URUN_ADLARI = ['T-Shirt', 'Pantolon', 'Gömlek', 'Ceket', 'Elbise', 'Etek', 'Şort', 'Kazak',
+               'Mont', 'Hırka', 'Sweatshirt', 'Yelek', 'Bluz', 'Tayt', 'Eşofman']
+RENKLER = ['Kırmızı', 'Mavi', 'Siyah', 'Beyaz', 'Yeşil', 'Gri', 'Lacivert', 'Bej', 'İndigo']
+BEDENLER = ['XS', 'S', 'M', 'L', 'XL', 'XXL', '36', '38', '40', '42']
+
+
+def sentetik_envanter(satir_sayisi=10000, magaza_sayisi=20, model_sayisi=None, tohum=42):
+    """Verilen ölçekte, dosya_yukle_df'e doğrudan verilebilecek bir DataFrame üret"""
+    rng = np.random.default_rng(tohum)
+    if model_sayisi is None:
+        model_sayisi = max(1, satir_sayisi // (magaza_sayisi * 8))
+
+    magazalar = np.array([f'Mağaza {i:03d}' for i in range(magaza_sayisi)], dtype=object)
+    model_adlari = np.array(
+        [f'{URUN_ADLARI[i % len(URUN_ADLARI)]} {i:05d}' for i in range(model_sayisi)], dtype=object
+    )
+
+    model = rng.integers(0, model_sayisi, satir_sayisi)
+    renk = rng.integers(0, len(RENKLER), satir_sayisi)
+    beden = rng.integers(0, len(BEDENLER), satir_sayisi)
+
+    renkler = np.array(RENKLER, dtype=object)[renk]
+    bedenler = np.array(BEDENLER, dtype=object)[beden]
+    # Gerçek dışa aktarımlardaki gibi eksik renk/beden ve büyük-küçük harf farkları
+    renkler[rng.random(satir_sayisi) < 0.02] = np.nan
+    bedenler[rng.random(satir_sayisi) < 0.02] = np.nan
+    kucuk = rng.random(satir_sayisi) < 0.05
+    renkler[kucuk] = [f' {r.lower()} ' if isinstance(r, str) else r for r in renkler[kucuk]]
+
+    satis = rng.poisson(rng.gamma(1.5, 3.0, satir_sayisi)).astype(float)
+    envanter = rng.poisson(rng.gamma(2.0, 4.0, satir_sayisi)).astype(float)
+    satis[rng.random(satir_sayisi) < 0.01] = np.nan
+    envanter[rng.random(satir_sayisi) < 0.005] = -1
+
+    return pd.DataFrame({
+        'Depo Adı': magazalar[rng.integers(0, magaza_sayisi, satir_sayisi)],
+        'Ürün Kodu': np.char.add('UR', model.astype(str)).astype(object),
+        'Ürün Adı': model_adlari[model],
+        'Satis': satis,
+        'Envanter': envanter,
+        'Renk Açıklaması': renkler,
+        'Beden': bedenler
+    })
@@ -0,0 +1,152 @@
+"""XLSX yükleme: pd.read_excel + dosya_yukle_df ile salt okunur akış yolunun süre ve tepe RSS karşılaştırması
+
+Her ölçüm ayrı bir süreçte çalışır, böylece tepe RSS yalnızca o yolu yansıtır.
+Ölçümlerden önce aynı verinin CSV ve XLSX olarak her iki yolla yüklenip eski
+yükleyiciyle aynı ürün anahtarlarını verdiği doğrulanır (anahtar_esdegerligi).
+Kullanım: python -m benchmarks.xlsx_okuma_karsilastirma [satir_sayisi ...]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import subprocess
+
+import numpy as np
+
+from benchmarks.veri_uretici import sentetik_envanter
+
+
+def calisma_kitabi_uret(yol, satir_sayisi, tohum=42):
+    """Şablon düzeninde, kullanılmayan ek sütunlar da içeren bir xlsx yaz"""
+    df = sentetik_envanter(satir_sayisi, magaza_sayisi=40, tohum=tohum)
+    df['Sezon'] = '2025-YAZ'
+    df['Açıklama'] = 'Sentetik kayıt'
+
+    # Excel'in kendisi gibi paylaşılan metin tablosuyla yazılır
+    df.to_excel(yol, index=False, sheet_name='Veri')
+
+
+def _tek_olcum(yontem, yol):
+    """Alt süreçte tek yolu çalıştır ve sonucu JSON olarak yaz"""
+    import pandas as pd
+    import app
+
+    app.logger.setLevel(logging.WARNING)
+    sistem = app.MagazaTransferSistemi()
+    app._tepe_rss_sifirla()
+    baslangic = time.perf_counter()
+    with open(yol, 'rb') as akis:
+        if yontem == 'eski':
+            basarili, sonuc = sistem.dosya_yukle_df(pd.read_excel(akis, engine='openpyxl'))
+        else:
+            basarili, sonuc = app.xlsx_dosyasi_yukle(akis, sistem)
+    sure = time.perf_counter() - baslangic
+    assert basarili, sonuc
+
+    print(json.dumps({
+        'yontem': yontem,
+        'sure_sn': round(sure, 2),
+        'tepe_rss_mb': round(app._tepe_rss_bayt() / (1024 * 1024), 1),
+        'satir_sayisi': sonuc['satir_sayisi'],
+        'bellek_mb': round(sistem.data.memory_usage(deep=True).sum() / (1024 * 1024), 1)
+    }))
+
+
+def _sayisal_sutunlu_envanter(satir_sayisi, tohum, bos_beden):
+    """Sayısal ürün kodu/bedenli (isteğe bağlı boş bedenli) ve karışık renkli envanter"""
+    df = sentetik_envanter(satir_sayisi, magaza_sayisi=12, tohum=tohum)
+    rng = np.random.default_rng(tohum)
+    df['Ürün Kodu'] = rng.integers(100, 100 + max(1, satir_sayisi // 50), satir_sayisi)
+    beden = rng.choice([36, 38, 40, 42], satir_sayisi)
+    if bos_beden:
+        # Boş hücreli sayısal sütun float yazılır ve okunur ('38.0')
+        beden = np.where(rng.random(satir_sayisi) < 0.05, np.nan, beden)
+    df['Beden'] = beden
+    # Sayı ve metin karışık sütun: değerler olduğu gibi kalır ('38' / 'KIRMIZI')
+    df.loc[rng.random(satir_sayisi) < 0.1, 'Renk Açıklaması'] = 7
+    return df
+
+
+def _yuklenen_anahtarlar(sistem):
+    """Satır başına (mağaza, ürün kodu, ürün anahtarı) metinleri"""
+    return list(zip(
+        sistem.magaza_tablosu[sistem.magaza_kodlari],
+        sistem.data['Ürün Kodu'].astype(str),
+        sistem.urun_anahtar_tablosu[sistem.urun_anahtar_kodlari]
+    ))
+
+
+def anahtar_esdegerligi(satir_sayisi=3000, tohum=7):
+    """Aynı veri CSV/XLSX olarak eski ve akış yollarıyla yüklendiğinde anahtarlar aynı mı
+
+    Eski yol pd.read_csv / pd.read_excel + dosya_yukle_df'dir. Parçalar arası tip
+    birleştirmesi de sınansın diye parça boyu küçültülür. Fark varsa AssertionError.
+    """
+    import pandas as pd
+    import app
+
+    app.logger.setLevel(logging.WARNING)
+    onceki_parca = app.PARCA_SATIR
+    app.PARCA_SATIR = max(1, satir_sayisi // 4)
+    try:
+        with tempfile.TemporaryDirectory() as klasor:
+            for bos_beden in (True, False):
+                df = _sayisal_sutunlu_envanter(satir_sayisi, tohum, bos_beden)
+                csv_yolu = os.path.join(klasor, 'envanter.csv')
+                xlsx_yolu = os.path.join(klasor, 'envanter.xlsx')
+                df.to_csv(csv_yolu, index=False)
+                df.to_excel(xlsx_yolu, index=False, sheet_name='Veri')
+
+                yuklemeler = {
+                    'csv_eski': lambda akis, sistem: sistem.dosya_yukle_df(pd.read_csv(akis, encoding='utf-8')),
+                    'csv_akis': app.csv_dosyasi_yukle,
+                    'xlsx_eski': lambda akis, sistem: sistem.dosya_yukle_df(pd.read_excel(akis, engine='openpyxl')),
+                    'xlsx_akis': app.xlsx_dosyasi_yukle,
+                }
+                anahtarlar = {}
+                for ad, yukle in yuklemeler.items():
+                    sistem = app.MagazaTransferSistemi()
+                    with open(csv_yolu if ad.startswith('csv') else xlsx_yolu, 'rb') as akis:
+                        basarili, sonuc = yukle(akis, sistem)
+                    assert basarili, (ad, sonuc)
+                    anahtarlar[ad] = _yuklenen_anahtarlar(sistem)
+
+                # Her akış yolu kendi eski yoluyla, iki biçim de birbiriyle aynı
+                for ad, beklenen_ad in (('csv_akis', 'csv_eski'), ('xlsx_akis', 'xlsx_eski'),
+                                        ('xlsx_eski', 'csv_eski')):
+                    deger, beklenen = anahtarlar[ad], anahtarlar[beklenen_ad]
+                    assert deger == beklenen, (bos_beden, ad, next(
+                        (a, b) for a, b in zip(deger, beklenen) if a != b
+                    ) if len(deger) == len(beklenen) else len(deger))
+                beklenen = anahtarlar['csv_eski']
+                # Boş hücreli sayısal beden float okunur: 'TEE RED 38.0'
+                assert any(k.endswith('.0') for _, _, k in beklenen) == bos_beden
+    finally:
+        app.PARCA_SATIR = onceki_parca
+    return True
+
+
+def karsilastir(satir_sayisi):
+    with tempfile.TemporaryDirectory() as klasor:
+        yol = os.path.join(klasor, 'envanter.xlsx')
+        calisma_kitabi_uret(yol, satir_sayisi)
+        sonuclar = {'satir_sayisi': satir_sayisi,
+                    'dosya_mb': round(os.path.getsize(yol) / (1024 * 1024), 1)}
+        for yontem in ('eski', 'akis'):
+            cikti = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.xlsx_okuma_karsilastirma', '--tek', yontem, yol],
+                check=True, capture_output=True, text=True
+            ).stdout
+            sonuclar[yontem] = json.loads(cikti.strip().splitlines()[-1])
+    return sonuclar
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--tek':
+        _tek_olcum(sys.argv[2], sys.argv[3])
+    else:
+        print(json.dumps({'anahtar_esdegerligi': anahtar_esdegerligi()}))
+        for satir_sayisi in [int(a) for a in sys.argv[1:]] or [50000, 200000]:
+            print(json.dumps(karsilastir(satir_sayisi), ensure_ascii=False))